@@ -8,6 +8,7 @@ from datetime import datetime
 from pathlib import Path
 from types import SimpleNamespace
 from scanner.core import run_scan_core
+from scanner.core.store import scan_ref
 from scanner.gui import launch_gui, system_can_use_gui
 from scanner import utils as _u
 from scanner.refs.labels import SEVERITY_LABEL
@@ -17,6 +18,11 @@ from scanner.utils import (
 
 
 def main() -> None:
+    # Sous-commande : interrogation d'une base produite par --db
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        from scanner.core.store import query_main
+        sys.exit(query_main(sys.argv[2:]))
+
     default_root = get_default_root()
 
     parser = argparse.ArgumentParser(
@@ -30,13 +36,16 @@ def main() -> None:
     parser.add_argument("--no-npm", action="store_true")
     parser.add_argument("--only-risk", action="store_true")
     parser.add_argument("--no-scripts", action="store_true")
+    parser.add_argument("--content", action="store_true")
     parser.add_argument("--sysupdater-project", action="store_true")
     parser.add_argument("--sysupdater-global", action="store_true")
     parser.add_argument("--miners", action="store_true")
+    parser.add_argument("--proc-hashes", action="store_true")
     parser.add_argument("--persistence", action="store_true")
     parser.add_argument("--hosts", action="store_true")
     parser.add_argument("--net-listen", action="store_true")
     parser.add_argument("--shell-profiles", action="store_true")
+    parser.add_argument("--all-users", action="store_true")
     parser.add_argument("--startup", action="store_true")
     parser.add_argument("--services", action="store_true")
     parser.add_argument("--defender-exclusions", action="store_true")
@@ -49,18 +58,58 @@ def main() -> None:
     parser.add_argument("--systemd-system", action="store_true")
     parser.add_argument("--ld-preload", action="store_true")
     parser.add_argument("--suid", action="store_true")
+    parser.add_argument("--suid-baseline", action="store_true")
     parser.add_argument("--path-world-writable", action="store_true")
+    parser.add_argument("--containers", action="store_true",
+                        help="Analyse les racines des conteneurs en cours d'exécution (/proc/<pid>/root)")
+    parser.add_argument("--container-workers", type=int, default=None,
+                        help="Conteneurs analysés en parallèle")
 
     parser.add_argument("--csv", help="Chemin CSV de sortie")
     parser.add_argument("--json", help="Chemin JSON de sortie")
+    parser.add_argument("--jsonl", help="Chemin JSON Lines de sortie (un constat par ligne ; .gz = compressé)")
+    parser.add_argument("--db", help="Base SQLite de résultats (indexée ; voir la sous-commande « query »)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--aggregate", action="store_true",
+                      help="Une ligne par IoC (catégorie, élément, sévérité) avec nombre d'occurrences et sources")
+    mode.add_argument("--baseline", metavar="REF",
+                      help="Scan précédent (.jsonl/.csv/.json ou base --db) : sorties limitées aux différences")
+    parser.add_argument("--baseline-scan", metavar="ID", default=None, type=scan_ref,
+                        help="Avec --baseline sur une base SQLite : scan de référence (défaut: le dernier terminé)")
+    parser.add_argument("--summary", metavar="PATH",
+                        help="Synthèse par IoC dans un fichier à part (.csv/.json/.jsonl), détail conservé")
+    parser.add_argument("--sorted", action="store_true",
+                        help="Sorties triées (catégorie, projet, élément) — tri externe, écrites en fin de scan")
     parser.add_argument("--delimiter", default=None, help="Délimiteur CSV (par défaut culturel)")
     parser.add_argument("--max-depth", type=int, default=6)
     parser.add_argument("--follow-links", action="store_true")
     parser.add_argument("--verbose", action="store_true")
     parser.add_argument("--gui", action="store_true")
     parser.add_argument("--exec-timeout", type=int, default=60)
+    parser.add_argument("--stage-workers", type=int, default=None,
+                        help="Étapes indépendantes exécutées en parallèle (1 = séquentiel)")
+    parser.add_argument("--resume", metavar="SCAN_ID", default=None,
+                        help="Reprend un scan interrompu depuis son dernier point de reprise (options d'origine)")
+    parser.add_argument("--content-max-mb", type=int, default=4)
+    parser.add_argument("--system-root", action="append", default=[], metavar="PATH",
+                        help="Racine d'une image système montée (répétable : une analyse par image)")
+    parser.add_argument("--target-os", choices=["auto", "windows", "macos", "linux"], default="auto",
+                        help="OS de l'image montée (auto : détecté d'après l'arborescence)")
+    parser.add_argument("--image-workers", type=int, default=None,
+                        help="Images analysées en parallèle (processus)")
+    parser.add_argument("--archive", action="append", default=[], metavar="PATH",
+                        help="Image OCI / docker save (.tar) ou archive npm (.tgz) analysée en flux (répétable)")
 
     args = parser.parse_args()
+    if args.baseline and not Path(args.baseline).is_file():
+        parser.error(f"--baseline: fichier introuvable : {args.baseline}")
+    checkpoint = None
+    if args.resume:
+        from scanner.core.checkpoint import Checkpoint, CheckpointError
+        try:
+            checkpoint = Checkpoint.load(args.resume)
+        except CheckpointError as e:
+            parser.error(f"--resume: {e}")
 
     # Régler le timeout global des commandes externes
     _u.EXEC_TIMEOUT = max(1, int(args.exec_timeout or 60))
@@ -72,6 +121,9 @@ def main() -> None:
 
     root = Path(args.root).resolve()
     exclude = [name.strip() for name in (args.exclude or "").split(",") if name.strip()]
+    if checkpoint is not None:
+        # reprise : racine, exclusions et options du scan d'origine (sorties comprises, recréées)
+        root, exclude = checkpoint.root, checkpoint.exclude_names
     cli_deli = args.delimiter if args.delimiter is not None else default_csv_delimiter()
 
     print(f"[i] Début du scan — {datetime.now().isoformat(timespec='seconds')}")
@@ -84,12 +136,22 @@ def main() -> None:
         no_npm=args.no_npm,
         only_risk=args.only_risk,
         no_scripts=args.no_scripts,
+        content=args.content,
+        content_max_mb=args.content_max_mb,
         sysupdater_project=args.sysupdater_project,
         sysupdater_global=args.sysupdater_global,
         miners=args.miners,
+        proc_hashes=args.proc_hashes,
         persistence=args.persistence,
         csv=args.csv,
         json=args.json,
+        jsonl=args.jsonl,
+        db=args.db,
+        aggregate=args.aggregate,
+        baseline=args.baseline,
+        baseline_scan=args.baseline_scan,
+        summary=args.summary,
+        sorted_output=args.sorted,
         delimiter=cli_deli,
         max_depth=args.max_depth,
         follow_links=args.follow_links,
@@ -97,6 +159,7 @@ def main() -> None:
         hosts=args.hosts,
         net_listen=args.net_listen,
         shell_profiles=args.shell_profiles,
+        all_users=args.all_users,
         startup=args.startup,
         services=args.services,
         defender_exclusions=args.defender_exclusions,
@@ -109,12 +172,62 @@ def main() -> None:
         systemd_system=args.systemd_system,
         ld_preload=args.ld_preload,
         suid=args.suid,
+        suid_baseline=args.suid_baseline,
         path_world_writable=args.path_world_writable,
+        containers=args.containers,
+        container_workers=args.container_workers,
+        stage_workers=args.stage_workers,
         exec_timeout=_u.EXEC_TIMEOUT,
+        archives=args.archive,
+        system_root=None,
+        target_os=args.target_os,
     )
 
+    if checkpoint is not None:
+        ns = checkpoint.options()
+        _u.EXEC_TIMEOUT = max(1, int(getattr(ns, "exec_timeout", None) or _u.EXEC_TIMEOUT))
+
+    images = [Path(p).resolve() for p in args.system_root] if checkpoint is None else []
+    if len(images) > 1:
+        from scanner.core.images import IMAGE_WORKERS, run_image_scans
+        print(f"[i] {len(images)} image(s) montée(s) — analyse parallèle")
+        results = run_image_scans(images, exclude, ns, workers=args.image_workers or IMAGE_WORKERS)
+        print(f"\nRésumé → Images: {len(results)}/{len(images)} | "
+              f"Total: {sum(r['total'] for r in results.values())} | "
+              f"À risque (HIGH): {sum(r['high'] for r in results.values())}")
+        print("[i] Fin du scan.")
+        return
+    if images:
+        # une seule image : analyse dans ce processus, la racine npm devient celle de l'image
+        ns.system_root = str(images[0])
+        root = images[0]
+
     rows, stats = run_scan_core(root, exclude, ns, log_fn=print, cancel=None)
 
+    if ns.baseline:
+        # comparaison à une référence : la console montre les différences, comme les fichiers de sortie
+        print("\n=== DIFFÉRENCES ===")
+        if not rows:
+            print("(Aucune différence)")
+        else:
+            max_display = int(os.environ.get("IOC_MAX_DISPLAY", "300"))
+            signs = {"added": "+", "removed": "-", "severity": "~"}
+            for rec in rows[:max_display]:
+                sev = rec["Severity"]
+                if rec["Change"] == "severity":
+                    sev = f"{rec.get('PreviousSeverity', '')} → {sev}"
+                print(f"{signs.get(rec['Change'], '?')} [{sev}] "
+                      f"{rec['Category']} | {rec['Project']} | {rec['Item']} | {rec['Detail']}")
+            listed = stats["added"] + stats["removed"] + stats["changed"]
+            shown = min(len(rows), max_display)
+            if listed > shown:
+                where = " ; liste complète dans les fichiers de sortie" if (ns.csv or ns.json or ns.jsonl) else ""
+                print(f"... {shown} affichés sur {listed} ({listed - shown} lignes non affichées{where})")
+        print(f"\nRésumé → Nouveaux: {stats['added']} | Disparus: {stats['removed']} | "
+              f"Sévérité modifiée: {stats['changed']} (scan : {stats['total']} constat(s), HIGH: {stats['high']})")
+        print("[i] Fin du scan.")
+        return
+
     print("\n=== RÉSULTATS ===")
     if not rows:
         print("(Aucune détection)")
@@ -127,9 +240,11 @@ def main() -> None:
                 f"{row_rec['Category']} | {row_rec['Project']} | "
                 f"{row_rec['Item']} | {row_rec['Detail']}"
             )
-        remaining = len(rows) - max_display
-        if remaining > 0:
-            print(f"... ({remaining} lignes supplémentaires non affichées)")
+        listed = len(rows) if ns.aggregate else stats["total"]
+        shown = min(len(rows), max_display)
+        if listed > shown:
+            where = " ; liste complète dans les fichiers de sortie" if (ns.csv or ns.json or ns.jsonl or ns.db) else ""
+            print(f"... {shown} affichés sur {listed} ({listed - shown} lignes non affichées{where})")
 
     print(f"\nRésumé → Total: {stats['total']} | À risque (HIGH): {stats['high']}")
     print("[i] Fin du scan.")
@@ -0,0 +1,74 @@
+# scanner/cancel.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import threading
+
+from typing import Callable, List, Optional
+
+# Période de relève d'un threading.Event ordinaire suivi par un jeton (CancelToken.follow)
+FOLLOW_INTERVAL_S = 0.02
+
+
+class CancelToken(threading.Event):
+    """
+    Jeton d'arrêt d'un scan. Reste un threading.Event (is_set/wait, _should_stop) pour les points de
+    contrôle des boucles, et prévient en plus ses abonnés dès set() : l'exécuteur de commandes tue
+    alors ses groupes de processus sans attendre leur délai.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._callbacks: List[Callable[[], None]] = []
+        self._cb_lock = threading.Lock()
+        self._follow_done: Optional[threading.Event] = None
+
+    def set(self) -> None:
+        with self._cb_lock:
+            if self.is_set():
+                return
+            super().set()
+            callbacks, self._callbacks = self._callbacks, []
+        for cb in callbacks:
+            try:
+                cb()
+            except (OSError, RuntimeError):
+                pass
+
+    def on_cancel(self, cb: Callable[[], None]) -> Callable[[], None]:
+        """Appelle cb() à l'arrêt (aussitôt s'il a déjà eu lieu) ; retourne de quoi se désabonner."""
+        with self._cb_lock:
+            if not self.is_set():
+                self._callbacks.append(cb)
+                return lambda: self._unsubscribe(cb)
+        cb()
+        return lambda: None
+
+    def _unsubscribe(self, cb: Callable[[], None]) -> None:
+        with self._cb_lock:
+            if cb in self._callbacks:
+                self._callbacks.remove(cb)
+
+    @classmethod
+    def follow(cls, event: Optional[threading.Event]) -> "CancelToken":
+        """Jeton qui suit un threading.Event ordinaire (API historique) ; release() arrête le suivi."""
+        if isinstance(event, CancelToken):
+            return event
+        token = cls()
+        if event is not None:
+            done = token._follow_done = threading.Event()
+
+            def watch() -> None:
+                while not done.is_set() and not token.is_set():
+                    if event.wait(FOLLOW_INTERVAL_S):
+                        token.set()
+
+            threading.Thread(target=watch, name="cancel-follow", daemon=True).start()
+        return token
+
+    def release(self) -> None:
+        if self._follow_done is not None:
+            self._follow_done.set()
+
+
+__all__ = ["CancelToken"]
@@ -0,0 +1,143 @@
+# scanner/core/aggregate.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from scanner.core.sinks import FindingSink
+
+# Nombre max d'IoC INFO distincts suivis ; au-delà, regroupés par catégorie sous « (autres) ».
+# Les IoC MEDIUM/HIGH sont toujours suivis un par un.
+AGG_MAX_KEYS = int(os.environ.get("IOC_AGG_MAX_KEYS", "200000"))
+AGG_MAX_SOURCES = 8
+OVERFLOW_ITEM = "(autres)"
+
+_SEVERITY_RANK = {"HIGH": 0, "MEDIUM": 1, "INFO": 2}
+_LOCK_FILES = ("package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "package.json")
+
+
+def _basename(path: str) -> str:
+    return path.replace("\\", "/").rsplit("/", 1)[-1]
+
+
+def finding_source(row: Mapping[str, str]) -> str:
+    """
+    Origine d'un constat : fichier descripteur s'il est connu, sinon déduite du champ Detail : lockfile (yarn/pnpm, ou 'node_modules/…' de
+    package-lock), arbre 'npm ls' (a > b > c), membre d'archive ('app/yarn.lock: …') ; sinon la catégorie.
+    """
+    descriptor = row.get("DescriptorPath")
+    if descriptor:
+        return _basename(descriptor)
+    detail = row.get("Detail", "") or ""
+    head, sep, rest = detail.partition(": ")
+    name = _basename(head.split(" [", 1)[0])
+    if name in _LOCK_FILES:
+        return name
+    if sep and "/" in head:
+        detail = rest
+    if row.get("Category") == "npm:packages":
+        return "package-lock.json" if detail.startswith("node_modules/") or not detail else "npm ls"
+    return row.get("Category", "")
+
+
+class IocAggregate:
+    __slots__ = ("count", "first_project", "last_project", "sources", "more_sources")
+
+    def __init__(self, project: str) -> None:
+        self.count = 0
+        self.first_project = project
+        self.last_project = project
+        self.sources: List[str] = []
+        self.more_sources = False
+
+
+class Aggregator:
+    """
+    Regroupe les constats par (catégorie, élément, sévérité) : nombre d'occurrences, premier et dernier
+    projet, sources (bornées). Mémoire proportionnelle au nombre d'IoC distincts ; les clés INFO sont
+    plafonnées à max_keys.
+    """
+
+    def __init__(self, max_keys: int = AGG_MAX_KEYS, max_sources: int = AGG_MAX_SOURCES) -> None:
+        self.max_keys = max(1, max_keys)
+        self.max_sources = max(1, max_sources)
+        self.entries: Dict[Tuple[str, str, str], IocAggregate] = {}
+        self.overflowed = 0   # occurrences INFO rangées sous « (autres) » faute de place
+        self._info_keys = 0
+        self.total = 0
+
+    def add(self, row: Mapping[str, str]) -> None:
+        self.total += 1
+        key = (row["Category"], row["Item"], row["Severity"])
+        entry = self.entries.get(key)
+        if entry is None:
+            if row["Severity"] == "INFO":
+                if self._info_keys >= self.max_keys:
+                    self.overflowed += 1
+                    key = (row["Category"], OVERFLOW_ITEM, "INFO")
+                    entry = self.entries.get(key)
+                else:
+                    self._info_keys += 1
+            if entry is None:
+                entry = self.entries[key] = IocAggregate(row["Project"])
+        entry.count += 1
+        entry.last_project = row["Project"]
+        if not entry.more_sources:
+            src = finding_source(row)
+            if src not in entry.sources:
+                if len(entry.sources) < self.max_sources:
+                    entry.sources.append(src)
+                else:
+                    entry.more_sources = True
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Une ligne par IoC (HIGH d'abord, puis par nombre d'occurrences décroissant)."""
+        out: List[Dict[str, Any]] = []
+        for (category, item, severity), e in self.entries.items():
+            sources = ", ".join(e.sources) + (", …" if e.more_sources else "")
+            where = e.first_project if e.first_project == e.last_project else f"{e.first_project} … {e.last_project}"
+            out.append({
+                "Category": category,
+                "Project": where,
+                "Item": item,
+                "Detail": f"{e.count} occurrence(s) ; sources : {sources}",
+                "Severity": severity,
+                "Count": e.count,
+                "FirstProject": e.first_project,
+                "LastProject": e.last_project,
+                "Sources": list(e.sources),
+            })
+        out.sort(key=lambda r: (_SEVERITY_RANK.get(r["Severity"], 3), -r["Count"], r["Category"], r["Item"]))
+        return out
+
+
+class AggregateSink(FindingSink):
+    """Accumule les constats et n'écrit dans `targets` que la synthèse, à la fermeture."""
+
+    def __init__(self, targets: Sequence[FindingSink] = (), aggregator: Optional[Aggregator] = None) -> None:
+        super().__init__(", ".join(t.path for t in targets))
+        self.targets = list(targets)
+        self.aggregator = aggregator or Aggregator()
+        self.summary: List[Dict[str, Any]] = []   # synthèse finale (disponible après close)
+
+    def write(self, row: Mapping[str, str]) -> None:
+        self.aggregator.add(row)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        try:
+            self.summary = self.aggregator.records()
+            for rec in self.summary:
+                for target in self.targets:
+                    target.write(rec)
+        finally:
+            for target in self.targets:
+                target.close()
+            self.targets = []
+
+
+__all__ = ["AGG_MAX_KEYS", "Aggregator", "AggregateSink", "IocAggregate", "finding_source"]
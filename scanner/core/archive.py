@@ -0,0 +1,300 @@
+# scanner/core/archive.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import hashlib, json, posixpath, re, tarfile, threading
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from scanner.core.common import (
+    add_row, check_lock_packages, check_lock_text, check_package_scripts, is_compromised, _should_stop,
+)
+from scanner.core.content import CONTENT_MAX_BYTES, build_content_automaton
+from scanner.refs.content import CONTENT_EXTENSIONS
+from scanner.refs.miners import MINER_FILE_HINTS
+from scanner.refs.packages import SYSUPDATER_NAMES, TARGETS
+
+# Descripteurs lus en mémoire (package.json, lockfiles, manifestes d'image) : au-delà, ignorés
+DESCRIPTOR_MAX_BYTES = 8 * 1024 * 1024
+MANIFEST_MAX_BYTES = 1024 * 1024
+
+_HASH_CHUNK = 1 << 20
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_WHITEOUT_PREFIX = ".wh."
+_OPAQUE_MARKER = ".wh..wh..opq"
+
+
+class _Prefixed:
+    """Flux séquentiel dont les premiers octets ont déjà été lus (détection du format d'une couche)."""
+
+    def __init__(self, head: bytes, fileobj) -> None:
+        self._head = head
+        self._fileobj = fileobj
+
+    def read(self, size: int = -1) -> bytes:
+        if not self._head:
+            return self._fileobj.read(size)
+        if size is None or size < 0:
+            data, self._head = self._head + self._fileobj.read(), b""
+            return data
+        data, self._head = self._head[:size], self._head[size:]
+        if len(data) < size:
+            data += self._fileobj.read(size - len(data))
+        return data
+
+
+def _norm(name: str) -> str:
+    name = posixpath.normpath(name.lstrip("/"))
+    return "" if name == "." else name
+
+
+def _looks_like_tar(head: bytes) -> bool:
+    return head[:2] == _GZIP_MAGIC or head[257:262] == b"ustar"
+
+
+class _ArchiveScan:
+    """État d'une archive : couches vues, blanchiments (whiteouts), manifestes et constats en attente."""
+
+    def __init__(self, label: str, only_risk: bool, check_scripts: bool, content: bool, max_bytes: int,
+                 log_fn, verbose: bool, cancel: Optional[threading.Event]) -> None:
+        self.label = label
+        self.only_risk = only_risk
+        self.check_scripts = check_scripts
+        self.max_bytes = max_bytes
+        self.log_fn = log_fn
+        self.verbose = verbose
+        self.cancel = cancel
+        self.miner_rx = [re.compile(rx, re.I) for rx in MINER_FILE_HINTS]
+        self.automaton, self.severities = build_content_automaton() if content else (None, {})
+        # constats : (id de couche ou "", chemin du membre, ligne)
+        self.findings: List[Tuple[str, str, Dict[str, str]]] = []
+        self.whiteouts: Dict[str, Set[str]] = {}
+        self.opaque: Dict[str, Set[str]] = {}
+        self.json_docs: Dict[str, Any] = {}
+
+    # -- visiteurs ------------------------------------------------------------
+    def _emit(self, layer: str, path: str, fn, *, prefix: bool = False) -> None:
+        """Réutilise un contrôle de common.py (qui écrit dans une liste) ; prefix : Detail préfixé du membre."""
+        tmp: List[Dict[str, str]] = []
+        fn(tmp)
+        for row in tmp:
+            if prefix:
+                row["Detail"] = f"{path}: {row['Detail']}"
+            self.findings.append((layer, path, row))
+
+    def _add(self, layer: str, path: str, category: str, item: str, detail: str, severity: str) -> None:
+        self._emit(layer, path, lambda out: add_row(out, category, "", item, detail, severity))
+
+    def visit(self, tar: tarfile.TarFile, member: tarfile.TarInfo, layer: str) -> None:
+        path = _norm(member.name)
+        base = posixpath.basename(path)
+        if layer and base.startswith(_WHITEOUT_PREFIX):
+            parent = posixpath.dirname(path)
+            if base == _OPAQUE_MARKER:
+                self.opaque.setdefault(layer, set()).add(parent)
+            else:
+                self.whiteouts.setdefault(layer, set()).add(posixpath.join(parent, base[len(_WHITEOUT_PREFIX):]))
+            return
+        if not member.isfile():
+            return
+        low = base.lower()
+
+        if low in SYSUPDATER_NAMES or any(rx.search(base) for rx in self.miner_rx):
+            digest = self._sha256(tar, member)
+            category = "IoC:sysupdater" if low in SYSUPDATER_NAMES else "miner:file"
+            detail = f"{path} (SHA256={digest})" if digest else path
+            self._add(layer, path, category, base, detail, "HIGH")
+            return
+
+        if low in ("package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml"):
+            if member.size > DESCRIPTOR_MAX_BYTES:
+                return
+            data = self._read(tar, member)
+            if data is None:
+                return
+            if low == "package.json":
+                self._visit_package_json(data, path, layer)
+            elif low == "package-lock.json":
+                doc = self._json(data)
+                if isinstance(doc, dict):
+                    self._emit(layer, path, lambda out: check_lock_packages(doc, out, "", self.only_risk), prefix=True)
+            else:
+                text = data.decode("utf-8", errors="ignore")
+                self._emit(layer, path, lambda out: check_lock_text(text, path, out, "", self.only_risk,
+                                                                       cancel=self.cancel))
+            return
+
+        if self.automaton and posixpath.splitext(low)[1] in CONTENT_EXTENSIONS and 0 < member.size <= self.max_bytes:
+            data = self._read(tar, member)
+            for pid, offset in sorted(self.automaton.first_matches(data or b"").items(), key=lambda kv: kv[1]):
+                if self.log_fn and self.verbose:
+                    self.log_fn(f"[+] Signature {pid} dans {self.label}:{path} @ {offset}")
+                self._add(layer, path, "npm:content", pid, f"{path} (id={pid}; offset={offset})",
+                          self.severities.get(pid, "HIGH"))
+
+    def _visit_package_json(self, data: bytes, path: str, layer: str) -> None:
+        doc = self._json(data)
+        if not isinstance(doc, dict):
+            return
+        # paquet installé (node_modules/…/package.json) ou racine d'un .tgz npm
+        name, version = doc.get("name"), doc.get("version")
+        if isinstance(name, str) and isinstance(version, str) and name in TARGETS:
+            compromised = is_compromised(name, version)
+            if (not self.only_risk) or compromised:
+                status = "À RISQUE" if compromised else "OK"
+                self._add(layer, path, "npm:packages", f"{name}@{version} [{status}]", path,
+                          "HIGH" if compromised else "INFO")
+        if self.check_scripts:
+            self._emit(layer, path, lambda out: check_package_scripts(doc, out, "", path))
+
+    # -- lecture des membres --------------------------------------------------
+    @staticmethod
+    def _read(tar: tarfile.TarFile, member: tarfile.TarInfo) -> Optional[bytes]:
+        try:
+            fh = tar.extractfile(member)
+            return fh.read() if fh else None
+        except (OSError, tarfile.TarError):
+            return None
+
+    @staticmethod
+    def _sha256(tar: tarfile.TarFile, member: tarfile.TarInfo) -> str:
+        try:
+            fh = tar.extractfile(member)
+            if fh is None:
+                return ""
+            h = hashlib.sha256()
+            for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+                h.update(chunk)
+            return h.hexdigest()
+        except (OSError, tarfile.TarError):
+            return ""
+
+    @staticmethod
+    def _json(data: bytes) -> Any:
+        try:
+            return json.loads(data.decode("utf-8", errors="ignore"))
+        except ValueError:
+            return None
+
+    # -- parcours -------------------------------------------------------------
+    def walk(self, tar: tarfile.TarFile, layer: str = "") -> None:
+        for member in tar:
+            if _should_stop(self.cancel):
+                return
+            if not layer and member.isfile() and self._maybe_layer(tar, member):
+                continue
+            self.visit(tar, member, layer)
+
+    def _maybe_layer(self, tar: tarfile.TarFile, member: tarfile.TarInfo) -> bool:
+        """Membre de 1er niveau : couche (layer.tar, blobs/sha256/…) à parcourir en flux, ou manifeste JSON."""
+        name = _norm(member.name)
+        is_blob = name.startswith("blobs/")
+        if not (is_blob or name.endswith(("layer.tar", "layer.tar.gz")) or name in ("manifest.json", "index.json")):
+            return False
+        fh = tar.extractfile(member)
+        if fh is None:
+            return False
+        head = fh.read(512)
+        if head[:1] in (b"{", b"[") and member.size <= MANIFEST_MAX_BYTES:
+            doc = self._json(head + fh.read())
+            if doc is not None:
+                self.json_docs[name] = doc
+            return True
+        if head[:4] == _ZSTD_MAGIC:
+            if self.log_fn:
+                self.log_fn(f"[!] {self.label}: couche zstd non prise en charge ({name})")
+            return True
+        if not _looks_like_tar(head):
+            return is_blob
+        layer = self._layer_id(name)
+        if self.log_fn and self.verbose:
+            self.log_fn(f"[v] {self.label}: couche {layer}")
+        try:
+            with tarfile.open(fileobj=_Prefixed(head, fh), mode="r|*") as inner:
+                self.walk(inner, layer)
+        except (OSError, tarfile.TarError, EOFError) as e:
+            if self.log_fn:
+                self.log_fn(f"[!] {self.label}: couche illisible {name} ({e})")
+        return True
+
+    @staticmethod
+    def _layer_id(name: str) -> str:
+        """'blobs/sha256/<hex>' → <hex> ; '<hex>/layer.tar' → <hex>."""
+        if name.startswith("blobs/"):
+            return posixpath.basename(name)
+        return posixpath.dirname(name) or name
+
+    # -- finalisation : ordre des couches, nom d'image, blanchiments ---------
+    def layer_order(self) -> Tuple[List[str], str]:
+        """(identifiants de couches de la plus basse à la plus haute, nom de l'image) d'après les manifestes."""
+        manifest = self.json_docs.get("manifest.json")
+        if isinstance(manifest, list) and manifest and isinstance(manifest[0], dict):
+            entry = manifest[0]
+            tags = entry.get("RepoTags") or []
+            layers = [self._layer_id(_norm(str(l))) for l in entry.get("Layers") or []]
+            return layers, str(tags[0]) if tags else ""
+        index = self.json_docs.get("index.json")
+        if isinstance(index, dict):
+            for desc in index.get("manifests") or []:
+                if not isinstance(desc, dict):
+                    continue
+                doc = self.json_docs.get(f"blobs/{str(desc.get('digest', '')).replace(':', '/')}")
+                if isinstance(doc, dict) and isinstance(doc.get("layers"), list):
+                    layers = [str(l.get("digest", "")).split(":")[-1] for l in doc["layers"] if isinstance(l, dict)]
+                    ref = (desc.get("annotations") or {}).get("org.opencontainers.image.ref.name", "")
+                    return layers, str(ref)
+        return [], ""
+
+    def _masked_by(self, layer: str, path: str, order: List[str]) -> str:
+        if layer not in order:
+            return ""
+        for upper in order[order.index(layer) + 1:]:
+            for w in self.whiteouts.get(upper, ()):
+                if path == w or path.startswith(w + "/"):
+                    return upper
+            for d in self.opaque.get(upper, ()):
+                if path.startswith(d + "/"):
+                    return upper
+        return ""
+
+    def flush(self, rows: List[Dict[str, str]]) -> None:
+        order, image = self.layer_order()
+        image = image or self.label
+        for layer, path, row in self.findings:
+            if layer:
+                pos = f"{order.index(layer) + 1}/{len(order)} " if layer in order else ""
+                row["Project"] = f"{image} [couche {pos}{layer[:12]}]"
+                masked = self._masked_by(layer, path, order)
+                if masked:
+                    row["Detail"] += f" [supprimé par la couche {masked[:12]}]"
+            else:
+                row["Project"] = image
+            rows.append(row)
+
+
+def scan_archive(
+        path: Path, rows: List[Dict[str, str]], *, only_risk: bool = False, check_scripts: bool = True,
+        content: bool = False, max_bytes: int = CONTENT_MAX_BYTES, log_fn=None, verbose: bool = False,
+        cancel: Optional[threading.Event] = None,
+) -> None:
+    """
+    Analyse en flux (tarfile 'r|*', sans extraction ni accès aléatoire) d'une image OCI / 'docker save'
+    ou d'une archive .tar/.tgz (paquet npm). Les couches imbriquées sont lues au passage ; chaque
+    constat est attribué à l'image et à sa couche, les fichiers blanchis par une couche supérieure
+    sont signalés comme tels.
+    """
+    scan = _ArchiveScan(path.name, only_risk, check_scripts, content, max_bytes, log_fn, verbose, cancel)
+    if log_fn:
+        log_fn(f"[i] Archive : {path}")
+    try:
+        with tarfile.open(path, mode="r|*") as tar:
+            scan.walk(tar)
+    except (OSError, tarfile.TarError, EOFError) as e:
+        if log_fn:
+            log_fn(f"[!] Archive illisible {path} ({e})")
+    scan.flush(rows)
+
+
+__all__ = ["scan_archive", "DESCRIPTOR_MAX_BYTES"]
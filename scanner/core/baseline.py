@@ -0,0 +1,298 @@
+# scanner/core/baseline.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import csv, gzip, hashlib, io, json, os, re, shutil, sqlite3, tempfile
+
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from scanner.core.sinks import RETAIN_WITH_SINKS, FindingSink
+
+# Lots d'insertion / de recherche dans l'ensemble de hachages sur disque
+BASELINE_BATCH = 10_000
+
+SEVERITY_CODE = {"INFO": 0, "MEDIUM": 1, "HIGH": 2}
+_CODE_SEVERITY = {v: k for k, v in SEVERITY_CODE.items()}
+
+# Parties volatiles d'un constat, neutralisées dans la clé : statut porté par la sévérité, PID
+_STATUS_SUFFIX = re.compile(r"\s*\[(?:OK|À RISQUE)\]$")
+_VOLATILE = re.compile(r"\bPID=\d+")
+
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+
+
+def normalize_key(row: Mapping[str, str]) -> Tuple[str, str, str, str]:
+    """Identité d'un constat d'un scan à l'autre (hors sévérité) : espaces réduits, statut et PID ignorés."""
+    item = str(row.get("Item", ""))
+    if item.endswith("]"):
+        item = _STATUS_SUFFIX.sub("", item)
+    detail = str(row.get("Detail", ""))
+    if "PID=" in detail:
+        detail = _VOLATILE.sub("PID=*", detail)
+    return (" ".join(str(row.get("Category", "")).split()), " ".join(str(row.get("Project", "")).split()),
+            " ".join(item.split()), " ".join(detail.split()))
+
+
+def finding_hash(row: Mapping[str, str]) -> int:
+    """Empreinte 64 bits (signée, type INTEGER SQLite) de la clé normalisée."""
+    digest = hashlib.blake2b("\x1f".join(normalize_key(row)).encode("utf-8", "surrogatepass"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+# ---------------------------------------------------------------------------
+# Lecture d'une référence : JSON Lines / CSV (.gz possible), JSON, ou base --db
+# ---------------------------------------------------------------------------
+
+def _open_text(path: Path, encoding: str = "utf-8") -> io.TextIOBase:
+    if path.suffix.lower() == ".gz":
+        return gzip.open(path, "rt", encoding=encoding, newline="")  # type: ignore[return-value]
+    return path.open("r", encoding=encoding, newline="")
+
+
+def _is_sqlite(path: Path) -> bool:
+    try:
+        with path.open("rb") as fh:
+            return fh.read(len(_SQLITE_MAGIC)) == _SQLITE_MAGIC
+    except OSError:
+        return False
+
+
+def iter_baseline_rows(path: str, scan: Optional[str] = None) -> Iterator[Mapping[str, str]]:
+    """
+    Constats d'un scan précédent, lus en flux. Formats : .jsonl/.ndjson, .csv (délimiteur détecté),
+    .json (tableau, chargé en entier : préférer .jsonl), base SQLite de --db (scan = id, défaut : le dernier terminé).
+    ValueError si le format n'est pas reconnu ou la base vide.
+    """
+    p = Path(path)
+    if _is_sqlite(p):
+        from scanner.core.store import connect, query_findings
+        con = connect(str(p))
+        try:
+            if scan and scan != "latest":
+                if not str(scan).isdigit():
+                    raise ValueError(f"identifiant de scan invalide : {scan!r}")
+                scan_id = int(scan)
+            else:
+                found = con.execute("SELECT MAX(id) FROM scans WHERE finished_at IS NOT NULL").fetchone()
+                scan_id = found[0] if found else None
+            if scan_id is None:
+                raise ValueError(f"{path}: aucun scan terminé dans la base")
+            yield from query_findings(con, scan_id)
+        finally:
+            con.close()
+        return
+    name = p.name.lower()[:-3] if p.name.lower().endswith(".gz") else p.name.lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        with _open_text(p) as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    elif name.endswith(".csv"):
+        with _open_text(p, encoding="utf-8-sig") as fh:
+            head = fh.readline()
+            deli = max(";,\t", key=head.count)
+            reader = csv.DictReader(fh, fieldnames=next(csv.reader([head], delimiter=deli)), delimiter=deli)
+            yield from reader
+    elif name.endswith(".json"):
+        with _open_text(p) as fh:
+            data = json.load(fh)
+        if not isinstance(data, list):
+            raise ValueError(f"{path}: tableau JSON attendu")
+        yield from (r for r in data if isinstance(r, dict))
+    else:
+        raise ValueError(f"{path}: format de référence non reconnu (.jsonl, .csv, .json ou base SQLite)")
+
+
+# ---------------------------------------------------------------------------
+# Ensemble de hachages sur disque
+# ---------------------------------------------------------------------------
+
+class BaselineSet:
+    """
+    Empreintes (64 bits) + sévérité de la référence dans une base SQLite temporaire (WITHOUT ROWID) :
+    ~20 octets par constat sur disque, mémoire constante même pour des dizaines de millions de lignes.
+    seen = 1 pour les clés rencontrées pendant le scan courant (ou ajoutées par lui).
+    """
+
+    def __init__(self) -> None:
+        self._dir = tempfile.mkdtemp(prefix="ioc_baseline_")
+        self._con = sqlite3.connect(os.path.join(self._dir, "baseline.sqlite"), check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=OFF")
+        self._con.execute("PRAGMA synchronous=OFF")
+        self._con.execute("CREATE TABLE base (h INTEGER PRIMARY KEY, sev INTEGER NOT NULL, seen INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID")
+        self.size = 0
+
+    def load(self, rows: Iterable[Mapping[str, str]]) -> int:
+        batch: List[Tuple[int, int]] = []
+        with self._con:
+            for row in rows:
+                batch.append((finding_hash(row), SEVERITY_CODE.get(str(row.get("Severity", "")), 0)))
+                if len(batch) >= BASELINE_BATCH:
+                    self._con.executemany("INSERT OR REPLACE INTO base (h, sev) VALUES (?, ?)", batch)
+                    batch = []
+            if batch:
+                self._con.executemany("INSERT OR REPLACE INTO base (h, sev) VALUES (?, ?)", batch)
+        self.size = self._con.execute("SELECT COUNT(*) FROM base").fetchone()[0]
+        return self.size
+
+    def _lookup(self, hashes: Iterable[int], sql: str) -> Iterator[Tuple[Any, ...]]:
+        uniq = list(set(hashes))
+        for i in range(0, len(uniq), 500):
+            chunk = uniq[i:i + 500]
+            yield from self._con.execute(sql.format(", ".join("?" * len(chunk))), chunk)
+
+    def _mark_seen(self, hashes: Iterable[int]) -> None:
+        for _ in self._lookup(hashes, "UPDATE base SET seen = 1 WHERE seen = 0 AND h IN ({})"):
+            pass
+
+    def match(self, rows: Sequence[Mapping[str, str]]) -> List[Tuple[str, Optional[str]]]:
+        """
+        Pour chaque constat du lot : ('added', None), ('severity', ancienne sévérité) ou ('same', sévérité).
+        Les clés sont marquées vues ; une clé nouvelle est ajoutée (ses doublons deviennent 'same').
+        """
+        hashes = [finding_hash(r) for r in rows]
+        known: Dict[int, int] = dict(self._lookup(hashes, "SELECT h, sev FROM base WHERE h IN ({})"))
+        added: Dict[int, int] = {}
+        changed: Dict[int, int] = {}
+        out: List[Tuple[str, Optional[str]]] = []
+        for h, row in zip(hashes, rows):
+            sev = SEVERITY_CODE.get(str(row.get("Severity", "")), 0)
+            old = known.get(h)
+            if old is None:
+                out.append(("added", None))
+                known[h] = added[h] = sev
+            elif old != sev:
+                out.append(("severity", _CODE_SEVERITY.get(old, "")))
+                known[h] = sev
+                if h not in added:
+                    changed[h] = sev
+                else:
+                    added[h] = sev
+            else:
+                out.append(("same", _CODE_SEVERITY.get(old, "")))
+        with self._con:
+            self._mark_seen(h for h in known if h not in added)
+            if added:
+                self._con.executemany("INSERT INTO base (h, sev, seen) VALUES (?, ?, 1)", added.items())
+            if changed:
+                self._con.executemany("UPDATE base SET sev = ? WHERE h = ?", [(v, h) for h, v in changed.items()])
+        return out
+
+    def unseen(self, rows: Iterable[Mapping[str, str]]) -> Iterator[Mapping[str, str]]:
+        """Second passage sur la référence : constats absents du scan courant (chaque clé une seule fois)."""
+        batch: List[Mapping[str, str]] = []
+
+        def check(items: List[Mapping[str, str]]) -> Iterator[Mapping[str, str]]:
+            hashes = [finding_hash(r) for r in items]
+            gone = {h for (h,) in self._lookup(hashes, "SELECT h FROM base WHERE seen = 0 AND h IN ({})")}
+            for h, r in zip(hashes, items):
+                if h in gone:
+                    gone.discard(h)
+                    yield r
+            with self._con:
+                self._mark_seen(hashes)
+
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= BASELINE_BATCH:
+                yield from check(batch)
+                batch = []
+        if batch:
+            yield from check(batch)
+
+    def close(self) -> None:
+        self._con.close()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Destination « différences »
+# ---------------------------------------------------------------------------
+
+class DiffSink(FindingSink):
+    """
+    Compare le scan à une référence et n'écrit dans `targets` que les différences : constats
+    nouveaux (Change=added), sévérités modifiées (Change=severity, PreviousSeverity) au fil du scan,
+    puis constats disparus (Change=removed) à la fermeture.
+    shown : les `retain` premières différences, pour l'affichage console (les compteurs restent exacts).
+    """
+
+    def __init__(self, targets: Sequence[FindingSink], baseline: str, scan: Optional[str] = None, *,
+                 log=None, retain: int = RETAIN_WITH_SINKS) -> None:
+        super().__init__(baseline)
+        self.targets = list(targets)
+        self.baseline = baseline
+        self.scan = scan
+        self.added = self.removed = self.changed = 0
+        self.retain = retain
+        self.shown: List[Dict[str, Any]] = []
+        self._pending: List[Mapping[str, str]] = []
+        self._set = BaselineSet()
+        try:
+            n = self._set.load(iter_baseline_rows(baseline, scan))
+        except (OSError, ValueError, sqlite3.Error, csv.Error) as e:
+            self._set.close()
+            raise OSError(f"référence {baseline}: {e}") from e
+        if log:
+            log(f"[i] Référence : {baseline} — {n} constat(s) distinct(s)")
+
+    def write(self, row: Mapping[str, str]) -> None:
+        self._pending.append(row)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        try:
+            verdicts = self._set.match(rows)
+        except sqlite3.Error as e:
+            raise OSError(f"comparaison à la référence: {e}") from e
+        for row, (change, previous) in zip(rows, verdicts):
+            if change == "same":
+                continue
+            rec = _as_record(row)
+            rec["Change"] = change
+            if change == "severity":
+                rec["PreviousSeverity"] = previous or ""
+                self.changed += 1
+            else:
+                self.added += 1
+            self._emit(rec)
+        for target in self.targets:
+            target.flush()
+
+    def _emit(self, rec: Dict[str, Any]) -> None:
+        if len(self.shown) < self.retain:
+            self.shown.append(rec)
+        for target in self.targets:
+            target.write(rec)
+
+    def close(self) -> None:
+        try:
+            self.flush()
+            for row in self._set.unseen(iter_baseline_rows(self.baseline, self.scan)):
+                rec = _as_record(row)
+                rec["Change"] = "removed"
+                self.removed += 1
+                self._emit(rec)
+        except (ValueError, sqlite3.Error, csv.Error) as e:
+            raise OSError(f"référence {self.baseline}: {e}") from e
+        finally:
+            self._set.close()
+            for target in self.targets:
+                target.close()
+            self.targets = []
+
+
+def _as_record(row: Mapping[str, Any]) -> Dict[str, Any]:
+    as_dict = getattr(row, "as_dict", None)
+    rec = as_dict() if as_dict is not None else {k: row.get(k) for k in
+                                                   ("Category", "Project", "Item", "Detail", "Severity")}
+    if not rec.get("DescriptorPath") and row.get("DescriptorPath"):
+        rec["DescriptorPath"] = row.get("DescriptorPath")
+    return rec
+
+
+__all__ = ["BaselineSet", "DiffSink", "finding_hash", "iter_baseline_rows", "normalize_key"]
@@ -0,0 +1,364 @@
+# scanner/core/checkpoint.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import hashlib, json, os, threading, time
+
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+from scanner.utils import CACHE_DIR
+from scanner.core.common import Finding, _should_stop
+
+CHECKPOINT_DIR = CACHE_DIR / "checkpoints"
+CHECKPOINT_FORMAT = 1
+CHECKPOINT_INTERVAL_S = 5.0   # période des instantanés de parcours
+CHECKPOINT_KEEP_DAYS = 7      # points de reprise abandonnés supprimés au-delà
+
+JOURNAL_BUFFER_ROWS = 4096     # constats encodés gardés avant écriture dans le journal
+
+# Options propres à une exécution : jamais enregistrées ni restaurées
+_RUNTIME_OPTIONS = ("resume", "checkpoint")
+
+# Journal : une ligne JSON [Category, Project, Item, Detail, Severity, DescriptorPath|null] par constat
+_encode = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(",", ":")).encode
+
+
+class CheckpointError(ValueError):
+    """Point de reprise introuvable, illisible ou inutilisable (signatures modifiées depuis)."""
+
+
+class StageMark(NamedTuple):
+    """Repère transmis avec les constats d'une étape : frontière du parcours, ou None quand l'étape est terminée."""
+    stage: str
+    frontier: Optional[Dict[str, Any]] = None
+
+
+def signature_version() -> str:
+    """Empreinte des signatures chargées (paquets, mineurs, contenu) : une reprise exige les mêmes."""
+    from scanner.refs.content import CONTENT_PATTERNS
+    from scanner.refs.miners import (
+        BAD_EXE_HASHES, MINER_FILE_HINTS, MINER_PROC_HINTS, SUSPICIOUS_CLI_REGEX, SUSPICIOUS_SCRIPT_PATTERNS,
+    )
+    from scanner.refs.packages import BAD_PACKAGES, SYSUPDATER_NAMES, TARGETS
+    data = [BAD_PACKAGES, TARGETS, SYSUPDATER_NAMES, BAD_EXE_HASHES, MINER_FILE_HINTS, MINER_PROC_HINTS,
+            SUSPICIOUS_CLI_REGEX.pattern, SUSPICIOUS_SCRIPT_PATTERNS, CONTENT_PATTERNS]
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=sorted)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+
+class WalkProgress:
+    """
+    Frontière d'un parcours en profondeur préfixe (os.walk topdown, iter_tree_entries) : sous-arbres
+    terminés, regroupés par dossier parent encore ouvert, et dossiers ouverts dont les fichiers sont
+    déjà traités. Après une reprise, skip()/prune() écartent les sous-arbres terminés et enter()
+    signale les dossiers dont les fichiers ne sont pas à refaire.
+    Un instantané est pris toutes les `interval` secondes à l'entrée d'un dossier. Consommateur
+    décalé (fenêtre npm, pool de contenu) : submitted()/completed() comptent les éléments remis et
+    traités, l'instantané n'est émis qu'une fois traités ceux remis avant lui. Plus rien n'est émis
+    après un arrêt (les éléments abandonnés ne doivent pas passer pour faits).
+    """
+
+    def __init__(self, emit: Callable[[Dict[str, Any]], None], frontier: Optional[Mapping[str, Any]] = None, *,
+                 cancel: Optional[threading.Event] = None, interval: float = CHECKPOINT_INTERVAL_S) -> None:
+        frontier = frontier or {}
+        self._done: Dict[str, Set[str]] = {k: set(v) for k, v in (frontier.get("done") or {}).items()}
+        self._reopen: Set[str] = set(frontier.get("open") or ())
+        self._stack: List[str] = []
+        self._emit = emit
+        self._cancel = cancel
+        self._interval = interval
+        self._next = time.monotonic() + interval
+        self._pending: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self._submitted = 0
+        self._completed = 0
+
+    def skip(self, path: str) -> bool:
+        """Sous-arbre déjà parcouru avant la reprise."""
+        parent, name = os.path.split(path)
+        done = self._done.get(parent)
+        return bool(done) and name in done
+
+    def prune(self, dirpath: str, dirnames: List[str]) -> None:
+        """os.walk : retire de dirnames les sous-dossiers déjà parcourus."""
+        done = self._done.get(dirpath)
+        if done:
+            dirnames[:] = [d for d in dirnames if d not in done]
+
+    def enter(self, dirpath: str) -> bool:
+        """Entrée dans 'dirpath' ; True si ses fichiers ont déjà été traités avant la reprise."""
+        parent = os.path.dirname(dirpath)
+        while self._stack and self._stack[-1] != parent:
+            self._finish(self._stack.pop())
+        self._stack.append(dirpath)
+        reopened = dirpath in self._reopen
+        if reopened:
+            self._reopen.discard(dirpath)
+        now = time.monotonic()
+        if now >= self._next:
+            self._next = now + self._interval
+            opened = self._stack if reopened else self._stack[:-1]
+            self._pending.append((self._submitted, {
+                "done": {k: sorted(v) for k, v in self._done.items() if v},
+                "open": list(opened),
+            }))
+            self._flush()
+        return reopened
+
+    def submitted(self) -> None:
+        self._submitted += 1
+
+    def completed(self) -> None:
+        self._completed += 1
+        if self._pending:
+            self._flush()
+
+    def _finish(self, path: str) -> None:
+        self._done.pop(path, None)
+        parent, name = os.path.split(path)
+        self._done.setdefault(parent, set()).add(name)
+
+    def _flush(self) -> None:
+        while self._pending and self._pending[0][0] <= self._completed:
+            frontier = self._pending.popleft()[1]
+            if _should_stop(self._cancel):
+                self._pending.clear()
+                return
+            self._emit(frontier)
+
+
+def new_scan_id() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S-") + os.urandom(2).hex()
+
+
+def prune_checkpoints(directory: Path = CHECKPOINT_DIR, keep_days: int = CHECKPOINT_KEEP_DAYS) -> None:
+    limit = time.time() - keep_days * 86400
+    try:
+        entries = list(os.scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.name.endswith((".json", ".jsonl")) and entry.stat().st_mtime < limit:
+                os.unlink(entry.path)
+        except OSError:
+            continue
+
+
+class Checkpoint:
+    """
+    Point de reprise d'un scan : <id>.jsonl (journal des constats émis) et <id>.json (étapes
+    terminées, frontière du parcours en cours, position dans le journal, version des signatures).
+    L'état est enregistré au passage d'un repère (StageMark) dans le flux des constats, par le
+    thread écrivain : le journal contient alors exactement les constats antérieurs au repère.
+    Une erreur d'E/S désactive les points de reprise sans interrompre le scan.
+    """
+
+    def __init__(self, scan_id: str, state: Dict[str, Any], *, directory: Path = CHECKPOINT_DIR, log=None) -> None:
+        self.scan_id = scan_id
+        self.state = state
+        self.path = directory / f"{scan_id}.json"
+        self.journal_path = directory / f"{scan_id}.jsonl"
+        self.error: Optional[OSError] = None
+        self._log = log
+        self._fh = None
+        self._buf: List[str] = []
+        self._rows = int(state.get("rows", 0))   # constats au journal
+        self._replayed = 0                        # constats rejoués à ne pas réécrire
+
+    # -- création / chargement ------------------------------------------------
+    @classmethod
+    def create(cls, root: Path, exclude_names: Iterable[str], options: SimpleNamespace, *,
+               directory: Path = CHECKPOINT_DIR, log=None) -> "Checkpoint":
+        """Nouveau point de reprise (journal vide). OSError si CACHE_DIR n'est pas inscriptible."""
+        directory.mkdir(parents=True, exist_ok=True)
+        prune_checkpoints(directory)
+        scan_id = new_scan_id()
+        state = {
+            "format": CHECKPOINT_FORMAT, "scan_id": scan_id, "status": "running",
+            "created_at": datetime.now().isoformat(timespec="seconds"), "signatures": signature_version(),
+            "root": str(root), "exclude": list(exclude_names),
+            "options": {k: v for k, v in vars(options).items() if k not in _RUNTIME_OPTIONS},
+            "stages_done": [], "frontier": {}, "offset": 0, "rows": 0,
+        }
+        checkpoint = cls(scan_id, state, directory=directory, log=log)
+        checkpoint._fh = checkpoint.journal_path.open("wb")
+        checkpoint._save_state()
+        return checkpoint
+
+    @classmethod
+    def load(cls, scan_id: str, *, directory: Path = CHECKPOINT_DIR, log=None) -> "Checkpoint":
+        """Point de reprise existant ; CheckpointError s'il est absent, illisible ou d'autres signatures."""
+        path = directory / f"{scan_id}.json"
+        try:
+            state = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise CheckpointError(f"point de reprise introuvable : {scan_id}") from None
+        except (OSError, ValueError) as e:
+            raise CheckpointError(f"point de reprise illisible ({path}) : {e}") from e
+        if not isinstance(state, dict) or state.get("format") != CHECKPOINT_FORMAT:
+            raise CheckpointError(f"format de point de reprise non pris en charge : {path}")
+        if state.get("status") == "complete":
+            raise CheckpointError(f"scan {scan_id} déjà terminé")
+        if state.get("signatures") != signature_version():
+            raise CheckpointError(f"signatures modifiées depuis le scan {scan_id} : relancer un scan complet")
+        try:
+            size = (directory / f"{scan_id}.jsonl").stat().st_size
+        except OSError as e:
+            raise CheckpointError(f"journal du scan {scan_id} illisible : {e}") from e
+        if size < int(state.get("offset", 0)):
+            raise CheckpointError(f"journal du scan {scan_id} tronqué")
+        return cls(scan_id, state, directory=directory, log=log)
+
+    # -- accès ----------------------------------------------------------------
+    @property
+    def root(self) -> Path:
+        return Path(self.state["root"])
+
+    @property
+    def exclude_names(self) -> List[str]:
+        return list(self.state.get("exclude") or [])
+
+    def options(self) -> SimpleNamespace:
+        """Options du scan d'origine (sorties comprises), avec resume = cet identifiant."""
+        ns = SimpleNamespace(**self.state.get("options", {}))
+        ns.resume = self.scan_id
+        return ns
+
+    def stage_done(self, name: str) -> bool:
+        return name in self.state["stages_done"]
+
+    def walk_progress(self, stage: str, emit: Callable[[StageMark], None],
+                      cancel: Optional[threading.Event] = None) -> WalkProgress:
+        """Frontière de parcours de l'étape, reprise du dernier état enregistré ; repères émis via emit()."""
+        return WalkProgress(lambda frontier: emit(StageMark(stage, frontier)),
+                            self.state["frontier"].get(stage), cancel=cancel)
+
+    # -- reprise --------------------------------------------------------------
+    def replay(self) -> Iterator[Finding]:
+        """
+        Constats du journal jusqu'au dernier repère enregistré (la suite, émise après, est abandonnée).
+        Le journal est rouvert en ajout à cette position avant le premier constat rejoué : l'écrivain
+        les reçoit pendant que le rejeu se poursuit et ne doit pas les réécrire.
+        """
+        offset = int(self.state.get("offset", 0))
+        count = 0
+        with self.journal_path.open("rb") as fh:
+            remaining = offset
+            while remaining > 0:
+                chunk = fh.read(min(remaining, 1 << 20))
+                if not chunk:
+                    break
+                count += chunk.count(b"\n")
+                remaining -= len(chunk)
+        os.truncate(self.journal_path, offset)
+        self._rows = count
+        self._replayed = count
+        self._fh = self.journal_path.open("ab")
+        return self._replay_rows(offset)
+
+    def _replay_rows(self, offset: int) -> Iterator[Finding]:
+        with self.journal_path.open("rb") as fh:
+            while fh.tell() < offset:
+                line = fh.readline()
+                if not line:
+                    break
+                category, project, item, detail, severity, descriptor = json.loads(line)
+                row = Finding(category, project, item, detail, severity)
+                if descriptor is not None:
+                    row["DescriptorPath"] = descriptor
+                yield row
+
+    # -- thread écrivain (FindingStream) --------------------------------------
+    def write(self, row: Mapping[str, str]) -> None:
+        if self._fh is None:
+            return
+        if self._replayed:
+            self._replayed -= 1   # déjà au journal
+            return
+        if type(row) is Finding:
+            rec = (row.category, row.project, row.item, row.detail, row.severity, row.descriptor_path)
+        else:
+            rec = (row["Category"], row["Project"], row["Item"], row["Detail"], row["Severity"],
+                   row.get("DescriptorPath"))
+        self._buf.append(_encode(rec))
+        self._rows += 1
+        if len(self._buf) >= JOURNAL_BUFFER_ROWS:
+            self._write_buffer()
+
+    def _write_buffer(self) -> None:
+        lines, self._buf = self._buf, []
+        try:
+            self._fh.write(("\n".join(lines) + "\n").encode("utf-8"))
+        except (OSError, ValueError) as e:
+            self._fail(e)
+
+    def reached(self, mark: StageMark) -> None:
+        if self._fh is None:
+            return
+        if mark.frontier is None:
+            self.state["stages_done"].append(mark.stage)
+            self.state["frontier"].pop(mark.stage, None)
+        else:
+            self.state["frontier"][mark.stage] = mark.frontier
+        if self._buf:
+            self._write_buffer()
+            if self._fh is None:
+                return
+        try:
+            self._fh.flush()
+            os.fsync(self._fh.fileno())
+            self.state["offset"] = self._fh.tell()
+            self.state["rows"] = self._rows
+            self._save_state()
+        except (OSError, ValueError) as e:
+            self._fail(e)
+
+    def _save_state(self) -> None:
+        self.state["updated_at"] = datetime.now().isoformat(timespec="seconds")
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.state, ensure_ascii=False, default=str), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def _fail(self, e: BaseException) -> None:
+        self.error = e if isinstance(e, OSError) else OSError(str(e))
+        if self._log:
+            self._log(f"[!] Points de reprise désactivés ({self.journal_path}) : {e}")
+        self._close()
+
+    def _close(self) -> None:
+        self._buf = []   # constats postérieurs au dernier repère : de toute façon écartés à la reprise
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except OSError:
+                pass
+            self._fh = None
+
+    def finish(self, status: str) -> bool:
+        """
+        Fin de scan (flux des constats fermé) : scan complet → point de reprise supprimé ; sinon
+        conservé tel qu'au dernier repère. True si une reprise reste possible.
+        """
+        self._close()
+        if status == "complete":
+            for path in (self.path, self.journal_path):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            return False
+        self.state["status"] = status
+        try:
+            self._save_state()
+        except OSError:
+            return False
+        return True
+
+__all__ = [
+    "CHECKPOINT_DIR", "CHECKPOINT_INTERVAL_S", "Checkpoint", "CheckpointError", "StageMark", "WalkProgress",
+    "signature_version",
+]
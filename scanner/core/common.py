@@ -2,58 +2,115 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import csv, json, os, platform, re, threading
+import csv, json, os, platform, re, sys, threading
 
+from collections import deque
+from collections.abc import MutableMapping
 from datetime import datetime
 from operator import itemgetter
 from pathlib import Path
 from types import SimpleNamespace
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
 
 # --- imports: absolus d'abord, puis repli relatif ---
 try:
     # préférés (fonctionnent si le paquet 'scanner' est visible sur sys.path)
     from scanner.utils import (
         IS_WIN, IS_MAC, IS_LIN, EXEC_TIMEOUT,
-        run_capture_ext, which, read_json, sha256_of,
-        looks_user_or_temp, list_processes,
-        write_csv, write_json,
+        iter_command_lines, run_capture_ext, which, read_json, sha256_of,
+        looks_user_or_temp, list_processes, HashCache,
     )
+    from scanner.procfs import iter_procs, list_listening_sockets, procfs_available
     from scanner.refs.packages import BAD_PACKAGES, TARGETS, SYSUPDATER_NAMES
     from scanner.refs.miners import (
-        MINER_FILE_HINTS, MINER_PROC_HINTS,
+        BAD_EXE_HASHES, MINER_FILE_HINTS, MINER_PROC_HINTS,
         SUSPICIOUS_CLI_REGEX, SUSPICIOUS_SCRIPT_PATTERNS,
     )
 except ImportError:  # fallback si importé comme sous-module relatif
     from scanner.utils import (
         IS_WIN, IS_MAC, IS_LIN, EXEC_TIMEOUT,
-        run_capture_ext, which, read_json, sha256_of,
-        looks_user_or_temp, list_processes,
-        write_csv, write_json,
+        iter_command_lines, run_capture_ext, which, read_json, sha256_of,
+        looks_user_or_temp, list_processes, HashCache,
     )
+    from scanner.procfs import iter_procs, list_listening_sockets, procfs_available
     from scanner.refs.packages import BAD_PACKAGES, TARGETS, SYSUPDATER_NAMES
     from scanner.refs.miners import (
-        MINER_FILE_HINTS, MINER_PROC_HINTS,
+        BAD_EXE_HASHES, MINER_FILE_HINTS, MINER_PROC_HINTS,
         SUSPICIOUS_CLI_REGEX, SUSPICIOUS_SCRIPT_PATTERNS,
     )
 
+class Finding(MutableMapping):
+    """
+    Constat compact (__slots__, Category/Severity internées) : un scan d'hôte sans --only-risk
+    produit des millions de lignes INFO. Se lit et s'écrit comme l'ancien dictionnaire
+    (row["Project"], itemgetter, dict(row), .get) ; DescriptorPath n'existe que s'il a été posé.
+    """
+    __slots__ = ("category", "project", "item", "detail", "severity", "descriptor_path")
+
+    _FIELDS = {"Category": "category", "Project": "project", "Item": "item", "Detail": "detail",
+               "Severity": "severity", "DescriptorPath": "descriptor_path"}
+    _KEYS = ("Category", "Project", "Item", "Detail", "Severity")
+
+    def __init__(self, category: str, project: str, item: str, detail: str, severity: str) -> None:
+        self.category = sys.intern(category)
+        self.project = project
+        self.item = item
+        self.detail = detail
+        self.severity = sys.intern(severity)
+        self.descriptor_path: Optional[str] = None
+
+    def __getitem__(self, key: str) -> str:
+        value = getattr(self, self._FIELDS[key])
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: str) -> None:
+        attr = self._FIELDS[key]
+        setattr(self, attr, sys.intern(value) if attr in ("category", "severity") else value)
+
+    def __delitem__(self, key: str) -> None:
+        if key != "DescriptorPath" or self.descriptor_path is None:
+            raise KeyError(key)
+        self.descriptor_path = None
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._KEYS
+        if self.descriptor_path is not None:
+            yield "DescriptorPath"
+
+    def __len__(self) -> int:
+        return 5 if self.descriptor_path is None else 6
+
+    def as_dict(self) -> Dict[str, str]:
+        """Copie en dict (écrivains) sans passer par le protocole Mapping générique."""
+        out = {"Category": self.category, "Project": self.project, "Item": self.item,
+               "Detail": self.detail, "Severity": self.severity}
+        if self.descriptor_path is not None:
+            out["DescriptorPath"] = self.descriptor_path
+        return out
+
+    def __repr__(self) -> str:
+        return f"Finding({self.as_dict()!r})"
+
+
 def add_row(rows: List[Dict[str, str]], category: str, project: str, item: str, detail: str, severity: str) -> None:
-    rows.append({
-        "Category": category,
-        "Project": project,
-        "Item": item,
-        "Detail": detail,
-        "Severity": severity,
-    })
+    rows.append(Finding(category, project, item, detail, severity))  # type: ignore[arg-type]
 
 def is_compromised(name: str, version: str) -> bool:
     return name in BAD_PACKAGES and version in BAD_PACKAGES[name]
 
+def command_is_suspicious(command: str) -> bool:
+    """Ligne de commande (cron, systemd, launchd…) : motif CLI de mineur ou motif de script suspect."""
+    return bool(SUSPICIOUS_CLI_REGEX.search(command)
+                or any(re.search(pat, command, flags=re.I) for pat in SUSPICIOUS_SCRIPT_PATTERNS))
+
 def walk_package_tree(
         node: Dict[str, Any], current_name: str, path_stack: List[str],
-        rows: List[Dict[str, str]], project: str, only_risk: bool,
+        rows: List[Dict[str, str]], project: str, only_risk: bool, *,
+        cancel: Optional[threading.Event] = None,
 ) -> None:
-    if not isinstance(node, dict):
+    if not isinstance(node, dict) or _should_stop(cancel):
         return
     version = node.get("version")
     if current_name and version and current_name in TARGETS:
@@ -66,7 +123,7 @@ def walk_package_tree(
 
     dependencies = node.get("dependencies") or {}
     for depname, depnode in dependencies.items():
-        walk_package_tree(depnode, depname, path_stack + [depname], rows, project, only_risk)
+        walk_package_tree(depnode, depname, path_stack + [depname], rows, project, only_risk, cancel=cancel)
 
 def _should_stop(cancel: Optional[threading.Event]) -> bool:
     return bool(cancel and cancel.is_set())
@@ -78,6 +135,54 @@ def _depth_of(dirpath: str, root: Path) -> int:
     except (OSError, ValueError, RuntimeError):
         return max(0, len(Path(dirpath).parts) - len(root.parts))
 
+def iter_tree_entries(
+        root: Path, exclude_names: Iterable[str] = (), *, max_depth: Optional[int] = None,
+        follow_links: bool = False, unbounded_dirs: Iterable[str] = (), same_device: bool = False,
+        cancel: Optional[threading.Event] = None, progress: Any = None,
+) -> Iterator[os.DirEntry]:
+    """
+    Parcours itératif partagé (os.scandir) : produit les DirEntry des fichiers sous 'root'.
+    - exclude_names : noms de dossiers ignorés (insensible à la casse)
+    - max_depth : profondeur max relative à 'root' (None = illimitée)
+    - unbounded_dirs : noms de dossiers sous lesquels max_depth ne s'applique plus (ex. node_modules)
+    - same_device : ne traverse pas les points de montage (équivalent de find -xdev)
+    - progress : frontière de reprise (WalkProgress) ; sous-arbres déjà parcourus ignorés
+    """
+    exclusions = {name.strip().lower() for name in exclude_names if name and name.strip()}
+    unbounded = {name.lower() for name in unbounded_dirs}
+    try:
+        root_dev = os.stat(root).st_dev if same_device else None
+    except OSError:
+        return
+    # pile (chemin, profondeur, profondeur illimitée ?)
+    stack: List[tuple[str, int, bool]] = [(str(root), 0, False)]
+    while stack:
+        if _should_stop(cancel):
+            return
+        current, depth, free = stack.pop()
+        reopened = progress.enter(current) if progress is not None else False
+        try:
+            with os.scandir(current) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=follow_links):
+                    name = entry.name.lower()
+                    if name in exclusions or (progress is not None and progress.skip(entry.path)):
+                        continue
+                    sub_free = free or name in unbounded
+                    if not sub_free and max_depth is not None and depth + 1 > max_depth:
+                        continue
+                    if root_dev is not None and entry.stat(follow_symlinks=follow_links).st_dev != root_dev:
+                        continue
+                    stack.append((entry.path, depth + 1, sub_free))
+                elif not reopened and entry.is_file(follow_symlinks=follow_links):
+                    yield entry
+            except OSError:
+                continue
+
 def scan_sysupdater_in_dir(base: Path, project_tag: str, rows: List[Dict[str, str]],
                            *, log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None) -> None:
     for dirpath, _, files in os.walk(base, topdown=True):
@@ -90,10 +195,66 @@ def scan_sysupdater_in_dir(base: Path, project_tag: str, rows: List[Dict[str, st
                 return
             if filename.lower() in SYSUPDATER_NAMES:
                 full = Path(dirpath) / filename
-                digest = sha256_of(full)
+                digest = sha256_of(full, cancel)
                 detail = f"{full} (SHA256={digest})" if digest else str(full)
                 add_row(rows, "IoC:sysupdater", project_tag, filename, detail, "HIGH")
 
+def check_lock_packages(data: Dict[str, Any], rows: List[Dict[str, str]], project: str, only_risk: bool, *,
+                        cancel: Optional[threading.Event] = None) -> None:
+    """package-lock.json (clé 'packages') : versions des paquets ciblés."""
+    pkgs = data.get("packages")
+    if not isinstance(pkgs, dict):
+        return
+    for pkgpath, meta in pkgs.items():
+        if _should_stop(cancel):
+            return
+        if not isinstance(meta, dict):
+            continue
+        name = meta.get("name")
+        version = meta.get("version")
+        if name and version and name in TARGETS:
+            compromised = is_compromised(name, version)
+            if (not only_risk) or compromised:
+                status = "À RISQUE" if compromised else "OK"
+                sev = "HIGH" if compromised else "INFO"
+                add_row(
+                    rows, "npm:packages", project,
+                    f"{name}@{version} [{status}]", str(pkgpath), sev
+                )
+
+def check_lock_text(txt: str, source: str, rows: List[Dict[str, str]], project: str, only_risk: bool, *,
+                    cancel: Optional[threading.Event] = None) -> None:
+    """yarn.lock / pnpm-lock.yaml : occurrences 'nom@x.y.z' des paquets ciblés."""
+    for name in TARGETS:
+        if _should_stop(cancel):
+            return
+        for m in re.finditer(rf"\b{name}@(\d+\.\d+\.\d+)\b", txt):
+            ver = m.group(1)
+            compromised = is_compromised(name, ver)
+            if (not only_risk) or compromised:
+                status = "À RISQUE" if compromised else "OK"
+                sev = "HIGH" if compromised else "INFO"
+                add_row(rows, "npm:packages", project, f"{name}@{ver} [{status}]", source, sev)
+
+def check_package_scripts(descriptor: Any, rows: List[Dict[str, str]], project: str, descriptor_path: str, *,
+                          cancel: Optional[threading.Event] = None) -> None:
+    """Scripts npm d'installation (install/postinstall/prepare) ou contenant un motif suspect."""
+    if not (isinstance(descriptor, dict) and isinstance(descriptor.get("scripts"), dict)):  # ✅ durci
+        return
+    for script_name, script_cmd in descriptor["scripts"].items():
+        if _should_stop(cancel):
+            return
+        cmd = str(script_cmd) if script_cmd is not None else ""
+        is_install_phase = bool(re.search(r"(postinstall|prepare|install)", script_name, flags=re.I))
+        has_suspicious_pattern = any(re.search(pat, cmd, flags=re.I) for pat in SUSPICIOUS_SCRIPT_PATTERNS)
+        if is_install_phase or has_suspicious_pattern:
+            row = Finding("npm:scripts", project, str(script_name), cmd, "MEDIUM")
+            # Chemin du descriptor (package.json) posé avant l'ajout : la ligne peut partir aussitôt vers les sorties
+            row["DescriptorPath"] = descriptor_path
+            rows.append(row)  # type: ignore[arg-type]
+
+NPM_LS_CMD = ["npm", "ls", "--all", "--json"]
+
 def scan_npm_project(
         proj_dir: Path, rows: List[Dict[str, str]], only_risk: bool = False,
         check_sysupdater: bool = True, check_scripts: bool = True, *,
@@ -113,7 +274,7 @@ def scan_npm_project(
 
     # --- npm ls (arbre complet) ---
     if which("npm") and not _should_stop(cancel):
-        code, out, _ = run_capture_ext(["npm", "ls", "--all", "--json"], cwd=proj_dir)
+        code, out, _ = run_capture_ext(NPM_LS_CMD, cwd=proj_dir)
         if verbose and log_fn:
             log_fn(f"[v]      npm ls (code={code})")
         if out.strip() and code == 0:
@@ -121,7 +282,7 @@ def scan_npm_project(
                 data = json.loads(out)
                 if isinstance(data, dict):  # ✅ durci
                     root_name = data.get("name", "")
-                    walk_package_tree(data, root_name, ["root"], rows, project, only_risk)
+                    walk_package_tree(data, root_name, ["root"], rows, project, only_risk, cancel=cancel)
             except json.JSONDecodeError:
                 if log_fn:
                     log_fn("[v]      (parse npm ls JSON échoué)")
@@ -136,24 +297,7 @@ def scan_npm_project(
             log_fn(f"[v]      package-lock.json: {lock}")
         data = read_json(lock)
         if isinstance(data, dict):  # ✅ durci
-            pkgs = data.get("packages")
-            if isinstance(pkgs, dict):
-                for pkgpath, meta in pkgs.items():
-                    if _should_stop(cancel):
-                        return
-                    if not isinstance(meta, dict):
-                        continue
-                    name = meta.get("name")
-                    version = meta.get("version")
-                    if name and version and name in TARGETS:
-                        compromised = is_compromised(name, version)
-                        if (not only_risk) or compromised:
-                            status = "À RISQUE" if compromised else "OK"
-                            sev = "HIGH" if compromised else "INFO"
-                            add_row(
-                                rows, "npm:packages", project,
-                                f"{name}@{version} [{status}]", str(pkgpath), sev
-                            )
+            check_lock_packages(data, rows, project, only_risk, cancel=cancel)
         elif log_fn and verbose:
             log_fn("[v]      (package-lock.json ignoré: pas un objet JSON)")
 
@@ -165,14 +309,7 @@ def scan_npm_project(
     if yarn_lock.exists():
         try:
             txt = yarn_lock.read_text(encoding="utf-8", errors="ignore")
-            for name in TARGETS:
-                for m in re.finditer(rf"\b{name}@(\d+\.\d+\.\d+)\b", txt):
-                    ver = m.group(1)
-                    compromised = is_compromised(name, ver)
-                    if (not only_risk) or compromised:
-                        status = "À RISQUE" if compromised else "OK"
-                        sev = "HIGH" if compromised else "INFO"
-                        add_row(rows, "npm:packages", project, f"{name}@{ver} [{status}]", "yarn.lock", sev)
+            check_lock_text(txt, "yarn.lock", rows, project, only_risk, cancel=cancel)
         except (OSError, UnicodeError):
             if log_fn:
                 log_fn("[!] Lecture yarn.lock impossible")
@@ -182,14 +319,7 @@ def scan_npm_project(
     if pnpm_lock.exists():
         try:
             txt = pnpm_lock.read_text(encoding="utf-8", errors="ignore")
-            for name in TARGETS:
-                for m in re.finditer(rf"\b{name}@(\d+\.\d+\.\d+)\b", txt):
-                    ver = m.group(1)
-                    compromised = is_compromised(name, ver)
-                    if (not only_risk) or compromised:
-                        status = "À RISQUE" if compromised else "OK"
-                        sev = "HIGH" if compromised else "INFO"
-                        add_row(rows, "npm:packages", project, f"{name}@{ver} [{status}]", "pnpm-lock.yaml", sev)
+            check_lock_text(txt, "pnpm-lock.yaml", rows, project, only_risk, cancel=cancel)
         except (OSError, UnicodeError):
             if log_fn:
                 log_fn("[!] Lecture pnpm-lock.yaml impossible")
@@ -197,19 +327,11 @@ def scan_npm_project(
     # --- scripts npm (install/postinstall/etc.) ---
     if check_scripts and pkg.exists():
         descriptor = read_json(pkg)
-        if isinstance(descriptor, dict) and isinstance(descriptor.get("scripts"), dict):  # ✅ durci
-            for script_name, script_cmd in descriptor["scripts"].items():
-                if _should_stop(cancel):
-                    return
-                cmd = str(script_cmd) if script_cmd is not None else ""
-                is_install_phase = bool(re.search(r"(postinstall|prepare|install)", script_name, flags=re.I))
-                has_suspicious_pattern = any(re.search(pat, cmd, flags=re.I) for pat in SUSPICIOUS_SCRIPT_PATTERNS)
-                if is_install_phase or has_suspicious_pattern:
-                    add_row(rows, "npm:scripts", project, str(script_name), cmd, "MEDIUM")
-                    # Ajoute le chemin du descriptor (package.json) dans l'enregistrement courant
-                    rows[-1]["DescriptorPath"] = str(pkg)
-
-                    # .npmrc (local/profil)
+        check_package_scripts(descriptor, rows, project, str(pkg), cancel=cancel)
+        if _should_stop(cancel):
+            return
+
+        # .npmrc (local/profil)
         for _rc in [proj_dir / ".npmrc", Path.home() / ".npmrc"]:
             try:
                 if _rc.exists() and "ignore-scripts=true" in _rc.read_text(encoding="utf-8", errors="ignore"):
@@ -228,12 +350,28 @@ def scan_projects_under_root(
         root: Path, exclude_names: Iterable[str], rows: List[Dict[str, str]],
         only_risk: bool, check_sysupdater: bool, check_scripts: bool,
         max_depth: int = 6, follow_links: bool = False, *,
-        log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None,
+        log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None, progress: Any = None,
 ) -> None:
     exclusions = {name.strip().lower() for name in exclude_names if name and name.strip()}
+    # 'npm ls' des projets suivants lancés d'avance (en parallèle) : les projets sont traités
+    # dans l'ordre de découverte, avec une fenêtre de la taille de l'exécuteur
+    from scanner.runner import current_runner
+    runner = current_runner() if which("npm") else None
+    window: Deque[Path] = deque()
+
+    def process(proj_dir: Path) -> None:
+        scan_npm_project(
+            proj_dir, rows, only_risk=only_risk, check_sysupdater=check_sysupdater,
+            check_scripts=check_scripts, log_fn=log_fn, verbose=verbose, cancel=cancel,
+        )
+        if progress is not None:
+            progress.completed()
+
     for dirpath, dirnames, filenames in os.walk(root, topdown=True, followlinks=follow_links):
         if _should_stop(cancel):
             return
+        # reprise : fichiers de ce dossier déjà traités, seuls ses sous-dossiers restent à voir
+        reopened = progress.enter(dirpath) if progress is not None else False
         if max_depth is not None and _depth_of(dirpath, root) > max_depth:
             dirnames[:] = []
             continue
@@ -260,19 +398,51 @@ def scan_projects_under_root(
             pruned.append(d)
 
         dirnames[:] = pruned
+        if progress is not None:
+            progress.prune(dirpath, dirnames)
+        if reopened:
+            continue
 
         # détection de projet npm
         if "package.json" in (name.lower() for name in filenames):
             proj_dir = Path(dirpath)
             if log_fn:
                 log_fn(f"[v]   → Projet npm: {proj_dir}")
-            scan_npm_project(
-                proj_dir, rows, only_risk=only_risk, check_sysupdater=check_sysupdater,
-                check_scripts=check_scripts, log_fn=log_fn, verbose=verbose, cancel=cancel,
-            )
-
-def scan_hosts_file(rows: List[Dict[str, str]], *, log=None) -> None:
-    paths = [Path(r"C:\Windows\System32\drivers\etc\hosts")] if IS_WIN else [Path("/etc/hosts")]
+            if progress is not None:
+                progress.submitted()
+            if runner is None:
+                process(proj_dir)
+                continue
+            runner.submit(NPM_LS_CMD, cwd=proj_dir)
+            window.append(proj_dir)
+            if len(window) > runner.concurrency:
+                process(window.popleft())
+
+    while window and not _should_stop(cancel):
+        process(window.popleft())
+
+# Systèmes cibles reconnus (mode image montée : --target-os)
+TARGET_OSES = ("windows", "macos", "linux")
+
+def detect_target_os(base: Optional[Path] = None) -> str:
+    """OS du système vivant, ou OS deviné d'après l'arborescence d'une image montée."""
+    if base is None:
+        return "windows" if IS_WIN else "macos" if IS_MAC else "linux"
+    if any((base / w / s32).is_dir() for w in ("Windows", "WINDOWS", "windows") for s32 in ("System32", "system32")):
+        return "windows"
+    if (base / "System" / "Library" / "CoreServices").is_dir() or (base / "Library" / "LaunchDaemons").is_dir():
+        return "macos"
+    return "linux"
+
+def scan_hosts_file(rows: List[Dict[str, str]], *, log=None, base: Optional[Path] = None,
+                    target_os: Optional[str] = None) -> None:
+    target_os = target_os or detect_target_os(base)
+    if base is None:
+        paths = [Path(r"C:\Windows\System32\drivers\etc\hosts")] if IS_WIN else [Path("/etc/hosts")]
+    elif target_os == "windows":
+        paths = [base / "Windows" / "System32" / "drivers" / "etc" / "hosts"]
+    else:
+        paths = [base / "etc" / "hosts", base / "private" / "etc" / "hosts"]
     for p in paths:
         try:
             if p.exists():
@@ -358,7 +528,18 @@ def scan_listening_ports(rows: List[Dict[str, str]]) -> None:
             add_row(rows, "net:listen", "", (f"port {port}" if port else "socket"), detail, sev)
         return
 
-    # --- Linux/macOS paths unchanged ---
+    # --- Linux : tables /proc/net + correspondance inode → PID (ni ss ni lsof) ---
+    if IS_LIN and procfs_available():
+        for sock in list_listening_sockets():
+            sev = "HIGH" if (sock.port in suspicious_ports) else "MEDIUM"
+            host = f"[{sock.addr}]" if ":" in sock.addr else sock.addr
+            detail = f"{sock.proto} {host}:{sock.port}"
+            if sock.pid is not None:
+                detail += f" | PID={sock.pid}" + (f" ({sock.exe})" if sock.exe else "")
+            add_row(rows, "net:listen", "", f"port {sock.port}", detail, sev)
+        return
+
+    # --- macOS (ou Linux sans /proc) ---
     code, out, _ = run_capture_ext(["ss", "-lntup"])
     if code == 0 and out:
         for raw in out.splitlines():
@@ -371,10 +552,7 @@ def scan_listening_ports(rows: List[Dict[str, str]]) -> None:
             add_row(rows, "net:listen", "", (f"port {port}" if port else "socket"), s, sev)
         return
 
-    code2, out2, _ = run_capture_ext(["lsof", "-i", "-P", "-n"])
-    if code2 != 0 or not out2:
-        return
-    for raw in out2.splitlines():
+    for raw in iter_command_lines(["lsof", "-i", "-P", "-n"]):
         s = raw.strip()
         if not s or "LISTEN" not in s.upper():
             continue
@@ -403,16 +581,21 @@ def scan_shell_profiles(rows: List[Dict[str, str]], *, log=None) -> None:
 
 def scan_sysupdater_global(
         root: Path, exclude_names: Iterable[str], rows: List[Dict[str, str]], max_depth: int = 12, *,
-        log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None,
+        log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None, progress: Any = None,
 ) -> None:
     exclusions = {name.lower() for name in exclude_names}
     for dirpath, dirnames, files in os.walk(root, topdown=True):
         if _should_stop(cancel):
             return
+        reopened = progress.enter(dirpath) if progress is not None else False
         if max_depth is not None and _depth_of(dirpath, root) > max_depth:
             dirnames[:] = []
             continue
         dirnames[:] = [d for d in dirnames if d.lower() not in exclusions]
+        if progress is not None:
+            progress.prune(dirpath, dirnames)
+        if reopened:
+            continue
         if verbose and log_fn:
             log_fn(f"[v] IoC global: {dirpath}")
         for filename in files:
@@ -420,23 +603,28 @@ def scan_sysupdater_global(
                 return
             if filename.lower() in SYSUPDATER_NAMES:
                 full = Path(dirpath) / filename
-                digest = sha256_of(full)
+                digest = sha256_of(full, cancel)
                 detail = f"{full} (SHA256={digest})" if digest else str(full)
                 add_row(rows, "IoC:sysupdater", str(root), filename, detail, "HIGH")
 
 def scan_miner_files(
         root: Path, exclude_names: Iterable[str], rows: List[Dict[str, str]], max_depth: int = 8, *,
-        log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None,
+        log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None, progress: Any = None,
 ) -> None:
     exclusions = {name.lower() for name in exclude_names}
     compiled = [re.compile(rx, re.I) for rx in MINER_FILE_HINTS]
     for dirpath, dirnames, files in os.walk(root, topdown=True):
         if _should_stop(cancel):
             return
+        reopened = progress.enter(dirpath) if progress is not None else False
         if max_depth is not None and _depth_of(dirpath, root) > max_depth:
             dirnames[:] = []
             continue
         dirnames[:] = [d for d in dirnames if d.lower() not in exclusions]
+        if progress is not None:
+            progress.prune(dirpath, dirnames)
+        if reopened:
+            continue
         if verbose and log_fn:
             log_fn(f"[v] miners: {dirpath}")
         for filename in files:
@@ -444,12 +632,75 @@ def scan_miner_files(
                 return
             if any(rx.search(filename) for rx in compiled):
                 full = Path(dirpath) / filename
-                digest = sha256_of(full)
+                digest = sha256_of(full, cancel)
                 detail = f"{full} (SHA256={digest})" if digest else str(full)
                 add_row(rows, "miner:file", str(root), filename, detail, "HIGH")
 
-def scan_miner_processes(rows: List[Dict[str, str]], *, log=None, verbose: bool = False) -> None:
+def scan_process_executables(procs: Iterable[Any], rows: List[Dict[str, str]], *, cache: Optional[HashCache] = None,
+                             proc_root: str = "/proc", log=None, verbose: bool = False,
+                             cancel: Optional[threading.Event] = None) -> None:
+    """
+    Hash des exécutables des processus via /proc/<pid>/exe, dédupliqués par (dev, inode) :
+    les centaines de workers d'un même binaire ne coûtent qu'une lecture (et zéro si le cache
+    persistant connaît déjà ce binaire). Signale les binaires supprimés du disque et les hash connus.
+    """
+    cache = cache or HashCache()
+    groups: Dict[tuple, List[Any]] = {}
+    stats: Dict[tuple, os.stat_result] = {}
+    for info in procs:
+        link = os.path.join(proc_root, str(info.pid), "exe")
+        try:
+            st = os.stat(link)
+        except OSError:
+            continue
+        key = (st.st_dev, st.st_ino)
+        groups.setdefault(key, []).append(info)
+        stats.setdefault(key, st)
+
+    for key, members in groups.items():
+        if _should_stop(cancel):
+            break
+        first = members[0]
+        digest = cache.digest(Path(os.path.join(proc_root, str(first.pid), "exe")), stats[key], cancel)
+        known_bad = bool(digest and digest.lower() in BAD_EXE_HASHES)
+        deleted = any(m.exe_deleted for m in members)
+        if not (known_bad or deleted):
+            continue
+        reasons = (["hash connu"] if known_bad else []) + (["supprimé du disque"] if deleted else [])
+        pids = ",".join(str(m.pid) for m in members[:20]) + (",…" if len(members) > 20 else "")
+        detail = f"{first.exe or '?'} (SHA256={digest or '?'}; {' + '.join(reasons)}; PID={pids})"
+        if log and verbose:
+            log(f"[+] Exécutable suspect: {first.exe} ({', '.join(reasons)})")
+        add_row(rows, "proc:exe", "", os.path.basename(first.exe) or first.comm, detail,
+                "HIGH" if known_bad else "MEDIUM")
+    cache.save()
+
+def scan_miner_processes(rows: List[Dict[str, str]], *, log=None, verbose: bool = False,
+                         hash_exe: bool = False, cancel: Optional[threading.Event] = None) -> None:
     name_rx = [re.compile(pattern, re.I) for pattern in MINER_PROC_HINTS]
+    if IS_LIN and procfs_available():
+        # Linux : on confronte aussi le vrai binaire (/proc/<pid>/exe), pas seulement argv[0]
+        procs = list(iter_procs())
+        if hash_exe:
+            if log:
+                log("[i] Hash des exécutables des processus…")
+            scan_process_executables(procs, rows, log=log, verbose=verbose, cancel=cancel)
+        for info in procs:
+            cmd = info.args
+            names = {info.name.lower(), info.comm.lower(), os.path.basename(info.exe).lower()}
+            looks_like_miner = any(rx.search(n) for rx in name_rx for n in names if n)
+            suspicious_cmd = bool(cmd and SUSPICIOUS_CLI_REGEX.search(cmd))
+            if looks_like_miner or suspicious_cmd:
+                severity = "HIGH" if suspicious_cmd else "MEDIUM"
+                detail = f"PID={info.pid}; PPID={info.ppid}; Exe={info.exe or '?'}"
+                if info.exe_deleted:
+                    detail += " (deleted)"
+                detail += f"; Cmd={cmd[:500]}"
+                if log and verbose:
+                    log(f"[+] Processus suspect: {info.name} (PID {info.pid})")
+                add_row(rows, "miner:process", "", info.name, detail, severity)
+        return
+
     for name, pid, cmd, _ in list_processes():
         low = (name or "").lower()
         looks_like_miner = any(rx.search(low) for rx in name_rx)
@@ -465,141 +716,113 @@ def run_scan_core(
         root: Path, exclude_names: Iterable[str], options: SimpleNamespace, *,
         log_fn=None, cancel: Optional[threading.Event] = None,
 ):
+    # Mode image montée : les étapes "fichiers" lisent sous 'base', les étapes "outils vivants" sont ignorées
+    base: Optional[Path] = Path(options.system_root) if getattr(options, "system_root", None) else None
+    target_os = (getattr(options, "target_os", None) or "auto").lower()
+    if base is None or target_os not in TARGET_OSES:
+        target_os = detect_target_os(base)
+    live = base is None
+
+    from .sinks import RETAIN_WITH_SINKS, FindingStream, open_sinks
+    started_at = datetime.now().isoformat(timespec="seconds")
+    meta = {
+        "started_at": started_at, "host": platform.node(), "platform": platform.platform(),
+        "root": str(root), "system_root": str(base) if base else None, "target_os": target_os,
+        "options": {k: v for k, v in vars(options).items() if k not in ("csv", "json", "jsonl", "db", "summary")},
+    }
+    # Point de reprise (CACHE_DIR) : journal des constats + étapes terminées + frontière du parcours en cours
+    checkpoint = None
+    if getattr(options, "checkpoint", True):
+        from .checkpoint import Checkpoint
+        try:
+            if getattr(options, "resume", None):
+                checkpoint = Checkpoint.load(options.resume, log=log_fn)
+            else:
+                checkpoint = Checkpoint.create(root, exclude_names, options, log=log_fn)
+        except OSError as e:
+            if log_fn:
+                log_fn(f"[!] Points de reprise indisponibles : {e}")
+    rows = FindingStream(open_sinks(options, meta, log=log_fn), sort=bool(getattr(options, "sorted_output", False)),
+                         retain=RETAIN_WITH_SINKS, checkpoint=checkpoint)
+    status = "failed"  # exception imprévue : la base garde un scan « failed » avec ses constats partiels
+
     def log(message: str) -> None:
         if log_fn:
             log_fn(str(message))
 
-    rows: List[Dict[str, str]] = []
-    log(f"[i] Début du scan — {datetime.now().isoformat(timespec='seconds')}")
+    log(f"[i] Début du scan — {started_at}")
     log(f"[i] Racine : {root}")
     log(f"[i] Exclusions : {', '.join(exclude_names) if exclude_names else '(aucune)'}")
     log(f"[i] Profondeur max : {options.max_depth} | Follow links: {options.follow_links}")
     log(f"[i] OS : {platform.platform()} | Python {platform.python_version()}")
 
-    from . import win as _win
-    from . import mac as _mac
-    from . import linux as _lin
-
+    if not live:
+        log(f"[i] Image montée : {base} (OS cible : {target_os}) — étapes nécessitant le système vivant ignorées")
+
+    # Étapes indépendantes exécutées en parallèle (limites par ressource), constats fusionnés dans l'ordre du registre
+    from scanner.cancel import CancelToken
+    from scanner.runner import scan_runner
+    from .stages import STAGE_WORKERS, ScanContext, StageScheduler, select_stages
+    # Jeton d'arrêt : points de contrôle des étapes, hachage, commandes externes tuées aussitôt ; Ctrl+C le lève aussi
+    stop = CancelToken.follow(cancel)
+    ctx = ScanContext(root, list(exclude_names), options, base, target_os, stop, checkpoint)
+    scheduler = StageScheduler(ctx, workers=getattr(options, "stage_workers", None) or STAGE_WORKERS, log=log)
+    stages = select_stages(ctx)
+    if checkpoint is not None:
+        log(f"[i] Point de reprise : {checkpoint.scan_id} (--resume {checkpoint.scan_id} après une interruption)")
     try:
-        if not _should_stop(cancel):
-            if not options.no_npm:
-                log("[i] Étape: détection de projets npm…")
-                scan_projects_under_root(
-                    root, exclude_names, rows, options.only_risk, options.sysupdater_project,
-                    not options.no_scripts, max_depth=options.max_depth, follow_links=options.follow_links,
-                    log_fn=log, verbose=getattr(options, "verbose", False), cancel=cancel,
-                )
-            elif options.sysupdater_project:
-                log("[i] Étape: recherche .sysupdater dans projets…")
-                scan_projects_under_root(
-                    root, exclude_names, rows, False, True, False,
-                    max_depth=options.max_depth, follow_links=options.follow_links,
-                    log_fn=log, verbose=getattr(options, "verbose", False), cancel=cancel,
-                )
-
-        if not _should_stop(cancel) and options.sysupdater_global:
-            log("[i] Étape: recherche .sysupdater globale…")
-            scan_sysupdater_global(root, exclude_names, rows, max_depth=max(options.max_depth, 8),
-                                   log_fn=log, verbose=getattr(options, "verbose", False), cancel=cancel)
-
-        if not _should_stop(cancel) and options.miners:
-            log("[i] Étape: IoC mineurs (fichiers)…")
-            scan_miner_files(root, exclude_names, rows, max_depth=max(options.max_depth, 6),
-                             log_fn=log, verbose=getattr(options, "verbose", False), cancel=cancel)
-            if not _should_stop(cancel):
-                log("[i] Étape: IoC mineurs (process)…")
-                scan_miner_processes(rows, log=log, verbose=getattr(options, "verbose", False))
-
-        if not _should_stop(cancel) and options.persistence:
-            if IS_WIN:
-                log("[i] Étape: persistance OS (Windows)…")
-                _win.scan_persistence(rows, log=log, verbose=getattr(options, "verbose", False))
-            elif IS_MAC:
-                log("[i] Étape: persistance OS (macOS)…")
-                _mac.scan_persistence(rows, log=log, verbose=getattr(options, "verbose", False))
-            else:
-                log("[i] Étape: persistance OS (Linux)…")
-                _lin.scan_persistence(rows, log=log, verbose=getattr(options, "verbose", False))
-
-        if not _should_stop(cancel) and getattr(options, "hosts", False):
-            log("[i] Étape: fichier hosts…")
-            scan_hosts_file(rows, log=log)
-
-        if not _should_stop(cancel) and getattr(options, "net_listen", False):
-            log("[i] Étape: ports en écoute…")
-            scan_listening_ports(rows)
-
-        if not _should_stop(cancel) and getattr(options, "shell_profiles", False):
-            log("[i] Étape: profils shell…")
-            scan_shell_profiles(rows, log=log)
-
-        if IS_WIN and not _should_stop(cancel) and getattr(options, "startup", False):
-            log("[i] Étape: Startup folders (Windows)…")
-            _win.scan_windows_startup_folders(rows, log=log)
-
-        if IS_WIN and not _should_stop(cancel) and getattr(options, "services", False):
-            log("[i] Étape: Services (Auto)…")
-            _win.scan_windows_services(rows, log=log)
-
-        if IS_WIN and not _should_stop(cancel) and getattr(options, "defender_exclusions", False):
-            log("[i] Étape: Defender exclusions…")
-            _win.scan_windows_defender_exclusions(rows, log=log)
-
-        if IS_WIN and not _should_stop(cancel) and getattr(options, "proxy", False):
-            log("[i] Étape: Proxy système…")
-            _win.scan_windows_proxy(rows, log=log)
-
-        if IS_WIN and not _should_stop(cancel) and getattr(options, "wmi", False):
-            log("[i] Étape: WMI persistence…")
-            _win.scan_wmi_persistence(rows, log=log)
-
-        if IS_MAC and not _should_stop(cancel) and getattr(options, "launch_globals", False):
-            log("[i] Étape: LaunchDaemons/Agents (globaux)…")
-            _mac.scan_macos_launch_globals(rows, log=log)
-
-        if IS_MAC and not _should_stop(cancel) and getattr(options, "login_items", False):
-            log("[i] Étape: Login Items…")
-            _mac.scan_macos_login_items(rows, log=log)
-
-        if IS_MAC and not _should_stop(cancel) and getattr(options, "profiles", False):
-            log("[i] Étape: Profiles (macOS)…")
-            _mac.scan_macos_profiles(rows, log=log)
-
-        if IS_LIN and not _should_stop(cancel) and getattr(options, "cron_system", False):
-            log("[i] Étape: Cron système…")
-            _lin.scan_linux_cron_system(rows, log=log)
-
-        if IS_LIN and not _should_stop(cancel) and getattr(options, "systemd_system", False):
-            log("[i] Étape: systemd (système)…")
-            _lin.scan_systemd_system(rows, log=log)
-
-        if IS_LIN and not _should_stop(cancel) and getattr(options, "ld_preload", False):
-            log("[i] Étape: /etc/ld.so.preload…")
-            _lin.scan_ld_preload(rows, log=log)
-
-        if IS_LIN and not _should_stop(cancel) and getattr(options, "suid", False):
-            log("[i] Étape: SUID/SGID…")
-            _lin.scan_suid_sgid(rows, log=log)
-
-        if IS_LIN and not _should_stop(cancel) and getattr(options, "path_world_writable", False):
-            log("[i] Étape: PATH world-writable…")
-            _lin.scan_path_world_writable(rows, log=log)
-
+        if checkpoint is not None and getattr(options, "resume", None):
+            # constats déjà émis rejoués vers les sorties (recréées), étapes terminées ignorées
+            rows.extend(checkpoint.replay())
+            skipped = [s for s in stages if checkpoint.stage_done(s.name)]
+            stages = [s for s in stages if not checkpoint.stage_done(s.name)]
+            log(f"[i] Reprise : {rows.total} constat(s) repris, {len(skipped)} étape(s) déjà terminée(s)")
+        with scan_runner(stop):   # commandes externes : parallèles, mémorisées pour la durée du scan
+            scheduler.run(stages, rows)
+        status = "cancelled" if _should_stop(cancel) else "complete"
     except KeyboardInterrupt:
+        status = "interrupted"
         log("[!] Scan interrompu par l'utilisateur — résultats partiels conservés.")
+    finally:
+        if stop is not cancel:
+            stop.release()
+        rows.finish(status=status, stages=scheduler.timings)
+        # Sorties écrites au fil du scan : ici on vide, on ferme (et on fusionne le tri externe si demandé)
+        try:
+            rows.close()
+        finally:
+            if checkpoint is not None and checkpoint.finish(status):
+                log(f"[i] Scan incomplet : reprendre avec --resume {checkpoint.scan_id}")
 
+    # Avec des sorties, seules les RETAIN_WITH_SINKS premières lignes émises restent pour l'affichage :
+    # totaux exacts via rows.total/rows.high (stats), len(rows) peut être plus petit
     rows.sort(key=itemgetter("Category", "Project", "Item", "Detail"))
-    if getattr(options, "csv", None):
-        write_csv(rows, options.csv, delimiter=options.delimiter)
-        log(f"[✓] CSV écrit : {options.csv}")
-    if getattr(options, "json", None):
-        write_json(rows, options.json)
-        log(f"[✓] JSON écrit : {options.json}")
-
-    nb_risk = sum(1 for r in rows if r["Severity"] == "HIGH")
-    nb_total = len(rows)
+    for label, key in (("CSV", "csv"), ("JSON", "json"), ("JSONL", "jsonl"), ("Synthèse", "summary"),
+                       ("Base SQLite", "db")):
+        if getattr(options, key, None):
+            log(f"[✓] {label} écrit : {getattr(options, key)}")
+
+    nb_risk = rows.high
+    nb_total = rows.total
     if _should_stop(cancel):
         log(f"[i] Fin anticipée (arrêt demandé). Total lignes: {nb_total} | À risque (HIGH): {nb_risk}")
     else:
         log(f"[i] Fin du scan. Total lignes: {nb_total} | À risque (HIGH): {nb_risk}")
+
+    if getattr(options, "baseline", None):
+        from .baseline import DiffSink
+        diff = next(s for s in rows.sinks if isinstance(s, DiffSink))
+        log(f"[i] Différences avec {diff.baseline} : {diff.added} nouveau(x), {diff.removed} disparu(s), "
+            f"{diff.changed} sévérité(s) modifiée(s)")
+        # Mode comparaison : la console montre les différences, comme les fichiers de sortie
+        return diff.shown, {"total": nb_total, "high": nb_risk,
+                            "added": diff.added, "removed": diff.removed, "changed": diff.changed}
+    if getattr(options, "aggregate", False):
+        # Mode synthèse : une ligne par (catégorie, élément, sévérité) au lieu d'une par occurrence
+        from .aggregate import AggregateSink
+        agg = next(s for s in rows.sinks if isinstance(s, AggregateSink))
+        overflow = agg.aggregator.overflowed
+        log(f"[i] Synthèse : {len(agg.summary)} IoC distinct(s) pour {nb_total} constat(s)"
+            + (f" — {overflow} occurrence(s) regroupées sous « (autres) » (limite atteinte)" if overflow else ""))
+        return agg.summary, {"total": nb_total, "high": nb_risk}
     return rows, {"total": nb_total, "high": nb_risk}
@@ -0,0 +1,236 @@
+# scanner/core/containers.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os, re, stat, threading
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from scanner.procfs import PROC_ROOT, container_id_of, iter_pids, mnt_namespace, read_cgroup, read_root_mount
+from scanner.core.common import _should_stop
+
+# Racines de conteneurs analysées simultanément
+CONTAINER_WORKERS: int = max(1, min(4, (os.cpu_count() or 2)))
+
+# Whiteouts overlay : format noyau (périphérique caractère 0:0, xattr opaque) et format image OCI (.wh.*)
+WHITEOUT_PREFIX = ".wh."
+OPAQUE_MARKER = ".wh..wh..opq"
+OPAQUE_XATTRS = ("trusted.overlay.opaque", "user.overlay.opaque")
+
+
+class Whiteouts(NamedTuple):
+    """Chemins (relatifs à la racine) qu'une couche masque dans les couches situées sous elle."""
+    removed: FrozenSet[str]   # fichier ou dossier supprimé (et tout son contenu)
+    opaque: FrozenSet[str]    # dossier opaque : le contenu des couches inférieures est masqué
+
+    def hides(self, rel: str) -> bool:
+        if not (self.removed or self.opaque):
+            return False
+        if rel in self.removed:
+            return True
+        parent = rel
+        while "/" in parent:
+            parent = parent.rsplit("/", 1)[0]
+            if parent in self.removed or parent in self.opaque:
+                return True
+        return "" in self.opaque
+
+
+class ContainerRoot(NamedTuple):
+    container_id: str
+    pid: int
+    mnt_ns: str
+    root: Path                # /proc/<pid>/root : vue fusionnée du conteneur
+    upperdir: Optional[Path]  # overlay : couche inscriptible propre au conteneur
+    lowerdirs: List[Path]     # overlay : couches en lecture seule (partagées entre conteneurs d'une même image)
+
+
+class ScanUnit(NamedTuple):
+    path: Path
+    tag: str                  # libellé préfixé au champ Project des constats
+    # couche inférieure partagée : masques vus par chaque conteneur qui l'utilise (couches au-dessus) ;
+    # un constat n'est gardé que si son chemin reste visible dans au moins un de ces conteneurs
+    hidden_by: Tuple[Tuple[Whiteouts, ...], ...] = ()
+
+
+def discover_containers(proc_root: str = PROC_ROOT) -> List[ContainerRoot]:
+    """
+    Conteneurs en cours d'exécution vus depuis l'hôte : un par espace de noms de montage distinct
+    (hors celui de l'hôte), identifié par son cgroup (docker, containerd, cri-o, podman, kubepods…).
+    """
+    host_ns = mnt_namespace(1, proc_root) or mnt_namespace(os.getpid(), proc_root)
+    seen: Dict[str, ContainerRoot] = {}
+    for pid in iter_pids(proc_root):
+        ns = mnt_namespace(pid, proc_root)
+        if not ns or ns == host_ns or ns in seen:
+            continue
+        cid = container_id_of(read_cgroup(pid, proc_root))
+        if not cid:
+            continue  # autre espace de noms sans conteneur (PrivateTmp systemd, snap…)
+        root = Path(proc_root, str(pid), "root")
+        mount = read_root_mount(pid, proc_root)
+        upper: Optional[Path] = None
+        lowers: List[Path] = []
+        if mount is not None and mount.fstype == "overlay":
+            up = mount.super_options.get("upperdir")
+            upper = Path(up) if up else None
+            lowers = [Path(p) for p in mount.lowerdirs]
+        seen[ns] = ContainerRoot(cid, pid, ns, root, upper, lowers)
+    return list(seen.values())
+
+
+def read_whiteouts(layer: Path) -> Whiteouts:
+    """Whiteouts et dossiers opaques d'une couche overlay (sans franchir de point de montage)."""
+    removed, opaque = set(), set()
+    try:
+        root_dev = os.lstat(layer).st_dev
+    except OSError:
+        return Whiteouts(frozenset(), frozenset())
+    for dirpath, dirnames, filenames in os.walk(layer):
+        rel_dir = os.path.relpath(dirpath, layer).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        for xattr in OPAQUE_XATTRS:
+            try:
+                if os.getxattr(dirpath, xattr, follow_symlinks=False) == b"y":
+                    opaque.add(rel_dir)
+                    break
+            except (OSError, AttributeError):
+                continue
+        for name in filenames:
+            if name == OPAQUE_MARKER:
+                opaque.add(rel_dir)
+            elif name.startswith(WHITEOUT_PREFIX):
+                removed.add(prefix + name[len(WHITEOUT_PREFIX):])
+            else:
+                try:
+                    st = os.lstat(os.path.join(dirpath, name))
+                except OSError:
+                    continue
+                if stat.S_ISCHR(st.st_mode) and st.st_rdev == 0:
+                    removed.add(prefix + name)
+        kept = []
+        for d in dirnames:
+            try:
+                if os.lstat(os.path.join(dirpath, d)).st_dev == root_dev:
+                    kept.append(d)
+            except OSError:
+                continue
+        dirnames[:] = kept
+    return Whiteouts(frozenset(removed), frozenset(opaque))
+
+
+def plan_scan_units(containers: Iterable[ContainerRoot]) -> List[ScanUnit]:
+    """
+    Unités d'analyse : pour un overlay lisible depuis l'hôte, la couche inscriptible du conteneur
+    puis chaque couche inférieure une seule fois (tag = conteneurs qui la partagent) ; sinon la
+    vue fusionnée /proc/<pid>/root. Une couche inférieure emporte les whiteouts des couches qui la
+    recouvrent dans chaque conteneur : ce qu'ils suppriment n'est plus signalé.
+    """
+    units: List[ScanUnit] = []
+    lower_users: Dict[str, List[str]] = {}
+    lower_hidden: Dict[str, List[Tuple[Whiteouts, ...]]] = {}
+    whiteouts: Dict[str, Whiteouts] = {}
+
+    def layer_whiteouts(layer: Path) -> Whiteouts:
+        key = str(layer)
+        if key not in whiteouts:
+            whiteouts[key] = read_whiteouts(layer)
+        return whiteouts[key]
+
+    for c in containers:
+        short = c.container_id[:12]
+        readable = c.upperdir is not None and c.upperdir.is_dir() and all(p.is_dir() for p in c.lowerdirs)
+        if not readable:
+            units.append(ScanUnit(c.root, f"ctr:{short}"))
+            continue
+        units.append(ScanUnit(c.upperdir, f"ctr:{short}"))  # type: ignore[arg-type]
+        above = [layer_whiteouts(c.upperdir)]  # type: ignore[arg-type]
+        for lower in c.lowerdirs:   # ordre overlay : de la plus haute à la plus basse
+            try:
+                key = os.path.realpath(lower)
+            except OSError:
+                key = str(lower)
+            lower_users.setdefault(key, []).append(short)
+            lower_hidden.setdefault(key, []).append(tuple(w for w in above if w.removed or w.opaque))
+            above.append(layer_whiteouts(lower))
+    for key, users in lower_users.items():
+        shown = ",".join(users[:3]) + (f",+{len(users) - 3}" if len(users) > 3 else "")
+        hidden = tuple(lower_hidden[key])
+        units.append(ScanUnit(Path(key), f"ctr:{shown} (couche partagée)" if len(users) > 1 else f"ctr:{shown}",
+                              hidden if all(hidden) else ()))
+    return units
+
+
+def _visible(row: Dict[str, str], path_rx: "re.Pattern[str]", hidden_by: Tuple[Tuple[Whiteouts, ...], ...]) -> bool:
+    """Faux si tous les conteneurs de la couche masquent un des chemins cités par le constat."""
+    for field in ("Project", "Item", "Detail"):
+        for m in path_rx.finditer(str(row.get(field, ""))):
+            rel = m.group(1).rstrip("/")
+            if all(any(w.hides(rel) for w in layers) for layers in hidden_by):
+                return False
+    return True
+
+
+def _scan_unit(unit: ScanUnit, exclude_names: List[str], options: SimpleNamespace, log_fn,
+               cancel: Optional[threading.Event]) -> List[Dict[str, str]]:
+    from scanner.core.common import run_scan_core
+    ns = SimpleNamespace(**vars(options))
+    ns.system_root, ns.target_os = str(unit.path), "linux"
+    ns.csv = ns.json = ns.jsonl = ns.db = ns.summary = None
+    ns.aggregate = False
+    ns.baseline = None
+    ns.checkpoint, ns.resume = False, None   # repris avec le scan hôte (étape rejouée en entier)
+    ns.containers = False
+    ns.archives = []
+
+    def log(message: str) -> None:
+        if log_fn and (getattr(options, "verbose", False) or message.startswith("[!]")):
+            log_fn(f"[{unit.tag}] {message}")
+
+    rows, _ = run_scan_core(unit.path, exclude_names, ns, log_fn=log, cancel=cancel)
+    if unit.hidden_by:
+        path_rx = re.compile(re.escape(str(unit.path).rstrip("/")) + r"/([^\s;|(),]+)")
+        kept = [row for row in rows if _visible(row, path_rx, unit.hidden_by)]
+        if len(kept) < len(rows):
+            log(f"[i] {len(rows) - len(kept)} constat(s) ignoré(s) : fichiers supprimés par une couche supérieure")
+        rows = kept
+    for row in rows:
+        row["Project"] = f"{unit.tag} {row['Project']}"
+    return rows
+
+
+def scan_containers(
+        rows: List[Dict[str, str]], exclude_names: Iterable[str], options: SimpleNamespace, *,
+        proc_root: str = PROC_ROOT, workers: int = CONTAINER_WORKERS, log_fn=None,
+        cancel: Optional[threading.Event] = None,
+) -> Tuple[int, int]:
+    """
+    Applique les étapes "fichiers" (npm, contenu, mineurs, cron, systemd, profils…) à la racine de chaque
+    conteneur en cours d'exécution, dans un pool borné. Retourne (conteneurs, unités analysées).
+    """
+    containers = discover_containers(proc_root)
+    units = plan_scan_units(containers)
+    if log_fn:
+        log_fn(f"[i] {len(containers)} conteneur(s) détecté(s), {len(units)} racine(s)/couche(s) à analyser")
+    excl = list(exclude_names)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(_scan_unit, u, excl, options, log_fn, cancel) for u in units]
+        for unit, fut in zip(units, futures):
+            if _should_stop(cancel):
+                break
+            try:
+                rows.extend(fut.result())
+            except Exception as e:  # une racine illisible ou un format inattendu n'arrête pas les autres conteneurs
+                if log_fn:
+                    log_fn(f"[!] Analyse de conteneur interrompue : {unit.tag} ({unit.path}) — {type(e).__name__}: {e}")
+    return len(containers), len(units)
+
+
+__all__ = [
+    "CONTAINER_WORKERS", "ContainerRoot", "ScanUnit", "Whiteouts", "discover_containers", "plan_scan_units",
+    "read_whiteouts", "scan_containers",
+]
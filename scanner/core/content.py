@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import mmap, os, re, threading
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scanner.core.common import add_row, iter_tree_entries, _should_stop
+from scanner.refs.content import CONTENT_PATTERNS, CONTENT_EXTENSIONS
+
+# Taille max analysée par fichier (au-delà : fichier ignoré, typiquement des bundles minifiés géants)
+CONTENT_MAX_BYTES: int = 4 * 1024 * 1024
+
+# Nombre de fichiers analysés en parallèle
+CONTENT_WORKERS: int = min(8, (os.cpu_count() or 2))
+
+# Jusqu'à ce nombre de signatures, un find() par signature (C, memchr) bat l'alternance 're'
+FIND_MAX_PATTERNS: int = 32
+
+
+class AhoCorasick:
+    """
+    Automate Aho-Corasick sur octets : toutes les signatures sont cherchées en une seule passe.
+    Les transitions sont complétées à la construction (pas de remontée des liens d'échec au scan) ;
+    un octet absent de toutes les signatures ramène directement à l'état initial.
+    Préfiltre : une alternance 're' des signatures (moteur C) localise les candidats ; l'automate
+    ne parcourt que des fenêtres de ±(longueur max - 1) octets autour d'eux. Pour un petit jeu de
+    signatures, un simple find() par signature donne directement la 1re occurrence.
+    """
+
+    def __init__(self, patterns: Sequence[Tuple[str, bytes]]) -> None:
+        goto: List[Dict[int, int]] = [{}]
+        out: List[List[Tuple[str, int]]] = [[]]
+        for pid, pat in patterns:
+            if not pat:
+                continue
+            state = 0
+            for byte in pat:
+                nxt = goto[state].get(byte)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][byte] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append((pid, len(pat)))
+
+        # BFS : liens d'échec + complétion des transitions sur l'alphabet utile
+        alphabet = {b for _, pat in patterns for b in pat}
+        fail = [0] * len(goto)
+        delta: List[Dict[int, int]] = [dict() for _ in goto]
+        queue: List[int] = []
+        for byte in alphabet:
+            nxt = goto[0].get(byte)
+            if nxt is not None:
+                delta[0][byte] = nxt
+                queue.append(nxt)
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            out[state] = out[state] + out[fail[state]] if fail[state] else out[state]
+            for byte in alphabet:
+                nxt = goto[state].get(byte)
+                if nxt is not None:
+                    fail[nxt] = delta[fail[state]].get(byte, 0)
+                    delta[state][byte] = nxt
+                    queue.append(nxt)
+                else:
+                    target = delta[fail[state]].get(byte, 0)
+                    if target:
+                        delta[state][byte] = target
+
+        self._delta = delta
+        self._out = out
+        self._patterns = [(pid, pat) for pid, pat in patterns if pat]
+        literals = sorted({pat for _, pat in self._patterns}, key=len, reverse=True)
+        self._prefilter = re.compile(b"|".join(re.escape(pat) for pat in literals)) if literals else None
+        self._maxlen = len(literals[0]) if literals else 0
+
+    def __bool__(self) -> bool:
+        return len(self._delta) > 1
+
+    def first_matches(self, data) -> Dict[str, int]:
+        """Retourne {id signature: offset de la 1re occurrence} pour un buffer (bytes/mmap)."""
+        found: Dict[str, int] = {}
+        if self._prefilter is None:
+            return found
+        if len(self._patterns) <= FIND_MAX_PATTERNS:
+            for pid, pat in self._patterns:
+                offset = data.find(pat)
+                if offset >= 0 and (pid not in found or offset < found[pid]):
+                    found[pid] = offset
+            return found
+        view = memoryview(data)
+        # Toute occurrence chevauche un résultat (non chevauchant) du préfiltre : elle tient donc
+        # entière dans la fenêtre [début - (max-1), fin + (max-1)) de ce résultat.
+        margin, size = self._maxlen - 1, len(view)
+        start = end = -1
+        for m in self._prefilter.finditer(view):
+            lo, hi = max(0, m.start() - margin), min(size, m.end() + margin)
+            if lo > end:
+                if end > start:
+                    self._scan_window(view, start, end, found)
+                start = lo
+            end = hi
+        if end > start:
+            self._scan_window(view, start, end, found)
+        return found
+
+    def _scan_window(self, view: memoryview, start: int, end: int, found: Dict[str, int]) -> None:
+        delta, out = self._delta, self._out
+        state = 0
+        for pos, byte in enumerate(view[start:end], start):
+            state = delta[state].get(byte, 0)
+            if state and out[state]:
+                for pid, length in out[state]:
+                    if pid not in found:
+                        found[pid] = pos - length + 1
+
+
+def build_content_automaton(patterns: Iterable[Dict[str, str]] = CONTENT_PATTERNS) -> Tuple[AhoCorasick, Dict[str, str]]:
+    """Construit l'automate à partir des signatures {id, pattern, severity} ; retourne (automate, id→sévérité)."""
+    entries = [p for p in patterns if p.get("id") and p.get("pattern")]
+    automaton = AhoCorasick([(p["id"], p["pattern"].encode("utf-8")) for p in entries])
+    return automaton, {p["id"]: p.get("severity", "HIGH") for p in entries}
+
+
+def scan_file_content(path: str, automaton: AhoCorasick, max_bytes: int = CONTENT_MAX_BYTES) -> Dict[str, int]:
+    """Analyse un fichier via mmap (lecture seule) ; {} si vide, trop gros ou illisible."""
+    try:
+        with open(path, "rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            if size == 0 or size > max_bytes:
+                return {}
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return automaton.first_matches(mm)
+    except (OSError, ValueError):
+        return {}
+
+
+def scan_content_signatures(
+        root: Path, exclude_names: Iterable[str], rows: List[Dict[str, str]], max_depth: int = 6,
+        follow_links: bool = False, *, max_bytes: int = CONTENT_MAX_BYTES, workers: int = CONTENT_WORKERS,
+        log_fn=None, verbose: bool = False, cancel: Optional[threading.Event] = None, progress: Any = None,
+) -> None:
+    """
+    Recherche les signatures de contenu (CONTENT_PATTERNS) dans les .js/.cjs/.mjs sous 'root',
+    node_modules compris (max_depth ne s'applique plus une fois dans un node_modules).
+    progress : frontière de reprise ; un fichier compte comme traité une fois ses constats ajoutés.
+    """
+    automaton, severities = build_content_automaton()
+    if not automaton:
+        return
+
+    files = (
+        entry.path for entry in iter_tree_entries(
+            root, exclude_names, max_depth=max_depth, follow_links=follow_links,
+            unbounded_dirs=("node_modules",), cancel=cancel, progress=progress,
+        )
+        if os.path.splitext(entry.name)[1].lower() in CONTENT_EXTENSIONS
+    )
+
+    def job(path: str) -> Tuple[str, Dict[str, int]]:
+        if _should_stop(cancel):
+            return path, {}
+        return path, scan_file_content(path, automaton, max_bytes)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # soumission par lots pour borner la mémoire (générateur de fichiers potentiellement énorme)
+        batch: List[str] = []
+        for path in files:
+            batch.append(path)
+            if progress is not None:
+                progress.submitted()
+            if len(batch) >= 256:
+                _collect(pool.map(job, batch), root, rows, severities, log_fn, verbose, progress)
+                batch = []
+            if _should_stop(cancel):
+                return
+        if batch:
+            _collect(pool.map(job, batch), root, rows, severities, log_fn, verbose, progress)
+
+
+def _collect(results, root: Path, rows: List[Dict[str, str]], severities: Dict[str, str], log_fn, verbose: bool,
+             progress: Any = None) -> None:
+    for path, found in results:
+        for pid, offset in sorted(found.items(), key=lambda kv: kv[1]):
+            if log_fn and verbose:
+                log_fn(f"[+] Signature {pid} dans {path} @ {offset}")
+            add_row(rows, "npm:content", str(root), pid, f"{path} (id={pid}; offset={offset})", severities.get(pid, "HIGH"))
+        if progress is not None:
+            progress.completed()
@@ -0,0 +1,85 @@
+# scanner/core/images.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os, re
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Nombre d'images analysées simultanément (un processus par image)
+IMAGE_WORKERS: int = max(1, min(4, (os.cpu_count() or 2)))
+
+
+def image_label(image: Path) -> str:
+    """Nom court et sûr pour un nom de fichier : /mnt/snap-42/ → 'snap-42'."""
+    name = image.resolve().name or image.resolve().anchor or "image"
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._") or "image"
+
+
+def image_output_path(path: Optional[str], label: str) -> Optional[str]:
+    """report.csv + 'snap-42' → report.snap-42.csv ; report.jsonl.gz → report.snap-42.jsonl.gz (une sortie par image)."""
+    if not path:
+        return None
+    p = Path(path)
+    gz = p.suffix.lower() == ".gz"
+    inner = Path(p.stem) if gz else p
+    return str(p.with_name(f"{inner.stem}.{label}{inner.suffix}{p.suffix if gz else ''}"))
+
+
+def image_labels(images: Iterable[Path]) -> List[str]:
+    """Libellés uniques (suffixe -2, -3… si deux images portent le même nom de dossier)."""
+    seen: Dict[str, int] = {}
+    out: List[str] = []
+    for img in images:
+        label = image_label(img)
+        seen[label] = seen.get(label, 0) + 1
+        out.append(label if seen[label] == 1 else f"{label}-{seen[label]}")
+    return out
+
+
+def _scan_image(image: str, label: str, exclude_names: List[str], options: SimpleNamespace) -> Tuple[str, Dict[str, int]]:
+    """Point d'entrée d'un processus worker : un run_scan_core complet sur une image, sorties dédiées."""
+    from scanner.core.common import run_scan_core
+
+    def log(message: str) -> None:
+        print(f"[{label}] {message}", flush=True)
+
+    _rows, stats = run_scan_core(Path(image), exclude_names, options, log_fn=log, cancel=None)
+    return label, stats
+
+
+def run_image_scans(images: List[Path], exclude_names: Iterable[str], options: SimpleNamespace, *,
+                    workers: int = IMAGE_WORKERS, log_fn=print) -> Dict[str, Dict[str, int]]:
+    """
+    Analyse plusieurs images montées en parallèle (ProcessPoolExecutor) ; chaque image écrit
+    ses propres CSV/JSON (suffixe = nom de l'image). Retourne {libellé: statistiques}.
+    """
+    labels = image_labels(images)
+    excl = list(exclude_names)
+    results: Dict[str, Dict[str, int]] = {}
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(images)))) as pool:
+        futures = {}
+        for image, label in zip(images, labels):
+            ns = SimpleNamespace(**vars(options))
+            ns.system_root = str(image)
+            ns.csv = image_output_path(getattr(options, "csv", None), label)
+            ns.json = image_output_path(getattr(options, "json", None), label)
+            ns.jsonl = image_output_path(getattr(options, "jsonl", None), label)
+            ns.summary = image_output_path(getattr(options, "summary", None), label)
+            futures[pool.submit(_scan_image, str(image), label, excl, ns)] = (label, image)
+        for fut in as_completed(futures):
+            label, image = futures[fut]
+            try:
+                _, stats = fut.result()
+            except Exception as e:  # image endommagée, BrokenProcessPool… : les autres images continuent
+                log_fn(f"[!] Image {label} ({image}) : échec du scan ({type(e).__name__}: {e})")
+                continue
+            results[label] = stats
+            log_fn(f"[✓] Image {label} — Total: {stats['total']} | À risque (HIGH): {stats['high']}")
+    return results
+
+
+__all__ = ["IMAGE_WORKERS", "image_label", "image_labels", "image_output_path", "run_image_scans"]
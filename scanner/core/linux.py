@@ -2,49 +2,292 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import os
+import json, os, re, stat, threading
+
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Optional, Set
 
-from scanner.utils import IS_LIN, run_capture_ext, which, path_is_world_writable
-from scanner.core.common import add_row
-from scanner.refs.miners import SUSPICIOUS_CLI_REGEX
+from scanner.utils import (
+    IS_LIN, CACHE_DIR, HashCache, run_capture_ext, read_json, sha256_of,
+    looks_user_or_temp, path_is_world_writable,
+)
+from scanner.core.common import add_row, command_is_suspicious, iter_tree_entries
+from scanner.procfs import iter_pids, procfs_available, read_environ, read_maps, user_of
+from scanner.refs.miners import BAD_EXE_HASHES, MINER_FILE_HINTS, MINER_PROC_HINTS
 
-def scan_linux_cron_system(rows: List[Dict[str, str]], *, log=None) -> None:
-    if not IS_LIN:
+# Répertoires d'unités (relatifs à la racine système), par ordre de priorité décroissante
+SYSTEMD_SYSTEM_DIRS = ["etc/systemd/system", "run/systemd/system", "usr/local/lib/systemd/system",
+                       "usr/lib/systemd/system", "lib/systemd/system"]
+SYSTEMD_USER_DIRS = ["etc/systemd/user", "run/systemd/user", "usr/lib/systemd/user"]
+SYSTEMD_EXEC_KEYS = ("ExecStart", "ExecStartPre", "ExecStartPost", "ExecReload", "ExecStop")
+
+def parse_unit_text(text: str) -> Dict[str, Dict[str, List[str]]]:
+    """Unit file systemd → {section: {clé: [valeurs…]}} (continuations '\\' et clés répétées gérées)."""
+    sections: Dict[str, Dict[str, List[str]]] = {}
+    current: Optional[Dict[str, List[str]]] = None
+    pending = ""
+    for raw in text.splitlines():
+        line = pending + raw.strip() if pending else raw.strip()
+        if line.endswith("\\"):
+            pending = line[:-1] + " "
+            continue
+        pending = ""
+        if not line or line.startswith(("#", ";")):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            current = sections.setdefault(line[1:-1].strip(), {})
+            continue
+        key, sep, value = line.partition("=")
+        if sep and current is not None:
+            key, value = key.strip(), value.strip()
+            if value == "" and key.startswith("Exec"):
+                current[key] = []  # affectation vide = réinitialisation (drop-ins)
+            else:
+                current.setdefault(key, []).append(value)
+    return sections
+
+def resolve_in_root(p: Path, base: Path, *, max_hops: int = 40) -> Path:
+    """
+    Suit les liens symboliques de p en restant dans la racine 'base' : une cible absolue
+    ('/usr/lib/…') est ré-enracinée sous base (image montée), une cible relative est résolue
+    depuis le répertoire du lien. Renvoie le chemin *logique* final (sous base).
+    """
+    for _ in range(max_hops):
+        try:
+            if not p.is_symlink():
+                return p
+            target = os.readlink(p)
+        except OSError:
+            return p
+        p = base / target.lstrip("/") if os.path.isabs(target) else p.parent / target
+    return p
+
+def _is_masked(p: Path, base: Path) -> bool:
+    """Unité masquée : lien (éventuellement en chaîne) vers /dev/null, vu depuis la racine base."""
+    return p.is_symlink() and os.path.normpath(resolve_in_root(p, base)) == os.path.normpath(base / "dev/null")
+
+def collect_unit_files(dirs: Iterable[Path], suffixes: tuple[str, ...] = (".service",),
+                       base: Path = Path("/")) -> Dict[str, List[Path]]:
+    """
+    {nom d'unité: [fichier principal, drop-ins…]} : la 1re occurrence d'une unité (répertoire le plus
+    prioritaire) l'emporte ; les drop-ins '<unité>.d/*.conf' de tous les répertoires s'appliquent.
+    Les unités masquées (lien vers /dev/null) sont ignorées ; les liens absolus sont résolus sous base
+    (les chemins renvoyés restent ceux des liens, parse_unit() les résout à la lecture).
+    """
+    units: Dict[str, List[Path]] = {}
+    dropins: Dict[str, List[Path]] = {}
+    for d in dirs:
+        try:
+            entries = sorted(d.iterdir()) if d.is_dir() else []
+        except OSError:
+            continue
+        for p in entries:
+            name = p.name
+            try:
+                if name.endswith(suffixes) and name not in units:
+                    if _is_masked(p, base):
+                        units[name] = []
+                    elif resolve_in_root(p, base).is_file():
+                        units[name] = [p]
+                elif name.endswith(tuple(f"{sfx}.d" for sfx in suffixes)) and p.is_dir():
+                    dropins.setdefault(name[:-2], []).extend(
+                        f for f in sorted(p.glob("*.conf")) if resolve_in_root(f, base).is_file())
+            except OSError:
+                continue
+    for name, extra in dropins.items():
+        if units.get(name):
+            units[name].extend(sorted(extra, key=lambda x: x.name))
+    return {name: files for name, files in units.items() if files}
+
+def parse_unit(files: List[Path], base: Path = Path("/")) -> Dict[str, Dict[str, List[str]]]:
+    """Fusionne le fichier principal et ses drop-ins (dans l'ordre) ; liens résolus sous base."""
+    merged: Dict[str, Dict[str, List[str]]] = {}
+    for f in files:
+        try:
+            parsed = parse_unit_text(resolve_in_root(f, base).read_text(encoding="utf-8", errors="ignore"))
+        except (OSError, UnicodeError):
+            continue
+        for section, keys in parsed.items():
+            dst = merged.setdefault(section, {})
+            for key, values in keys.items():
+                if key.startswith("Exec") and not values:
+                    dst[key] = []
+                else:
+                    dst.setdefault(key, []).extend(values)
+    return merged
+
+def exec_severity(command: str, base: Path = Path("/")) -> str:
+    """
+    HIGH : motif suspect ; MEDIUM : binaire dans un emplacement utilisateur/temporaire ou world-writable.
+    Le répertoire du binaire est examiné sous base (liens résolus dans l'image, jamais sur l'hôte d'analyse).
+    """
+    if command_is_suspicious(command):
+        return "HIGH"
+    exe = command.lstrip("-@:+!").split(None, 1)[0] if command.strip() else ""
+    if not exe:
+        return "INFO"
+    if looks_user_or_temp(exe):
+        return "MEDIUM"
+    if exe.startswith("/"):
+        target = resolve_in_root(base / exe.lstrip("/"), base)
+        if base == Path("/") or target.exists():
+            if path_is_world_writable(resolve_in_root(target.parent, base)):
+                return "MEDIUM"
+    return "INFO"
+
+def scan_systemd_units(dirs: Iterable[Path], rows: List[Dict[str, str]], category: str, project: str,
+                       *, log=None, workers: int = 8, base: Path = Path("/")) -> None:
+    """Parse en parallèle toutes les unités .service des répertoires donnés et inspecte leurs Exec*."""
+    units = collect_unit_files(dirs, base=base)
+    if not units:
         return
-    paths: Iterable[Path] = [Path("/etc/crontab"), *Path("/etc").glob("cron.*/*"), *Path("/etc/cron.d").glob("*")]
-    for p in paths:
+    names = sorted(units)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        parsed = list(pool.map(lambda n: parse_unit(units[n], base), names))
+    for name, unit in zip(names, parsed):
+        service = unit.get("Service", {})
+        execs = [(key, cmd) for key in SYSTEMD_EXEC_KEYS for cmd in service.get(key, [])]
+        if not execs:
+            add_row(rows, category, project, name, str(units[name][0]), "INFO")
+            continue
+        for key, cmd in execs:
+            sev = exec_severity(cmd, base)
+            if log and sev != "INFO":
+                log(f"[~] systemd {name}: {key}={cmd}")
+            add_row(rows, category, project, name, f"{key}={cmd} ({units[name][0]})", sev)
+
+def scan_systemd_system(rows: List[Dict[str, str]], *, log=None, base: Path = Path("/")) -> None:
+    if not IS_LIN and base == Path("/"):
+        return
+    if log:
+        log("[v] systemd (système) : lecture des unit files")
+    scan_systemd_units([base / d for d in SYSTEMD_SYSTEM_DIRS], rows, "linux:systemd", "system", log=log, base=base)
+
+# Emplacements cron (relatifs à la racine système)
+CRON_SPOOL_DIRS = ["var/spool/cron/crontabs", "var/spool/cron"]
+CRON_SCRIPT_DIRS = ["etc/cron.hourly", "etc/cron.daily", "etc/cron.weekly", "etc/cron.monthly"]
+_CRON_ENV_RX = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*\s*=")
+
+def parse_cron_line(line: str, with_user: bool) -> Optional[tuple[str, str, str]]:
+    """
+    Ligne de crontab → (planification, utilisateur, commande), None pour commentaires/variables.
+    with_user : format système (/etc/crontab, /etc/cron.d) avec champ utilisateur.
+    """
+    s = line.strip()
+    if not s or s.startswith("#") or _CRON_ENV_RX.match(s):
+        return None
+    if s.startswith("@"):
+        parts = s.split(None, 2 if with_user else 1)
+        schedule, rest = parts[0], parts[1:]
+    else:
+        parts = s.split(None, 6 if with_user else 5)
+        schedule, rest = " ".join(parts[:5]), parts[5:]
+    if with_user:
+        if len(rest) < 2:
+            return None
+        return schedule, rest[0], rest[1]
+    return (schedule, "", rest[0]) if rest else None
+
+def parse_anacron_line(line: str) -> Optional[tuple[str, str, str]]:
+    """Ligne d'anacrontab 'période délai job-id commande' → (planification, job-id, commande)."""
+    s = line.strip()
+    if not s or s.startswith("#") or _CRON_ENV_RX.match(s):
+        return None
+    parts = s.split(None, 3)
+    if len(parts) < 4:
+        return None
+    return f"{parts[0]} (délai {parts[1]})", parts[2], parts[3]
+
+def _read_texts(paths: List[Path], workers: int = 8) -> List[Optional[str]]:
+    """Lecture groupée (pool de threads) ; None pour un fichier illisible."""
+    def read(p: Path) -> Optional[str]:
         try:
-            if p.exists() and p.is_file():
-                if log:
-                    log(f"[v] Analyse cron système: {p}")
-                for i, line in enumerate(p.read_text(encoding="utf-8", errors="ignore").splitlines(), start=1):
-                    s = line.strip()
-                    if not s or s.startswith("#"):
-                        continue
-                    sev = "MEDIUM" if SUSPICIOUS_CLI_REGEX.search(s) else "INFO"
-                    add_row(rows, "linux:cron", str(p), f"ligne {i}", s, sev)
+            return p.read_text(encoding="utf-8", errors="ignore")
         except (OSError, UnicodeError):
-            if log:
+            return None
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(read, paths))
+
+def _list_files(d: Path) -> List[Path]:
+    try:
+        return sorted(p for p in d.iterdir() if p.is_file() and not p.name.startswith("."))
+    except OSError:
+        return []
+
+def scan_linux_cron_system(rows: List[Dict[str, str]], *, log=None, base: Path = Path("/")) -> None:
+    """
+    Inventaire cron complet en une passe : /etc/crontab, /etc/cron.d, scripts /etc/cron.*,
+    crontabs de tous les utilisateurs (spool), anacrontab et timers systemd.
+    Le motif suspect n'est appliqué qu'à la partie commande.
+    """
+    if not IS_LIN and base == Path("/"):
+        return
+
+    # (fichier, type) : "system" (champ user), "user:<nom>" (spool), "script", "anacron"
+    sources: List[tuple[Path, str]] = [(base / "etc/crontab", "system")]
+    sources += [(p, "system") for p in _list_files(base / "etc/cron.d")]
+    for d in CRON_SCRIPT_DIRS:
+        sources += [(p, "script") for p in _list_files(base / d)]
+    seen_spool = set()
+    for d in CRON_SPOOL_DIRS:
+        for p in _list_files(base / d):
+            if p.name not in seen_spool:
+                seen_spool.add(p.name)
+                sources.append((p, f"user:{p.name}"))
+    sources.append((base / "etc/anacrontab", "anacron"))
+
+    texts = _read_texts([p for p, _ in sources])
+    for (p, kind), text in zip(sources, texts):
+        if text is None:
+            if log and p.exists():
                 log(f"[!] Lecture impossible: {p}")
+            continue
+        if log:
+            log(f"[v] Analyse cron: {p}")
+        for i, line in enumerate(text.splitlines(), start=1):
+            if kind == "script":
+                s = line.strip()
+                if not s or s.startswith("#"):
+                    continue
+                parsed: Optional[tuple[str, str, str]] = (p.parent.name, "root", s)
+            elif kind == "anacron":
+                parsed = parse_anacron_line(line)
+            else:
+                parsed = parse_cron_line(line, with_user=(kind == "system"))
+                if parsed and kind.startswith("user:"):
+                    parsed = (parsed[0], kind[5:], parsed[2])
+            if not parsed:
+                continue
+            schedule, user, command = parsed
+            sev = "MEDIUM" if command_is_suspicious(command) else "INFO"
+            item = f"ligne {i}" + (f" ({user})" if user else "")
+            add_row(rows, "linux:cron", str(p), item, f"{schedule} | {command}", sev)
 
-def scan_systemd_system(rows: List[Dict[str, str]], *, log=None) -> None:
-    if not IS_LIN:
+    scan_systemd_timers([base / d for d in SYSTEMD_SYSTEM_DIRS], rows, "linux:timer", "system", log=log, base=base)
+
+def scan_systemd_timers(dirs: List[Path], rows: List[Dict[str, str]], category: str, project: str, *, log=None,
+                        base: Path = Path("/")) -> None:
+    """Timers systemd : planification (On*) + commande de l'unité déclenchée (Unit= ou même nom)."""
+    timers = collect_unit_files(dirs, (".timer",), base)
+    if not timers:
         return
-    code, out, _ = run_capture_ext(["systemctl", "list-unit-files", "--type=service"])
-    if code == 0 and out:
+    services = collect_unit_files(dirs, base=base)
+    for name in sorted(timers):
+        timer = parse_unit(timers[name], base).get("Timer", {})
+        schedule = "; ".join(f"{k}={v}" for k, vals in timer.items() if k.startswith("On") for v in vals) or "?"
+        target = (timer.get("Unit") or [name[: -len(".timer")] + ".service"])[-1]
+        commands = parse_unit(services[target], base).get("Service", {}).get("ExecStart", []) if target in services else []
         if log:
-            log("[v] systemd (système) listé")
-        for line in out.splitlines():
-            s = line.strip()
-            if ".service" in s:
-                add_row(rows, "linux:systemd", "system", "", s, "INFO")
+            log(f"[v] Timer systemd: {name} → {target}")
+        for command in commands or [""]:
+            sev = "MEDIUM" if command and command_is_suspicious(command) else "INFO"
+            add_row(rows, category, project, name, f"{schedule} | {target}: {command or '(introuvable)'}", sev)
 
-def scan_ld_preload(rows: List[Dict[str, str]], *, log=None) -> None:
-    if not IS_LIN:
+def scan_ld_preload(rows: List[Dict[str, str]], *, log=None, base: Path = Path("/")) -> None:
+    if not IS_LIN and base == Path("/"):
         return
-    p = Path("/etc/ld.so.preload")
+    p = base / "etc" / "ld.so.preload"
     try:
         if p.exists():
             if log:
@@ -57,18 +300,156 @@ def scan_ld_preload(rows: List[Dict[str, str]], *, log=None) -> None:
         if log:
             log(f"[!] Lecture impossible: {p}")
 
-def scan_suid_sgid(rows: List[Dict[str, str]], *, log=None) -> None:
-    if not IS_LIN or not which("find"):
+def scan_proc_injections(rows: List[Dict[str, str]], *, proc_root: str = "/proc", log=None) -> None:
+    """
+    Balayage de /proc/<pid>/environ (LD_PRELOAD) et /proc/<pid>/maps (bibliothèques exécutables
+    supprimées, memfd ou situées dans un emplacement utilisateur/temporaire).
+    Une lecture bornée par fichier ; bibliothèques dédupliquées par (chemin, inode).
+    memfd et emplacements utilisateur/temporaires : MEDIUM (JIT, navigateurs, outils de dev en
+    produisent), HIGH s'ils portent un nom de mineur, un hash connu, ou si le fichier a été supprimé.
+    """
+    if not IS_LIN or not procfs_available(proc_root):
         return
-    cmd = r'find / -xdev \( -perm -4000 -o -perm -2000 \) -type f 2>/dev/null | head -n 1000'
-    code, out, _ = run_capture_ext(cmd, shell=True)
-    if code == 0 and out:
+    hints = [re.compile(rx, re.I) for rx in (*MINER_FILE_HINTS, *MINER_PROC_HINTS)]
+    preloads: Dict[str, List[int]] = {}
+    mappings: Dict[tuple, List[int]] = {}
+    flags: Dict[tuple, List[str]] = {}
+    sources: Dict[tuple, str] = {}   # fichier lisible pour le hash (map_files si memfd/supprimé)
+    for pid in iter_pids(proc_root):
+        value = read_environ(pid, proc_root).get("LD_PRELOAD", "")
+        for lib in re.split(r"[:\s]+", value.strip()):
+            if lib:
+                preloads.setdefault(lib, []).append(pid)
+        for m in read_maps(pid, proc_root):
+            if "x" not in m.perms:
+                continue
+            key = (m.path, m.inode)
+            if key in mappings:
+                mappings[key].append(pid)
+                continue
+            reasons = []
+            if m.path.startswith("/memfd:"):
+                reasons.append("memfd")
+            elif looks_user_or_temp(m.path) or m.path.startswith("/dev/shm/"):
+                reasons.append("emplacement utilisateur/temporaire")
+            if m.deleted and not m.path.startswith("/memfd:"):
+                reasons.append("supprimé du disque")
+            if not reasons:
+                continue
+            flags[key] = reasons
+            mappings[key] = [pid]
+            if m.deleted or m.path.startswith("/memfd:"):
+                sources[key] = os.path.join(proc_root, str(pid), "map_files", m.span) if m.span else ""
+            else:
+                sources[key] = m.path
+
+    def pids_of(pids: List[int]) -> str:
+        return ",".join(map(str, pids[:20])) + (",…" if len(pids) > 20 else "")
+
+    for lib, pids in sorted(preloads.items()):
+        sev = "HIGH" if looks_user_or_temp(lib) or lib.startswith("/dev/shm/") else "MEDIUM"
         if log:
-            log("[v] Scan SUID/SGID")
-        for line in out.splitlines():
-            path = line.strip()
-            if path:
-                add_row(rows, "linux:suid_sgid", "", Path(path).name, path, "MEDIUM")
+            log(f"[~] LD_PRELOAD={lib} ({len(pids)} processus)")
+        add_row(rows, "linux:ld_preload", "", Path(lib).name, f"{lib} (PID={pids_of(pids)})", sev)
+    for (path, inode), pids in sorted(mappings.items()):
+        reasons = flags[(path, inode)]
+        name = Path(path).name
+        if any(rx.search(name) for rx in hints):
+            reasons.append("nom de mineur")
+        source = sources[(path, inode)]
+        digest = sha256_of(Path(source)) if source and BAD_EXE_HASHES else ""
+        if digest and digest.lower() in BAD_EXE_HASHES:
+            reasons.append("hash connu")
+        suspicious = "nom de mineur" in reasons or "hash connu" in reasons
+        dropped = len(reasons) > 1 and "supprimé du disque" in reasons   # déposé puis effacé
+        sev = "HIGH" if suspicious or dropped else "MEDIUM"
+        add_row(rows, "linux:maps", "", name,
+                f"{path} (inode={inode}; {' + '.join(reasons)}; PID={pids_of(pids)})", sev)
+
+SUID_BASELINE_FILE = CACHE_DIR / "suid_baseline.json"
+
+def _owner_of(st: os.stat_result) -> str:
+    try:
+        import pwd, grp
+        return f"{pwd.getpwuid(st.st_uid).pw_name}:{grp.getgrgid(st.st_gid).gr_name}"
+    except (ImportError, KeyError):
+        return f"{st.st_uid}:{st.st_gid}"
+
+def scan_suid_sgid(root: Path, rows: List[Dict[str, str]], *, baseline: bool = False,
+                   baseline_file: Optional[Path] = None, log=None,
+                   cancel: Optional[threading.Event] = None, progress: Any = None) -> None:
+    """
+    Binaires SUID/SGID sous 'root' (sans franchir les points de montage, sans plafond de résultats).
+    baseline=True : compare à l'inventaire persistant (chemin, mode, propriétaire, hash) et ne
+    signale que les binaires nouveaux, modifiés ou disparus (supprimés, bit retiré) sous 'root',
+    puis met l'inventaire à jour.
+    """
+    if not IS_LIN:
+        return
+    if log:
+        log(f"[v] Scan SUID/SGID: {root}")
+    cache = HashCache()
+    base_path = baseline_file or SUID_BASELINE_FILE
+    known: Dict[str, Dict[str, str]] = {}
+    if baseline:
+        data = read_json(base_path) if base_path.exists() else None
+        known = data if isinstance(data, dict) else {}
+    seen: Set[str] = set()
+
+    for entry in iter_tree_entries(root, same_device=True, cancel=cancel, progress=progress):
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        if not (st.st_mode & (stat.S_ISUID | stat.S_ISGID)) or not stat.S_ISREG(st.st_mode):
+            continue
+        record = {
+            "mode": oct(stat.S_IMODE(st.st_mode)),
+            "owner": _owner_of(st),
+            "sha256": cache.digest(Path(entry.path), st, cancel),
+        }
+        detail = f"{entry.path} (mode={record['mode']}; owner={record['owner']}; SHA256={record['sha256'] or '?'})"
+        sev = "HIGH" if looks_user_or_temp(entry.path) else "MEDIUM"
+        if baseline:
+            seen.add(entry.path)
+            previous = known.get(entry.path)
+            known[entry.path] = record
+            if previous == record:
+                continue
+            if previous:
+                changes = [k for k in ("mode", "owner", "sha256") if previous.get(k) != record[k]]
+                detail += f" [modifié: {', '.join(changes)}]"
+                sev = "HIGH"
+            else:
+                detail += " [nouveau]"
+        add_row(rows, "linux:suid_sgid", "", entry.name, detail, sev)
+
+    cache.save()
+    if baseline and not (cancel and cancel.is_set()):
+        # Absents de ce parcours, sous la racine parcourue : supprimés ou privés de leur bit SUID/SGID.
+        # Ceux encore présents avec le bit (autre point de montage, sous-arbre déjà traité) sont conservés.
+        prefix = str(root).rstrip(os.sep) + os.sep
+        for path in sorted(p for p in known if p not in seen and p.startswith(prefix)):
+            previous = known[path]
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                change, sev = "supprimé", "MEDIUM"
+            except OSError:
+                continue
+            else:
+                if stat.S_ISREG(st.st_mode) and st.st_mode & (stat.S_ISUID | stat.S_ISGID):
+                    continue
+                change, sev = "bit SUID/SGID retiré", "INFO"
+            del known[path]
+            add_row(rows, "linux:suid_sgid", "", os.path.basename(path),
+                    f"{path} (mode={previous.get('mode', '?')}; owner={previous.get('owner', '?')}; "
+                    f"SHA256={previous.get('sha256') or '?'}) [{change}]", sev)
+        try:
+            base_path.write_text(json.dumps(known, indent=2, ensure_ascii=False), encoding="utf-8")
+        except OSError:
+            if log:
+                log(f"[!] Écriture impossible: {base_path}")
 
 def scan_path_world_writable(rows: List[Dict[str, str]], *, log=None) -> None:
     if not IS_LIN:
@@ -88,25 +469,58 @@ def scan_path_world_writable(rows: List[Dict[str, str]], *, log=None) -> None:
             if log:
                 log(f"[!] Stat impossible: {p}")
 
-def scan_persistence(rows: List[Dict[str, str]], *, log=None, verbose: bool=False) -> None:
+def scan_persistence_offline(base: Path, rows: List[Dict[str, str]], *, log=None) -> None:
+    """Image montée : crontabs de tous les utilisateurs (spool) + unités systemd --user de chaque profil."""
+    from scanner.core.users import iter_user_homes
+    for d in CRON_SPOOL_DIRS:
+        spool = _list_files(base / d)
+        for p, text in zip(spool, _read_texts(spool)):
+            for line in (text or "").splitlines():
+                parsed = parse_cron_line(line, with_user=False)
+                if parsed:
+                    schedule, _, command = parsed
+                    severity = "MEDIUM" if command_is_suspicious(command) else "INFO"
+                    add_row(rows, "persist:crontab", p.name, schedule, command, severity)
+    user_dirs = [u.home / ".config" / "systemd" / "user" for u in iter_user_homes(base)]
+    user_dirs += [base / d for d in SYSTEMD_USER_DIRS]
+    scan_systemd_units(user_dirs, rows, "persist:systemd", "user", log=log, base=base)
+    scan_systemd_timers(user_dirs, rows, "persist:timer", "user", log=log, base=base)
+
+def scan_persistence(rows: List[Dict[str, str]], *, log=None, verbose: bool=False,
+                     base: Optional[Path] = None) -> None:
     """Persistance utilisateur Linux: crontab + systemd --user."""
+    if base is not None:
+        scan_persistence_offline(base, rows, log=log if verbose else None)
+        return
     if not IS_LIN:
         return
-    code, out, _ = run_capture_ext(["crontab", "-l"])
-    if code == 0 and out:
+    # crontab de l'utilisateur courant : lecture directe du spool si possible, sinon 'crontab -l'
+    user = user_of(os.getuid())
+    text: Optional[str] = None
+    for d in CRON_SPOOL_DIRS:
+        p = Path("/") / d / str(user)
+        try:
+            if p.is_file():
+                text = p.read_text(encoding="utf-8", errors="ignore")
+                break
+        except (OSError, UnicodeError):
+            continue
+    if text is None:
+        code, out, _ = run_capture_ext(["crontab", "-l"])
+        text = out if code == 0 else None
+    if text:
         if log and verbose:
-            log("[v] crontab -l")
-        for line in out.splitlines():
-            entry_line = line.strip()
-            if entry_line and not entry_line.startswith("#"):
-                severity = "MEDIUM" if SUSPICIOUS_CLI_REGEX.search(entry_line) else "INFO"
-                add_row(rows, "persist:crontab", "", "", entry_line, severity)
-
-    if which("systemctl"):
-        code, out, _ = run_capture_ext(["systemctl", "--user", "list-unit-files"])
-        if code == 0 and out:
-            if log and verbose:
-                log("[v] systemctl --user list-unit-files")
-            for line in out.splitlines():
-                if ".service" in line:
-                    add_row(rows, "persist:systemd", "user", "", line.strip(), "INFO")
+            log("[v] crontab utilisateur")
+        for line in text.splitlines():
+            parsed = parse_cron_line(line, with_user=False)
+            if parsed:
+                schedule, _, command = parsed
+                severity = "MEDIUM" if command_is_suspicious(command) else "INFO"
+                add_row(rows, "persist:crontab", str(user or ""), schedule, command, severity)
+
+    user_dirs = [Path.home() / ".config" / "systemd" / "user",
+                 *(Path("/") / d for d in SYSTEMD_USER_DIRS)]
+    if log and verbose:
+        log("[v] systemd --user : lecture des unit files")
+    scan_systemd_units(user_dirs, rows, "persist:systemd", "user", log=log if verbose else None)
+    scan_systemd_timers(user_dirs, rows, "persist:timer", "user", log=log if verbose else None)
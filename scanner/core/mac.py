@@ -3,25 +3,57 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from scanner.utils import IS_MAC, run_capture_ext
-from scanner.core.common import add_row
+from scanner.utils import IS_MAC, run_capture_ext, looks_user_or_temp
+from scanner.core.common import add_row, command_is_suspicious
+from scanner.parsers.launchd import LaunchJob, parse_launchd_many
 
 
-def scan_macos_launch_globals(rows: List[Dict[str, str]], *, log=None) -> None:
-    if not IS_MAC:
+# Répertoires launchd globaux (relatifs à la racine système)
+LAUNCHD_GLOBAL_DIRS = ["Library/LaunchDaemons", "Library/LaunchAgents"]
+
+
+def launch_job_severity(job: LaunchJob) -> str:
+    """HIGH : ligne de commande suspecte ; MEDIUM : programme ou script dans un emplacement utilisateur/temporaire."""
+    if command_is_suspicious(job.command):
+        return "HIGH"
+    if any(looks_user_or_temp(a) for a in [job.program, *job.arguments[1:]] if a.startswith("/")):
+        return "MEDIUM"
+    return "INFO"
+
+
+def scan_launchd_dir(d: Path, rows: List[Dict[str, str]], category: str, *, owner: str = "",
+                     log=None, workers: int = 8) -> None:
+    """Parse en parallèle les .plist d'un répertoire launchd ; une ligne par job (commande + RunAtLoad/KeepAlive)."""
+    try:
+        plists = sorted(d.glob("*.plist")) if d.is_dir() else []
+    except OSError:
+        if log:
+            log(f"[!] Accès impossible: {d}")
         return
-    for p in [Path("/Library/LaunchDaemons"), Path("/Library/LaunchAgents")]:
-        try:
-            if p.exists():
-                if log:
-                    log(f"[v] Parcours {p}")
-                for f in p.glob("*.plist"):
-                    add_row(rows, "mac:launch", str(p), f.name, str(f), "INFO")
-        except OSError:
-            if log:
-                log(f"[!] Accès impossible: {p}")
+    if not plists:
+        return
+    if log:
+        log(f"[v] Parcours {d}")
+    for f, job in parse_launchd_many(plists, workers).items():
+        item = f"{f.name} ({owner})" if owner else f.name
+        if job is None:
+            add_row(rows, category, str(d), item, f"{f} (plist illisible)", "MEDIUM")
+            continue
+        flags = [name for name, on in (("RunAtLoad", job.run_at_load), ("KeepAlive", job.keep_alive),
+                                       ("Disabled", job.disabled)) if on]
+        detail = (job.command or "(aucun programme)") + (f" [{', '.join(flags)}]" if flags else "")
+        if job.user:
+            detail += f" (user={job.user})"
+        add_row(rows, category, str(d), item, detail, launch_job_severity(job))
+
+
+def scan_macos_launch_globals(rows: List[Dict[str, str]], *, log=None, base: Optional[Path] = None) -> None:
+    if base is None and not IS_MAC:
+        return
+    for rel in LAUNCHD_GLOBAL_DIRS:
+        scan_launchd_dir((base or Path("/")) / rel, rows, "mac:launch", log=log)
 
 
 def scan_macos_login_items(rows: List[Dict[str, str]], *, log=None) -> None:
@@ -50,15 +82,22 @@ def scan_macos_profiles(rows: List[Dict[str, str]], *, log=None) -> None:
                 add_row(rows, "mac:profiles", "", "", s, "INFO")
 
 
-def scan_persistence(rows: List[Dict[str, str]], *, log=None, verbose: bool = False) -> None:
-    if not IS_MAC:
+def scan_persistence(rows: List[Dict[str, str]], *, log=None, verbose: bool = False,
+                     base: Optional[Path] = None) -> None:
+    if base is None and not IS_MAC:
         return
     user_agents = Path.home() / "Library" / "LaunchAgents"
-    if user_agents.exists():
+    if base is None and user_agents.exists():
         if log and verbose:
             log(f"[v] LaunchAgents utilisateur: {user_agents}")
-        for plist in user_agents.glob("*.plist"):
-            add_row(rows, "persist:launchagent", str(user_agents), plist.name, str(plist), "INFO")
+        scan_launchd_dir(user_agents, rows, "persist:launchagent", log=log if verbose else None)
+    if base is not None:
+        # image montée : pas de launchctl, on parcourt les LaunchAgents de chaque profil
+        from scanner.core.users import iter_user_homes
+        for user in iter_user_homes(base):
+            scan_launchd_dir(user.home / "Library" / "LaunchAgents", rows, "persist:launchagent",
+                             owner=user.name, log=log if verbose else None)
+        return
     code, out, _ = run_capture_ext(["launchctl", "list"])
     if code == 0 and out:
         if log and verbose:
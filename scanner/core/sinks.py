@@ -0,0 +1,402 @@
+# scanner/core/sinks.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import csv, gzip, heapq, io, json, os, queue, tempfile, threading
+
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from scanner.utils import default_csv_delimiter
+
+# Ordre historique des rapports
+SORT_KEY = itemgetter("Category", "Project", "Item", "Detail")
+CSV_FIELDS = ["Category", "Project", "Item", "Detail", "Severity", "SeverityText", "DescriptorPath"]
+
+QUEUE_MAX_ROWS = 16_384        # constats en attente d'écriture (au-delà, les étapes attendent)
+BATCH_ROWS = 512               # constats transmis par lot à l'écrivain (puis vidage disque)…
+FLUSH_INTERVAL_S = 1.0         # …lot partiel écrit dès que le scan n'a rien produit depuis 1 s
+SORT_CHUNK_ROWS = 200_000      # tri externe : taille d'un bloc trié en mémoire avant déversement
+SPILL_CHUNK_ROWS = 50_000      # tampon ordonné (étape en attente de son tour) : éléments gardés en mémoire
+RETAIN_WITH_SINKS = int(os.environ.get("IOC_MAX_DISPLAY", "300"))  # lignes gardées pour l'affichage
+
+_END = object()
+
+
+class _Mark:
+    """Repère de point de reprise glissé entre les constats (FindingStream.mark)."""
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+def _as_dict(row: Mapping[str, str]) -> Dict[str, str]:
+    as_dict = getattr(row, "as_dict", None)
+    return as_dict() if as_dict is not None else dict(row)
+
+
+def _open_text(path: str, *, encoding: str = "utf-8") -> io.TextIOBase:
+    """Ouvre en écriture texte ; suffixe .gz → compression gzip à la volée."""
+    out_path = Path(path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if out_path.suffix.lower() == ".gz":
+        return gzip.open(out_path, "wt", encoding=encoding, newline="")  # type: ignore[return-value]
+    return out_path.open("w", encoding=encoding, newline="")
+
+
+class FindingSink:
+    """Destination de constats : write() par ligne, flush() périodique, close() en fin de scan."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fh: Optional[io.TextIOBase] = None
+
+    def write(self, row: Mapping[str, str]) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+
+    def finish(self, *, status: str, total: int, high: int, stages: Sequence[Tuple[str, float, int]]) -> None:
+        """Issue du scan (statut, totaux, durées par étape), annoncée juste avant close()."""
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class CsvSink(FindingSink):
+    """CSV avec BOM UTF-8 (Excel), mêmes colonnes que write_csv."""
+
+    def __init__(self, path: str, delimiter: Optional[str] = None, extra_fields: Sequence[str] = ()) -> None:
+        super().__init__(path)
+        from scanner.refs.labels import SEVERITY_LABEL
+        self._labels = SEVERITY_LABEL
+        self._fh = _open_text(path, encoding="utf-8-sig")
+        deli = delimiter if delimiter and len(delimiter) == 1 else default_csv_delimiter()
+        self._writer = csv.DictWriter(self._fh, fieldnames=CSV_FIELDS + list(extra_fields), delimiter=deli,
+                                      extrasaction="ignore")
+        self._writer.writeheader()
+
+    def write(self, row: Mapping[str, str]) -> None:
+        rec = _as_dict(row)
+        rec["SeverityText"] = self._labels.get(rec.get("Severity", ""), rec.get("Severity", ""))
+        rec.setdefault("DescriptorPath", "")
+        self._writer.writerow(rec)
+
+
+class JsonSink(FindingSink):
+    """Tableau JSON (indent=2, comme write_json) écrit au fil de l'eau ; fermé proprement par close()."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._fh = _open_text(path)
+        self._sep = "[\n  "
+
+    def write(self, row: Mapping[str, str]) -> None:
+        self._fh.write(self._sep)
+        self._fh.write(json.dumps(_as_dict(row), ensure_ascii=False, indent=2).replace("\n", "\n  "))
+        self._sep = ",\n  "
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.write("[]" if self._sep.startswith("[") else "\n]")
+        super().close()
+
+
+class JsonlSink(FindingSink):
+    """JSON Lines : un constat par ligne, lisible même si le scan est interrompu."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self._fh = _open_text(path)
+
+    def write(self, row: Mapping[str, str]) -> None:
+        self._fh.write(json.dumps(_as_dict(row), ensure_ascii=False))
+        self._fh.write("\n")
+
+
+class SpillBuffer:
+    """
+    Tampon ordonné borné : tous les chunk_rows éléments, le bloc en mémoire part dans un JSONL
+    temporaire ; l'itération relit les blocs puis le reste, dans l'ordre d'ajout.
+    encode/decode : conversion élément ↔ valeur JSON (par défaut, constat ↔ dictionnaire).
+    """
+
+    _prefix = "ioc_spill_"
+
+    def __init__(self, chunk_rows: int = SPILL_CHUNK_ROWS, *, encode: Optional[Callable[[Any], Any]] = None,
+                 decode: Optional[Callable[[Any], Any]] = None) -> None:
+        self.chunk_rows = max(1, chunk_rows)
+        self._encode = encode or _as_dict
+        self._decode = decode
+        self._buf: List[Any] = []
+        self._chunks: List[str] = []
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+
+    def __len__(self) -> int:
+        return len(self._chunks) * self.chunk_rows + len(self._buf)
+
+    def add(self, item: Any) -> None:
+        self._buf.append(item)
+        if len(self._buf) >= self.chunk_rows:
+            self._spill()
+
+    def _spill(self) -> None:
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix=self._prefix)
+        path = os.path.join(self._tmpdir.name, f"chunk{len(self._chunks):05d}.jsonl")
+        encode = self._encode
+        with open(path, "w", encoding="utf-8") as fh:
+            for item in self._buf:
+                fh.write(json.dumps(encode(item), ensure_ascii=False))
+                fh.write("\n")
+        self._chunks.append(path)
+        self._buf = []
+
+    def _read_chunk(self, path: str) -> Iterator[Any]:
+        decode = self._decode
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                yield decode(json.loads(line)) if decode is not None else json.loads(line)
+
+    def __iter__(self) -> Iterator[Any]:
+        for path in self._chunks:
+            yield from self._read_chunk(path)
+        yield from self._buf
+
+    def close(self) -> None:
+        self._buf = []
+        self._chunks = []
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+
+
+class ExternalSorter(SpillBuffer):
+    """
+    Tri externe : blocs de SORT_CHUNK_ROWS triés en mémoire puis déversés en JSONL temporaire,
+    fusionnés (heapq.merge) à la lecture. La mémoire reste bornée quel que soit le nombre de constats.
+    """
+
+    _prefix = "ioc_sort_"
+
+    def __init__(self, chunk_rows: int = SORT_CHUNK_ROWS) -> None:
+        super().__init__(chunk_rows)
+
+    def add(self, row: Mapping[str, str]) -> None:
+        super().add(_as_dict(row))
+
+    def _spill(self) -> None:
+        self._buf.sort(key=SORT_KEY)
+        super()._spill()
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        self._buf.sort(key=SORT_KEY)
+        if not self._chunks:
+            yield from self._buf
+            return
+        yield from heapq.merge(*(self._read_chunk(p) for p in self._chunks), iter(self._buf), key=SORT_KEY)
+
+
+class FindingStream(list):
+    """
+    Liste de constats passée aux étapes (add_row, rows.append/extend). Sans destination, se comporte
+    comme une liste ordinaire. Avec destinations, les constats partent par lots dans une file bornée
+    vers un thread écrivain (vidage disque à chaque lot et quand le scan ne produit plus rien : un arrêt
+    brutal ne perd que les dernières lignes) et seules les `retain` premières lignes restent en mémoire
+    pour l'affichage ; total/high restent exacts. sort=True : sorties triées via ExternalSorter, écrites à close().
+    checkpoint : journal de reprise (write par constat, reached par repère), alimenté par le même écrivain.
+    """
+
+    def __init__(self, sinks: Optional[List[FindingSink]] = None, *, sort: bool = False,
+                 retain: Optional[int] = None, queue_max: int = QUEUE_MAX_ROWS, checkpoint: Any = None) -> None:
+        super().__init__()
+        self.sinks: List[FindingSink] = list(sinks or [])
+        self.checkpoint = checkpoint
+        self.retain = retain if self.sinks else None
+        self.total = 0
+        self.high = 0
+        self._lock = threading.Lock()
+        self._batch: List[Any] = []
+        self._error: Optional[BaseException] = None
+        self._sorter = ExternalSorter() if (sort and self.sinks) else None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        if self.sinks or checkpoint is not None:
+            self._queue = queue.Queue(maxsize=max(1, queue_max // BATCH_ROWS))
+            self._thread = threading.Thread(target=self._drain, name="finding-sinks", daemon=True)
+            self._thread.start()
+
+    # -- producteurs ----------------------------------------------------------
+    def append(self, row: Any) -> None:
+        with self._lock:
+            self.total += 1
+            if row["Severity"] == "HIGH":
+                self.high += 1
+            if self.retain is None or len(self) < self.retain:
+                super().append(row)
+            if self._queue is not None:
+                self._batch.append(row)
+                if len(self._batch) >= BATCH_ROWS:
+                    # put() sous verrou : l'ordre des lots est celui des ajouts (file pleine = les étapes attendent)
+                    self._queue.put(self._batch)
+                    self._batch = []
+
+    def extend(self, rows: Any) -> None:
+        for row in rows:
+            self.append(row)
+
+    def __iadd__(self, rows: Any) -> "FindingStream":
+        self.extend(rows)
+        return self
+
+    def mark(self, marker: Any) -> None:
+        """Repère transmis à checkpoint.reached() une fois écrits tous les constats ajoutés avant lui."""
+        if self.checkpoint is None:
+            return
+        with self._lock:
+            self._batch.append(_Mark(marker))
+
+    def finish(self, *, status: str, stages: Sequence[Tuple[str, float, int]] = ()) -> None:
+        """Transmet l'issue du scan aux destinations qui l'enregistrent (--db)."""
+        for sink in self.sinks:
+            sink.finish(status=status, total=self.total, high=self.high, stages=stages)
+
+    # -- écrivain -------------------------------------------------------------
+    def _write(self, rows: Iterable[Mapping[str, str]]) -> None:
+        if self._error is not None:
+            return  # on continue de vider la file pour ne pas bloquer les étapes
+        try:
+            checkpoint = self.checkpoint
+            for row in rows:
+                if checkpoint is not None:
+                    if type(row) is _Mark:
+                        checkpoint.reached(row.value)
+                        continue
+                    checkpoint.write(row)
+                if self._sorter is not None:
+                    self._sorter.add(row)
+                    continue
+                for sink in self.sinks:
+                    sink.write(row)
+            if self._sorter is None:
+                for sink in self.sinks:
+                    sink.flush()
+        except (OSError, ValueError) as e:
+            self._error = e
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                batch = self._queue.get(timeout=FLUSH_INTERVAL_S)
+            except queue.Empty:
+                # Scan au repos : on écrit le lot partiel (sans attendre un producteur qui tiendrait le verrou),
+                # sauf si un lot complet a été déposé depuis le délai : il le précède et passe d'abord
+                if self._lock.acquire(blocking=False):
+                    try:
+                        batch = []
+                        if self._queue.empty():   # put() n'a lieu que sous ce verrou
+                            batch, self._batch = self._batch, []
+                    finally:
+                        self._lock.release()
+                    if batch:
+                        self._write(batch)
+                continue
+            if batch is _END:
+                return
+            self._write(batch)
+
+    def close(self) -> None:
+        """Termine l'écriture (fusion du tri externe le cas échéant) ; relève l'erreur d'E/S éventuelle."""
+        if self._thread is None:
+            return
+        with self._lock:
+            batch, self._batch = self._batch, []
+            if batch:
+                self._queue.put(batch)
+            self._queue.put(_END)
+        self._thread.join()
+        self._thread = None
+        try:
+            if self._sorter is not None and self._error is None:
+                for n, row in enumerate(self._sorter, 1):
+                    for sink in self.sinks:
+                        sink.write(row)
+                    if n % BATCH_ROWS == 0:
+                        for sink in self.sinks:
+                            sink.flush()
+        except (OSError, ValueError) as e:
+            self._error = e
+        finally:
+            if self._sorter is not None:
+                self._sorter.close()
+            for sink in self.sinks:
+                try:
+                    sink.close()
+                except (OSError, ValueError) as e:
+                    self._error = self._error or e
+        if self._error is not None:
+            raise OSError(f"écriture des résultats: {self._error}") from self._error
+
+
+def sink_for_path(path: str, delimiter: Optional[str] = None) -> FindingSink:
+    """Format déduit de l'extension (hors .gz) : .csv, .jsonl / .ndjson, sinon JSON."""
+    name = path.lower()[:-3] if path.lower().endswith(".gz") else path.lower()
+    if name.endswith(".csv"):
+        return CsvSink(path, delimiter)
+    if name.endswith((".jsonl", ".ndjson")):
+        return JsonlSink(path)
+    return JsonSink(path)
+
+
+def open_sinks(options: Any, meta: Optional[Mapping[str, Any]] = None, *, log=None) -> List[FindingSink]:
+    """
+    Destinations demandées par les options (--csv, --json, --jsonl ; suffixe .gz = compressé ;
+    --db : base SQLite, meta = informations du scan enregistrées avec les constats ;
+    --aggregate : CSV/JSON/JSONL reçoivent la synthèse par IoC au lieu du détail ;
+    --summary PATH : synthèse dans un fichier à part, détail inchangé ;
+    --baseline REF : CSV/JSON/JSONL ne reçoivent que les différences avec REF).
+    """
+    files: List[FindingSink] = []
+    sinks: List[FindingSink] = []
+    baseline = getattr(options, "baseline", None)
+    try:
+        if getattr(options, "csv", None):
+            extra = ("Change", "PreviousSeverity") if baseline else ()
+            files.append(CsvSink(options.csv, getattr(options, "delimiter", None), extra))
+        if getattr(options, "json", None):
+            files.append(JsonSink(options.json))
+        if getattr(options, "jsonl", None):
+            files.append(JsonlSink(options.jsonl))
+        if baseline:
+            from scanner.core.baseline import DiffSink
+            sinks.append(DiffSink(files, baseline, getattr(options, "baseline_scan", None), log=log))
+        elif getattr(options, "aggregate", False):
+            from scanner.core.aggregate import AggregateSink
+            sinks.append(AggregateSink(files))
+        else:
+            sinks.extend(files)
+        files = []
+        if getattr(options, "summary", None):
+            from scanner.core.aggregate import AggregateSink
+            sinks.append(AggregateSink([sink_for_path(options.summary, getattr(options, "delimiter", None))]))
+        if getattr(options, "db", None):
+            from scanner.core.store import SqliteSink
+            sinks.append(SqliteSink(options.db, meta))
+    except OSError:
+        for sink in files + sinks:
+            sink.close()
+        raise
+    return sinks
+
+
+__all__ = [
+    "SORT_KEY", "FindingSink", "CsvSink", "JsonSink", "JsonlSink", "SpillBuffer", "ExternalSorter",
+    "FindingStream",
+    "open_sinks", "sink_for_path",
+]
@@ -0,0 +1,477 @@
+# scanner/core/stages.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os, threading, time
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from scanner.core.checkpoint import Checkpoint, StageMark, WalkProgress
+from scanner.core.common import (
+    Finding, _should_stop, scan_hosts_file, scan_listening_ports, scan_miner_files, scan_miner_processes,
+    scan_projects_under_root, scan_shell_profiles, scan_sysupdater_global,
+)
+from scanner.core.sinks import SpillBuffer
+
+# Ressources partagées entre étapes (limite = nombre d'étapes qui les utilisent en même temps)
+DISK = "disk"              # parcours d'arborescence / lecture massive : un seul à la fois (têtes de lecture, cache)
+EXEC = "exec"              # commandes externes (npm, systemctl, launchctl, sc, wmic…)
+NET = "net"                # sockets / connexions
+HASH_CACHE = "hash-cache"  # hash_cache.json (CACHE_DIR) : un seul écrivain
+
+RESOURCE_LIMITS: Dict[str, int] = {DISK: 1, EXEC: 3, NET: 2, HASH_CACHE: 1}
+
+# Classes de coût : les étapes lourdes démarrent en premier, les légères remplissent les trous
+HEAVY, LIGHT = "heavy", "light"
+
+# Étapes exécutées simultanément
+STAGE_WORKERS: int = max(1, min(4, (os.cpu_count() or 2)))
+
+# Constats gardés en mémoire par une étape qui attend son tour (au-delà : déversés sur disque)
+STAGE_SPILL_ROWS: int = 50_000
+
+
+class ScanContext(NamedTuple):
+    root: Path
+    exclude_names: List[str]
+    options: SimpleNamespace
+    base: Optional[Path]           # racine d'une image montée (None : système vivant)
+    target_os: str
+    cancel: Optional[threading.Event]
+    checkpoint: Optional[Checkpoint] = None   # points de reprise (--resume)
+
+    @property
+    def live(self) -> bool:
+        return self.base is None
+
+    @property
+    def verbose(self) -> bool:
+        return bool(getattr(self.options, "verbose", False))
+
+
+StageFn = Callable[[ScanContext, List[Dict[str, str]], Callable[[str], None]], None]
+
+
+class Stage(NamedTuple):
+    name: str                                   # libellé du message « [i] Étape: … »
+    run: StageFn
+    flag: Union[str, Callable[[SimpleNamespace], bool], None] = None   # option qui active l'étape
+    oses: Tuple[str, ...] = ()                  # OS cibles ; () = tous
+    live: bool = False                          # nécessite le système vivant (ignorée sur une image montée)
+    resources: Tuple[str, ...] = ()
+    cost: str = LIGHT
+
+    def enabled(self, ctx: ScanContext) -> bool:
+        if self.oses and ctx.target_os not in self.oses:
+            return False
+        if self.live and not ctx.live:
+            return False
+        if self.flag is None:
+            return True
+        if callable(self.flag):
+            return bool(self.flag(ctx.options))
+        return bool(getattr(ctx.options, self.flag, False))
+
+
+# ---------------------------------------------------------------------------
+# Étapes
+# ---------------------------------------------------------------------------
+
+def _max_bytes(options: SimpleNamespace) -> int:
+    from . import content as _content
+    max_mb = getattr(options, "content_max_mb", None)
+    return int(max_mb) * 1024 * 1024 if max_mb else _content.CONTENT_MAX_BYTES
+
+
+def _npm_projects(ctx: ScanContext, rows, log) -> None:
+    o = ctx.options
+    scan_projects_under_root(
+        ctx.root, ctx.exclude_names, rows, o.only_risk, o.sysupdater_project, not o.no_scripts,
+        max_depth=o.max_depth, follow_links=o.follow_links, log_fn=log, verbose=ctx.verbose, cancel=ctx.cancel,
+        progress=rows.progress,
+    )
+
+
+def _sysupdater_projects(ctx: ScanContext, rows, log) -> None:
+    o = ctx.options
+    scan_projects_under_root(
+        ctx.root, ctx.exclude_names, rows, False, True, False,
+        max_depth=o.max_depth, follow_links=o.follow_links, log_fn=log, verbose=ctx.verbose, cancel=ctx.cancel,
+        progress=rows.progress,
+    )
+
+
+def _content(ctx: ScanContext, rows, log) -> None:
+    from . import content as _content
+    o = ctx.options
+    _content.scan_content_signatures(
+        ctx.root, ctx.exclude_names, rows, max_depth=o.max_depth, follow_links=o.follow_links,
+        max_bytes=_max_bytes(o), log_fn=log, verbose=ctx.verbose, cancel=ctx.cancel, progress=rows.progress,
+    )
+
+
+def _archives(ctx: ScanContext, rows, log) -> None:
+    from . import archive as _archive
+    o = ctx.options
+    for path in o.archives:
+        if _should_stop(ctx.cancel):
+            break
+        _archive.scan_archive(
+            Path(path), rows, only_risk=o.only_risk, check_scripts=not o.no_scripts,
+            content=getattr(o, "content", False), max_bytes=_max_bytes(o),
+            log_fn=log, verbose=ctx.verbose, cancel=ctx.cancel,
+        )
+
+
+def _sysupdater_global(ctx: ScanContext, rows, log) -> None:
+    scan_sysupdater_global(ctx.root, ctx.exclude_names, rows, max_depth=max(ctx.options.max_depth, 8),
+                           log_fn=log, verbose=ctx.verbose, cancel=ctx.cancel, progress=rows.progress)
+
+
+def _miner_files(ctx: ScanContext, rows, log) -> None:
+    scan_miner_files(ctx.root, ctx.exclude_names, rows, max_depth=max(ctx.options.max_depth, 6),
+                     log_fn=log, verbose=ctx.verbose, cancel=ctx.cancel, progress=rows.progress)
+
+
+def _miner_processes(ctx: ScanContext, rows, log) -> None:
+    scan_miner_processes(rows, log=log, verbose=ctx.verbose, hash_exe=getattr(ctx.options, "proc_hashes", False),
+                         cancel=ctx.cancel)
+
+
+def _persistence_win(ctx: ScanContext, rows, log) -> None:
+    from . import win as _win
+    _win.scan_persistence(rows, log=log, verbose=ctx.verbose, base=ctx.base, cancel=ctx.cancel)
+
+
+def _persistence_mac(ctx: ScanContext, rows, log) -> None:
+    from . import mac as _mac
+    _mac.scan_persistence(rows, log=log, verbose=ctx.verbose, base=ctx.base)
+
+
+def _persistence_lin(ctx: ScanContext, rows, log) -> None:
+    from . import linux as _lin
+    _lin.scan_persistence(rows, log=log, verbose=ctx.verbose, base=ctx.base)
+
+
+def _hosts(ctx: ScanContext, rows, log) -> None:
+    scan_hosts_file(rows, log=log, base=ctx.base, target_os=ctx.target_os)
+
+
+def _net_listen(ctx: ScanContext, rows, log) -> None:
+    scan_listening_ports(rows)
+
+
+def _shell_profiles(ctx: ScanContext, rows, log) -> None:
+    from . import users as _users
+    if ctx.live:
+        scan_shell_profiles(rows, log=log)
+    else:
+        _users.scan_user_profiles(rows, base=ctx.base, log=log)
+    if ctx.target_os != "windows":
+        _users.scan_global_profiles(rows, base=ctx.base or Path("/"), log=log)
+
+
+def _all_users(ctx: ScanContext, rows, log) -> None:
+    from . import users as _users
+    _users.scan_all_users(rows, base=ctx.base or Path("/"), log=log)
+
+
+def _win_startup(ctx: ScanContext, rows, log) -> None:
+    from . import win as _win
+    _win.scan_windows_startup_folders(rows, log=log, base=ctx.base)
+    _win.scan_windows_run_keys(rows, log=log, base=ctx.base)
+
+
+def _win_services(ctx: ScanContext, rows, log) -> None:
+    from . import win as _win
+    _win.scan_windows_services(rows, log=log, base=ctx.base)
+
+
+def _win_defender(ctx: ScanContext, rows, log) -> None:
+    from . import win as _win
+    _win.scan_windows_defender_exclusions(rows, log=log, base=ctx.base)
+
+
+def _win_proxy(ctx: ScanContext, rows, log) -> None:
+    from . import win as _win
+    _win.scan_windows_proxy(rows, log=log, base=ctx.base)
+
+
+def _win_wmi(ctx: ScanContext, rows, log) -> None:
+    from . import win as _win
+    _win.scan_wmi_persistence(rows, log=log)
+
+
+def _mac_launch_globals(ctx: ScanContext, rows, log) -> None:
+    from . import mac as _mac
+    _mac.scan_macos_launch_globals(rows, log=log, base=ctx.base)
+
+
+def _mac_login_items(ctx: ScanContext, rows, log) -> None:
+    from . import mac as _mac
+    _mac.scan_macos_login_items(rows, log=log)
+
+
+def _mac_profiles(ctx: ScanContext, rows, log) -> None:
+    from . import mac as _mac
+    _mac.scan_macos_profiles(rows, log=log)
+
+
+def _lin_cron(ctx: ScanContext, rows, log) -> None:
+    from . import linux as _lin
+    _lin.scan_linux_cron_system(rows, log=log, base=ctx.base or Path("/"))
+
+
+def _lin_systemd(ctx: ScanContext, rows, log) -> None:
+    from . import linux as _lin
+    _lin.scan_systemd_system(rows, log=log, base=ctx.base or Path("/"))
+
+
+def _lin_ld_preload(ctx: ScanContext, rows, log) -> None:
+    from . import linux as _lin
+    _lin.scan_ld_preload(rows, log=log, base=ctx.base or Path("/"))
+    if ctx.live:
+        _lin.scan_proc_injections(rows, log=log)
+
+
+def _lin_suid(ctx: ScanContext, rows, log) -> None:
+    from . import linux as _lin
+    # la ligne de base SUID est propre à l'hôte : pas de comparaison sur une image
+    baseline = ctx.live and getattr(ctx.options, "suid_baseline", False)
+    # avec la ligne de base, l'inventaire n'est écrit qu'en fin d'étape : pas de reprise en cours de parcours
+    _lin.scan_suid_sgid(ctx.base or ctx.root, rows, baseline=baseline, log=log, cancel=ctx.cancel,
+                        progress=None if baseline else rows.progress)
+
+
+def _lin_path_world_writable(ctx: ScanContext, rows, log) -> None:
+    from . import linux as _lin
+    _lin.scan_path_world_writable(rows, log=log)
+
+
+def _containers(ctx: ScanContext, rows, log) -> None:
+    from . import containers as _ctr
+    _ctr.scan_containers(rows, ctx.exclude_names, ctx.options, log_fn=log, cancel=ctx.cancel,
+                         workers=getattr(ctx.options, "container_workers", None) or _ctr.CONTAINER_WORKERS)
+
+
+_WIN, _MAC, _LIN = ("windows",), ("macos",), ("linux",)
+
+# Ordre du registre = ordre des constats dans les sorties, quel que soit l'ordre d'exécution
+STAGES: List[Stage] = [
+    Stage("détection de projets npm", _npm_projects, lambda o: not o.no_npm,
+          resources=(DISK, EXEC), cost=HEAVY),
+    Stage("recherche .sysupdater dans projets", _sysupdater_projects, lambda o: o.no_npm and o.sysupdater_project,
+          resources=(DISK,), cost=HEAVY),
+    Stage("signatures de contenu (JS)", _content, "content", resources=(DISK,), cost=HEAVY),
+    Stage("archives / images de conteneurs (flux)", _archives, "archives", resources=(DISK,), cost=HEAVY),
+    Stage("recherche .sysupdater globale", _sysupdater_global, "sysupdater_global", resources=(DISK,), cost=HEAVY),
+    Stage("IoC mineurs (fichiers)", _miner_files, "miners", resources=(DISK,), cost=HEAVY),
+    Stage("IoC mineurs (process)", _miner_processes, "miners", live=True, resources=(EXEC, HASH_CACHE)),
+    Stage("persistance OS (Windows)", _persistence_win, "persistence", _WIN, resources=(EXEC,)),
+    Stage("persistance OS (macOS)", _persistence_mac, "persistence", _MAC, resources=(EXEC,)),
+    Stage("persistance OS (Linux)", _persistence_lin, "persistence", _LIN, resources=(EXEC,)),
+    Stage("fichier hosts", _hosts, "hosts"),
+    Stage("ports en écoute", _net_listen, "net_listen", live=True, resources=(NET, EXEC)),
+    # --all-users couvre déjà les profils globaux et chaque répertoire personnel (utilisateur courant compris)
+    Stage("profils shell", _shell_profiles, lambda o: o.shell_profiles and not o.all_users),
+    Stage("persistance de tous les utilisateurs", _all_users, "all_users"),
+    Stage("Startup folders + clés Run/RunOnce (Windows)", _win_startup, "startup", _WIN),
+    Stage("Services (Auto)", _win_services, "services", _WIN, resources=(EXEC,)),
+    Stage("Defender exclusions", _win_defender, "defender_exclusions", _WIN),
+    Stage("Proxy système", _win_proxy, "proxy", _WIN),
+    Stage("WMI persistence", _win_wmi, "wmi", _WIN, live=True, resources=(EXEC,)),
+    Stage("LaunchDaemons/Agents (globaux)", _mac_launch_globals, "launch_globals", _MAC),
+    Stage("Login Items", _mac_login_items, "login_items", _MAC, live=True, resources=(EXEC,)),
+    Stage("Profiles (macOS)", _mac_profiles, "profiles", _MAC, live=True, resources=(EXEC,)),
+    Stage("Cron système", _lin_cron, "cron_system", _LIN),
+    Stage("systemd (système)", _lin_systemd, "systemd_system", _LIN),
+    Stage("LD_PRELOAD (/etc/ld.so.preload + processus)", _lin_ld_preload, "ld_preload", _LIN),
+    Stage("SUID/SGID", _lin_suid, "suid", _LIN, resources=(DISK, HASH_CACHE), cost=HEAVY),
+    Stage("PATH world-writable", _lin_path_world_writable, "path_world_writable", _LIN, live=True),
+    Stage("conteneurs en cours d'exécution (/proc/<pid>/root)", _containers, "containers", _LIN, live=True,
+          resources=(DISK,), cost=HEAVY),
+]
+
+
+def select_stages(ctx: ScanContext, stages: Sequence[Stage] = STAGES) -> List[Stage]:
+    """Étapes actives pour ce scan (OS cible, système vivant ou image, options)."""
+    return [s for s in stages if s.enabled(ctx)]
+
+
+# ---------------------------------------------------------------------------
+# Ordonnanceur
+# ---------------------------------------------------------------------------
+
+class _Mark(NamedTuple):
+    value: StageMark
+
+
+def _encode_pending(entry: Any) -> Any:
+    if type(entry) is _Mark:
+        return {"stage": entry.value.stage, "frontier": entry.value.frontier}
+    return [entry["Category"], entry["Project"], entry["Item"], entry["Detail"], entry["Severity"],
+            entry.get("DescriptorPath")]
+
+
+def _decode_pending(rec: Any) -> Any:
+    if isinstance(rec, dict):
+        return _Mark(StageMark(rec["stage"], rec["frontier"]))
+    category, project, item, detail, severity, descriptor = rec
+    row = Finding(category, project, item, detail, severity)
+    if descriptor is not None:
+        row["DescriptorPath"] = descriptor
+    return row
+
+
+class StageRows(list):
+    """
+    Constats d'une étape. Tant qu'une étape qui la précède dans le registre n'est pas terminée, ils
+    restent ici ; à son tour (promote), ils passent dans `target` et les suivants y vont directement.
+    Les sorties ont ainsi le même ordre qu'une exécution séquentielle. L'attente est bornée en mémoire :
+    au-delà de spill_rows constats, ils sont déversés sur disque (SpillBuffer) jusqu'à la promotion.
+    """
+
+    def __init__(self, target: List[Any], spill_rows: int = STAGE_SPILL_ROWS) -> None:
+        super().__init__()
+        self.target = target
+        self.count = 0
+        self.progress: Optional[WalkProgress] = None   # frontière du parcours (points de reprise)
+        self._pending = SpillBuffer(spill_rows, encode=_encode_pending, decode=_decode_pending)
+        self._live = False
+        self._lock = threading.Lock()
+
+    def append(self, row: Any) -> None:
+        with self._lock:
+            self.count += 1
+            if self._live:
+                self.target.append(row)
+            else:
+                self._pending.add(row)
+
+    def extend(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def __iadd__(self, rows: Iterable[Any]) -> "StageRows":
+        self.extend(rows)
+        return self
+
+    def mark(self, marker: StageMark) -> None:
+        """Repère de point de reprise, transmis à sa place parmi les constats."""
+        with self._lock:
+            if self._live:
+                self.target.mark(marker)
+            else:
+                self._pending.add(_Mark(marker))
+
+    def promote(self) -> None:
+        with self._lock:
+            try:
+                for row in self._pending:
+                    if type(row) is _Mark:
+                        self.target.mark(row.value)
+                    else:
+                        self.target.append(row)
+            finally:
+                self._pending.close()
+                self._live = True
+
+
+class StageScheduler:
+    """
+    Exécute des étapes indépendantes en parallèle (workers threads), sous limites par ressource
+    (RESOURCE_LIMITS), les lourdes d'abord. Plus de lancement dès que `cancel` est posé ; une
+    exception d'étape arrête les lancements puis est relancée une fois les étapes en cours finies.
+    timings : (nom, secondes, constats) des étapes terminées, dans l'ordre du registre.
+    Avec ctx.checkpoint, chaque étape reçoit sa frontière de parcours (StageRows.progress) et un
+    repère « étape terminée » suit ses constats si elle n'a pas été interrompue.
+    """
+
+    def __init__(self, ctx: ScanContext, *, workers: int = STAGE_WORKERS,
+                 limits: Optional[Dict[str, int]] = None, log=None) -> None:
+        self.ctx = ctx
+        self.workers = max(1, workers)
+        self.limits = dict(RESOURCE_LIMITS if limits is None else limits)
+        self.log = log or (lambda message: None)
+        self._timings: List[Optional[Tuple[str, float, int]]] = []
+
+    @property
+    def timings(self) -> List[Tuple[str, float, int]]:
+        return [t for t in self._timings if t is not None]
+
+    def _call(self, stage: Stage, rows: StageRows, index: int) -> None:
+        self.log(f"[i] Étape: {stage.name}…")
+        t0 = time.perf_counter()
+        try:
+            stage.run(self.ctx, rows, self.log)
+            if self.ctx.checkpoint is not None and not _should_stop(self.ctx.cancel):
+                rows.mark(StageMark(stage.name))
+        finally:
+            self._timings[index] = (stage.name, time.perf_counter() - t0, rows.count)
+
+    def run(self, stages: Sequence[Stage], rows: List[Any]) -> None:
+        n = len(stages)
+        buffers = [StageRows(rows) for _ in stages]
+        if self.ctx.checkpoint is not None:
+            for stage, buf in zip(stages, buffers):
+                buf.progress = self.ctx.checkpoint.walk_progress(stage.name, buf.mark, self.ctx.cancel)
+        self._timings = [None] * n
+        if not n:
+            return
+        pending = sorted(range(n), key=lambda i: (stages[i].cost != HEAVY, i))
+        in_use: Dict[str, int] = {}
+        running: Dict[Future, int] = {}
+        done = [False] * n
+        head = 0
+        error: Optional[BaseException] = None
+        buffers[0].promote()
+
+        def fits(stage: Stage) -> bool:
+            return all(in_use.get(r, 0) < self.limits.get(r, self.workers) for r in stage.resources)
+
+        pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="scan-stage")
+        try:
+            while pending or running:
+                if error is not None or _should_stop(self.ctx.cancel):
+                    pending = []
+                for i in list(pending):
+                    if len(running) >= self.workers:
+                        break
+                    if fits(stages[i]):
+                        pending.remove(i)
+                        for r in stages[i].resources:
+                            in_use[r] = in_use.get(r, 0) + 1
+                        running[pool.submit(self._call, stages[i], buffers[i], i)] = i
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    i = running.pop(fut)
+                    for r in stages[i].resources:
+                        in_use[r] -= 1
+                    done[i] = True
+                    if error is None and fut.exception() is not None:
+                        error = fut.exception()
+                while head < n - 1 and done[head]:
+                    head += 1
+                    buffers[head].promote()
+        except KeyboardInterrupt:
+            # les étapes en cours voient l'arrêt à leur prochain point de contrôle
+            if self.ctx.cancel is not None:
+                self.ctx.cancel.set()
+            raise
+        finally:
+            pool.shutdown(wait=True)
+            for buf in buffers[head + 1:]:
+                buf.promote()   # arrêt : constats des étapes déjà terminées conservés, dans l'ordre
+        if error is not None:
+            raise error
+
+
+__all__ = [
+    "DISK", "EXEC", "HASH_CACHE", "HEAVY", "LIGHT", "NET", "RESOURCE_LIMITS", "STAGES", "STAGE_WORKERS",
+    "ScanContext", "Stage", "StageRows", "StageScheduler", "select_stages",
+]
@@ -0,0 +1,242 @@
+# scanner/core/store.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import argparse, json, sqlite3, sys
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from scanner.core.sinks import FindingSink
+
+SCHEMA_VERSION = 1
+SEVERITIES = ("INFO", "MEDIUM", "HIGH")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS scans (
+    id          INTEGER PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    status      TEXT NOT NULL DEFAULT 'running',   -- running | complete | cancelled | interrupted | failed
+    host        TEXT,
+    platform    TEXT,
+    root        TEXT,
+    system_root TEXT,
+    target_os   TEXT,
+    options     TEXT,                               -- JSON
+    total       INTEGER,
+    high        INTEGER
+);
+CREATE TABLE IF NOT EXISTS stages (
+    scan_id  INTEGER NOT NULL REFERENCES scans(id),
+    seq      INTEGER NOT NULL,
+    name     TEXT NOT NULL,
+    seconds  REAL NOT NULL,
+    findings INTEGER NOT NULL,
+    PRIMARY KEY (scan_id, seq)
+);
+CREATE TABLE IF NOT EXISTS findings (
+    id              INTEGER PRIMARY KEY,
+    scan_id         INTEGER NOT NULL REFERENCES scans(id),
+    category        TEXT NOT NULL,
+    project         TEXT NOT NULL,
+    item            TEXT NOT NULL,
+    detail          TEXT NOT NULL,
+    severity        TEXT NOT NULL,
+    descriptor_path TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_findings_category ON findings (scan_id, category);
+CREATE INDEX IF NOT EXISTS ix_findings_severity ON findings (scan_id, severity);
+CREATE INDEX IF NOT EXISTS ix_findings_project  ON findings (scan_id, project);
+CREATE INDEX IF NOT EXISTS ix_findings_item     ON findings (scan_id, item);
+"""
+
+_INSERT = ("INSERT INTO findings (scan_id, category, project, item, detail, severity, descriptor_path) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+# Borne haute d'un préfixe (requêtes "commence par" servies par l'index, sans LIKE)
+_PREFIX_END = "\U0010ffff"
+
+
+def connect(path: str, *, create: bool = False) -> sqlite3.Connection:
+    """Ouvre la base (WAL) ; create=True installe le schéma. sqlite3.Error si illisible."""
+    if not create and not Path(path).is_file():
+        raise sqlite3.OperationalError(f"base introuvable : {path}")
+    con = sqlite3.connect(path, timeout=30, check_same_thread=False)  # plusieurs images peuvent écrire dans la même base
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    if create:
+        con.executescript(_SCHEMA)
+        con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(SCHEMA_VERSION),))
+        con.commit()
+    return con
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class SqliteSink(FindingSink):
+    """
+    Destination --db : une ligne 'scans' par exécution, constats insérés par lots (executemany,
+    une transaction par lot de l'écrivain), durées par étape et totaux écrits à la fermeture.
+    """
+
+    def __init__(self, path: str, meta: Optional[Mapping[str, Any]] = None) -> None:
+        super().__init__(path)
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        try:
+            self._con = connect(path, create=True)
+        except sqlite3.Error as e:
+            raise OSError(f"{path}: {e}") from e
+        meta = dict(meta or {})
+        cur = self._con.execute(
+            "INSERT INTO scans (started_at, host, platform, root, system_root, target_os, options) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (meta.get("started_at") or _now(), meta.get("host"), meta.get("platform"), meta.get("root"),
+             meta.get("system_root"), meta.get("target_os"),
+             json.dumps(meta.get("options") or {}, ensure_ascii=False, default=str)),
+        )
+        self._con.commit()
+        self.scan_id: int = int(cur.lastrowid)
+        self._pending: List[Tuple[Any, ...]] = []
+        self.stages: List[Tuple[str, float, int]] = []
+        self.status = "complete"
+        self.total = 0
+        self.high = 0
+
+    def write(self, row: Mapping[str, str]) -> None:
+        self._pending.append((self.scan_id, row["Category"], row["Project"], row["Item"], row["Detail"],
+                              row["Severity"], row.get("DescriptorPath")))
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        try:
+            with self._con:
+                self._con.executemany(_INSERT, self._pending)
+        except sqlite3.Error as e:
+            raise OSError(f"{self.path}: {e}") from e
+        self._pending = []
+
+    def finish(self, *, status: str, total: int, high: int, stages: Sequence[Tuple[str, float, int]]) -> None:
+        """Renseigne l'issue du scan ; écrit à close()."""
+        self.status, self.total, self.high, self.stages = status, total, high, list(stages)
+
+    def close(self) -> None:
+        if getattr(self, "_con", None) is None:
+            return
+        try:
+            self.flush()
+            with self._con:
+                self._con.executemany(
+                    "INSERT OR REPLACE INTO stages (scan_id, seq, name, seconds, findings) VALUES (?, ?, ?, ?, ?)",
+                    [(self.scan_id, i, name, round(sec, 3), n) for i, (name, sec, n) in enumerate(self.stages)],
+                )
+                self._con.execute(
+                    "UPDATE scans SET finished_at = ?, status = ?, total = ?, high = ? WHERE id = ?",
+                    (_now(), self.status, self.total, self.high, self.scan_id),
+                )
+        except sqlite3.Error as e:
+            raise OSError(f"{self.path}: {e}") from e
+        finally:
+            self._con.close()
+            self._con = None
+
+
+# ---------------------------------------------------------------------------
+# Lecture (sous-commande "query")
+# ---------------------------------------------------------------------------
+
+def scan_ref(value: str) -> str:
+    """Type argparse de --scan / --baseline-scan : 'latest' ou identifiant numérique."""
+    if value != "latest" and not value.isdigit():
+        raise argparse.ArgumentTypeError(f"identifiant de scan invalide : {value!r} (nombre ou 'latest')")
+    return value
+
+
+def resolve_scan_id(con: sqlite3.Connection, scan: Optional[str] = None) -> Optional[int]:
+    """'latest' / None → dernier scan ; sinon identifiant numérique."""
+    if scan and scan != "latest":
+        return int(scan)
+    row = con.execute("SELECT MAX(id) FROM scans").fetchone()
+    return row[0] if row and row[0] is not None else None
+
+
+def query_findings(
+        con: sqlite3.Connection, scan_id: int, *, severities: Sequence[str] = (),
+        category: Optional[str] = None, path_prefix: Optional[str] = None, limit: Optional[int] = None,
+) -> Iterator[Dict[str, str]]:
+    """Constats filtrés, lus au fil du curseur (jamais tout en mémoire). category et path_prefix : préfixes."""
+    where: List[str] = ["scan_id = ?"]
+    args: List[Any] = [scan_id]
+    if severities:
+        where.append(f"severity IN ({', '.join('?' * len(severities))})")
+        args.extend(severities)
+    for column, prefix in (("category", category), ("project", path_prefix)):
+        if prefix:
+            where.append(f"{column} >= ? AND {column} < ?")
+            args.extend((prefix, prefix + _PREFIX_END))
+    sql = ("SELECT category, project, item, detail, severity, descriptor_path FROM findings "
+           f"WHERE {' AND '.join(where)} ORDER BY id")
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    for cat, proj, item, detail, sev, desc in con.execute(sql, args):
+        out = {"Category": cat, "Project": proj, "Item": item, "Detail": detail, "Severity": sev}
+        if desc is not None:
+            out["DescriptorPath"] = desc
+        yield out
+
+
+def query_main(argv: Sequence[str]) -> int:
+    """python -m scanner.main query report.sqlite [--severity HIGH] [--category npm:] [--path /home]…"""
+    parser = argparse.ArgumentParser(prog="query", description="Interroge une base produite par --db")
+    parser.add_argument("db", help="Base SQLite (--db)")
+    parser.add_argument("--scan", default="latest", type=scan_ref, help="Identifiant du scan (défaut: le plus récent)")
+    parser.add_argument("--severity", action="append", choices=SEVERITIES, default=[],
+                        help="Sévérité (répétable)")
+    parser.add_argument("--category", help="Préfixe de catégorie (ex. npm: ou persist:run)")
+    parser.add_argument("--path", help="Préfixe du champ Project (chemin)")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--format", choices=["text", "jsonl"], default="text")
+    parser.add_argument("--scans", action="store_true", help="Liste les scans enregistrés")
+    parser.add_argument("--stages", action="store_true", help="Durées par étape du scan choisi")
+    args = parser.parse_args(list(argv))
+
+    try:
+        con = connect(args.db)
+    except sqlite3.Error as e:
+        print(f"[!] {e}", file=sys.stderr)
+        return 2
+    try:
+        if args.scans:
+            for sid, started, finished, status, root, total, high in con.execute(
+                    "SELECT id, started_at, finished_at, status, root, total, high FROM scans ORDER BY id"):
+                print(f"#{sid} {started} → {finished or '…'} [{status}] {root} — Total: {total} | HIGH: {high}")
+            return 0
+        scan_id = resolve_scan_id(con, args.scan)
+        if scan_id is None:
+            print("[!] Aucun scan dans la base.", file=sys.stderr)
+            return 1
+        if args.stages:
+            for name, sec, n in con.execute(
+                    "SELECT name, seconds, findings FROM stages WHERE scan_id = ? ORDER BY seq", (scan_id,)):
+                print(f"{sec:9.3f}s  {n:8d}  {name}")
+            return 0
+        from scanner.refs.labels import SEVERITY_LABEL
+        for row in query_findings(con, scan_id, severities=args.severity, category=args.category,
+                                  path_prefix=args.path, limit=args.limit):
+            if args.format == "jsonl":
+                print(json.dumps(row, ensure_ascii=False))
+            else:
+                label = SEVERITY_LABEL.get(row["Severity"], row["Severity"])
+                print(f"[{row['Severity']}] ({label}) {row['Category']} | {row['Project']} | "
+                      f"{row['Item']} | {row['Detail']}")
+    finally:
+        con.close()
+    return 0
+
+
+__all__ = ["SCHEMA_VERSION", "SqliteSink", "connect", "scan_ref", "resolve_scan_id", "query_findings", "query_main"]
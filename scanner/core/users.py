@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os, re
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from scanner.utils import IS_WIN, looks_user_or_temp
+from scanner.core.common import add_row, command_is_suspicious
+from scanner.core.linux import CRON_SPOOL_DIRS, parse_cron_line
+from scanner.core.mac import scan_launchd_dir
+from scanner.parsers.lnk import parse_lnk, resolved_target
+from scanner.refs.miners import SUSPICIOUS_SCRIPT_PATTERNS
+
+# Profils shell par utilisateur et fichiers globaux (relatifs à la racine système)
+USER_PROFILE_NAMES = [".bashrc", ".zshrc", ".profile", ".bash_profile", ".bash_login", ".zprofile", ".zshenv"]
+GLOBAL_PROFILE_FILES = ["etc/profile", "etc/bash.bashrc", "etc/zsh/zshrc", "etc/zshrc"]
+GLOBAL_PROFILE_DIRS = ["etc/profile.d"]
+
+# Racines des répertoires personnels (repli si /etc/passwd est absent ou incomplet)
+HOME_ROOTS = ["home", "Users"]
+
+# Dossier Startup Windows relatif au profil
+WIN_STARTUP_REL = Path("AppData/Roaming/Microsoft/Windows/Start Menu/Programs/Startup")
+
+
+class UserHome(NamedTuple):
+    name: str
+    home: Path
+
+
+def iter_user_homes(base: Path = Path("/")) -> List[UserHome]:
+    """
+    Utilisateurs et répertoires personnels existants : /etc/passwd (Linux), puis les racines
+    home/ et Users/ (macOS, Windows, images montées). Dédupliqué par chemin.
+    """
+    users: Dict[str, UserHome] = {}
+    passwd = base / "etc" / "passwd"
+    try:
+        for line in passwd.read_text(encoding="utf-8", errors="ignore").splitlines():
+            fields = line.split(":")
+            if len(fields) < 7 or not fields[5] or fields[5] == "/":
+                continue
+            home = base / fields[5].lstrip("/")
+            if home.is_dir() and str(home) not in users:
+                users[str(home)] = UserHome(fields[0], home)
+    except OSError:
+        pass
+    roots = [base / r for r in HOME_ROOTS]
+    if IS_WIN and base == Path("/"):
+        roots = [Path(os.environ.get("SystemDrive", "C:") + "\\") / "Users"]
+    for root in roots:
+        try:
+            for home in sorted(root.iterdir()):
+                if home.is_dir() and not home.name.startswith(".") and str(home) not in users:
+                    users[str(home)] = UserHome(home.name, home)
+        except OSError:
+            continue
+    return list(users.values())
+
+
+def _read(p: Path) -> Optional[str]:
+    try:
+        return p.read_text(encoding="utf-8", errors="ignore") if p.is_file() else None
+    except (OSError, UnicodeError):
+        return None
+
+
+def scan_profile_file(p: Path, user: str, rows: List[Dict[str, str]], *, log=None) -> None:
+    text = _read(p)
+    if text is None:
+        return
+    if log:
+        log(f"[v] Profil: {p}")
+    for i, line in enumerate(text.splitlines(), start=1):
+        s = line.strip()
+        if not s or s.startswith("#"):
+            continue
+        if any(re.search(pat, s, flags=re.I) for pat in SUSPICIOUS_SCRIPT_PATTERNS):
+            add_row(rows, "shell:profile", str(p), f"ligne {i} ({user})", s, "MEDIUM")
+
+
+def scan_global_profiles(rows: List[Dict[str, str]], *, base: Path = Path("/"), log=None) -> None:
+    """Profils système : /etc/profile, /etc/bash.bashrc, /etc/profile.d/*…"""
+    files = [base / f for f in GLOBAL_PROFILE_FILES]
+    for d in GLOBAL_PROFILE_DIRS:
+        try:
+            files += sorted(p for p in (base / d).iterdir() if p.is_file())
+        except OSError:
+            continue
+    for p in files:
+        scan_profile_file(p, "system", rows, log=log)
+
+
+def scan_user_profiles(rows: List[Dict[str, str]], *, base: Path = Path("/"), log=None) -> None:
+    """Profils shell (.bashrc, .zshrc…) de chaque répertoire personnel sous 'base'."""
+    for user in iter_user_homes(base):
+        for name in USER_PROFILE_NAMES:
+            scan_profile_file(user.home / name, user.name, rows, log=log)
+
+
+def scan_one_user(user: UserHome, base: Path = Path("/"), *, log=None) -> List[Dict[str, str]]:
+    """Profils, .npmrc, crontab et démarrage automatique d'un utilisateur ; lignes attribuées à l'utilisateur."""
+    rows: List[Dict[str, str]] = []
+    home = user.home
+
+    for name in USER_PROFILE_NAMES:
+        scan_profile_file(home / name, user.name, rows, log=log)
+
+    npmrc = home / ".npmrc"
+    text = _read(npmrc)
+    if text is not None:
+        for i, line in enumerate(text.splitlines(), start=1):
+            s = line.strip()
+            if s.startswith("ignore-scripts") and "true" in s:
+                add_row(rows, "npm:config", str(npmrc), f"ligne {i} ({user.name})", "ignore-scripts", "INFO")
+
+    for d in CRON_SPOOL_DIRS:
+        spool = base / d / user.name
+        text = _read(spool)
+        if text is None:
+            continue
+        for i, line in enumerate(text.splitlines(), start=1):
+            parsed = parse_cron_line(line, with_user=False)
+            if parsed:
+                schedule, _, command = parsed
+                sev = "MEDIUM" if command_is_suspicious(command) else "INFO"
+                add_row(rows, "persist:crontab", str(spool), f"ligne {i} ({user.name})", f"{schedule} | {command}", sev)
+        break
+
+    # Démarrage automatique : XDG autostart, LaunchAgents utilisateur, dossier Startup Windows
+    autostart = home / ".config" / "autostart"
+    try:
+        desktops = sorted(autostart.glob("*.desktop")) if autostart.is_dir() else []
+    except OSError:
+        desktops = []
+    for f in desktops:
+        text = _read(f) or ""
+        execs = [ln.split("=", 1)[1].strip() for ln in text.splitlines() if ln.startswith("Exec=")]
+        for command in execs or [""]:
+            sev = "MEDIUM" if command and (command_is_suspicious(command) or looks_user_or_temp(command.split()[0])) else "INFO"
+            add_row(rows, "persist:autostart", str(autostart), f"{f.name} ({user.name})", command or str(f), sev)
+
+    scan_launchd_dir(home / "Library" / "LaunchAgents", rows, "persist:launchagent", owner=user.name, workers=1)
+
+    startup = home / WIN_STARTUP_REL
+    try:
+        entries = sorted(p for p in startup.iterdir() if p.is_file()) if startup.is_dir() else []
+    except OSError:
+        entries = []
+    for f in entries:
+        if f.name.lower() == "desktop.ini":
+            continue
+        link = parse_lnk(f) if f.suffix.lower() == ".lnk" else None
+        target = resolved_target(link, f) if link else ""
+        detail = str(f) + (f" → {target}" if target else "") + (f" {link.arguments}" if link and link.arguments else "")
+        add_row(rows, "persist:startup", str(startup), f"{f.name} ({user.name})", detail,
+                "HIGH" if f.suffix.lower() in {".bat", ".cmd", ".vbs", ".ps1", ".js"} else "MEDIUM")
+    return rows
+
+
+def scan_all_users(rows: List[Dict[str, str]], *, base: Path = Path("/"), log=None, workers: int = 8) -> None:
+    """Balayage multi-utilisateur (pool de threads) : profils globaux + chaque répertoire personnel."""
+    scan_global_profiles(rows, base=base, log=log)
+    users = iter_user_homes(base)
+    if log:
+        log(f"[i] {len(users)} répertoire(s) utilisateur à analyser")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for user_rows in pool.map(lambda u: scan_one_user(u, base, log=log), users):
+            rows.extend(user_rows)
+
+
+__all__ = [
+    "UserHome", "iter_user_homes", "scan_profile_file", "scan_global_profiles",
+    "scan_user_profiles", "scan_one_user", "scan_all_users",
+]
@@ -2,13 +2,16 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import json, csv, os, subprocess
+import json, csv, os, re, subprocess, threading
 
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from scanner.utils import IS_WIN, run_capture_ext, looks_user_or_temp
 from scanner.core.common import add_row
-from scanner.refs.miners import SUSPICIOUS_CLI_REGEX
+from scanner.parsers.lnk import parse_lnk, parse_lnk_many, resolved_target
+from scanner.parsers.regf import RegistryHive, open_hive
+from scanner.parsers.tasks import TaskAction, parse_tasks_dir
+from scanner.refs.miners import SUSPICIOUS_CLI_REGEX, SUSPICIOUS_SCRIPT_PATTERNS
 
 # refs/publishers est optionnel : si absent, on tombe sur une liste vide
 try:
@@ -16,7 +19,8 @@ try:
 except ImportError:
     TRUSTED_PUBLISHERS: list[str] = []
 
-def resolve_shortcut_target_windows(shortcut_path: os.PathLike[str] | str) -> str | None:
+def _resolve_shortcut_com(shortcut_path: os.PathLike[str] | str) -> str | None:
+    """Repli COM (WScript.Shell via PowerShell) : un processus par raccourci, donc lent."""
     if not IS_WIN:
         return None
     try:
@@ -32,64 +36,201 @@ def resolve_shortcut_target_windows(shortcut_path: os.PathLike[str] | str) -> st
     except (OSError, PermissionError, subprocess.SubprocessError):
         return None
 
-def scan_windows_startup_folders(rows: List[Dict[str, str]], *, log=None) -> None:
-    if not IS_WIN:
+def resolve_shortcut_target_windows(shortcut_path: os.PathLike[str] | str) -> str | None:
+    """Cible d'un .lnk : parseur MS-SHLLINK natif, COM uniquement en repli (Windows)."""
+    link = parse_lnk(Path(shortcut_path))
+    target = resolved_target(link, Path(shortcut_path)) if link else ""
+    return target or _resolve_shortcut_com(shortcut_path)
+
+def resolve_shortcuts(paths: List[Path]) -> Dict[Path, Tuple[str, str]]:
+    """Résolution en lot : {raccourci: (cible, arguments)} ; COM seulement pour les .lnk non résolus."""
+    out: Dict[Path, Tuple[str, str]] = {}
+    for p, link in parse_lnk_many(paths).items():
+        target = resolved_target(link, p) if link else ""
+        out[p] = (target or _resolve_shortcut_com(p) or "", link.arguments if link else "")
+    return out
+
+def scan_windows_startup_folders(rows: List[Dict[str, str]], *, log=None, base: Optional[Path] = None) -> None:
+    if base is not None:
+        # image montée : dossier Startup commun + celui de chaque profil
+        from scanner.core.users import WIN_STARTUP_REL, iter_user_homes
+        common = _find_ci(base, "ProgramData", "Microsoft", "Windows", "Start Menu", "Programs", "Startup")
+        paths = ([common] if common else []) + [u.home / WIN_STARTUP_REL for u in iter_user_homes(base)]
+    elif not IS_WIN:
         return
-    paths = [
-        Path(os.environ.get("APPDATA", "")) / r"Microsoft\Windows\Start Menu\Programs\Startup",
-        Path(os.environ.get("PROGRAMDATA", "")) / r"Microsoft\Windows\Start Menu\Programs\Startup",
-    ]
+    else:
+        paths = [
+            Path(os.environ.get("APPDATA", "")) / r"Microsoft\Windows\Start Menu\Programs\Startup",
+            Path(os.environ.get("PROGRAMDATA", "")) / r"Microsoft\Windows\Start Menu\Programs\Startup",
+        ]
     ext = {".lnk", ".exe", ".bat", ".cmd", ".vbs", ".ps1", ".js"}
     for p in paths:
         try:
             if p and p.exists():
                 if log:
                     log(f"[i] Startup folder: {p}")
-                for f in p.iterdir():
-                    if f.is_file() and f.suffix.lower() in ext:
-                        sev = "MEDIUM"
-                        target = resolve_shortcut_target_windows(f) if f.suffix.lower() == ".lnk" else None
-                        target_or_self = target or str(f)
-                        if looks_user_or_temp(target_or_self):
-                            sev = "HIGH"
-                        add_row(rows, "persist:startup", str(p), f.name, str(f), sev)
+                files = [f for f in p.iterdir() if f.is_file() and f.suffix.lower() in ext]
+                links = resolve_shortcuts([f for f in files if f.suffix.lower() == ".lnk"])
+                for f in files:
+                    sev = "MEDIUM"
+                    target, args = links.get(f, ("", ""))
+                    target_or_self = target or str(f)
+                    if looks_user_or_temp(target_or_self):
+                        sev = "HIGH"
+                    if args and (SUSPICIOUS_CLI_REGEX.search(args)
+                                 or any(re.search(pat, f"{target} {args}", flags=re.I) for pat in SUSPICIOUS_SCRIPT_PATTERNS)):
+                        sev = "HIGH"
+                    detail = str(f) + (f" → {target}" if target else "") + (f" {args}" if args else "")
+                    add_row(rows, "persist:startup", str(p), f.name, detail, sev)
         except (OSError, PermissionError):
             if log:
                 log(f"[!] Accès impossible: {p}")
 
-def scan_windows_services(rows: List[Dict[str, str]], *, log=None) -> None:
+# ---------------------------------------------------------------------------
+# Ruches hors-ligne (image montée, disque d'un autre système, profils non chargés)
+# ---------------------------------------------------------------------------
+
+HIVE_DIR_PARTS = ("Windows", "System32", "config")
+
+RUN_KEYS_MACHINE = [
+    r"Microsoft\Windows\CurrentVersion\Run",
+    r"Microsoft\Windows\CurrentVersion\RunOnce",
+    r"WOW6432Node\Microsoft\Windows\CurrentVersion\Run",
+    r"WOW6432Node\Microsoft\Windows\CurrentVersion\RunOnce",
+]
+RUN_KEYS_USER = [
+    r"Software\Microsoft\Windows\CurrentVersion\Run",
+    r"Software\Microsoft\Windows\CurrentVersion\RunOnce",
+]
+DEFENDER_EXCL_KEY = r"Microsoft\Windows Defender\Exclusions"
+INTERNET_SETTINGS_KEY = r"Software\Microsoft\Windows\CurrentVersion\Internet Settings"
+
+SERVICE_START_MODES = {0: "Boot", 1: "System", 2: "Auto", 3: "Manual", 4: "Disabled"}
+SERVICE_WIN32_TYPES = 0x30  # SERVICE_WIN32_OWN_PROCESS | SERVICE_WIN32_SHARE_PROCESS (pas les pilotes)
+
+_IMAGE_PATH_PREFIXES = [
+    ("%systemroot%\\", "C:\\Windows\\"), ("%windir%\\", "C:\\Windows\\"),
+    ("\\systemroot\\", "C:\\Windows\\"), ("system32\\", "C:\\Windows\\System32\\"),
+    ("%programfiles%\\", "C:\\Program Files\\"), ("%programfiles(x86)%\\", "C:\\Program Files (x86)\\"),
+    ("\\??\\", ""),
+]
+
+def _find_ci(parent: Path, *parts: str) -> Optional[Path]:
+    """Résout un chemin sans tenir compte de la casse (NTFS monté sous Linux, ruches 'ntuser.dat'…)."""
+    cur = parent
+    for part in parts:
+        cand = cur / part
+        if cand.exists():
+            cur = cand
+            continue
+        try:
+            cur = next(p for p in cur.iterdir() if p.name.lower() == part.lower())
+        except (OSError, StopIteration):
+            return None
+    return cur
+
+def system_hive_path(base: Path, name: str) -> Optional[Path]:
+    """Windows/System32/config/<SYSTEM|SOFTWARE> sous la racine 'base'."""
+    return _find_ci(base, *HIVE_DIR_PARTS, name)
+
+def iter_user_hives(base: Path) -> List[Tuple[str, Path]]:
+    """(utilisateur, NTUSER.DAT) pour chaque profil utilisateur sous 'base'."""
+    from scanner.core.users import iter_user_homes
+    out: List[Tuple[str, Path]] = []
+    for user in iter_user_homes(base):
+        hive = _find_ci(user.home, "NTUSER.DAT")
+        if hive is not None and hive.is_file():
+            out.append((user.name, hive))
+    return out
+
+def _live_root() -> Path:
+    return Path(os.environ.get("SystemDrive", "C:") + "\\")
+
+def _exe_of(cmdline: str) -> str:
+    exe = cmdline.strip()
+    if exe.startswith('"'):
+        return exe.split('"', 2)[1] if '"' in exe[1:] else exe
+    return exe.split(" ", 1)[0]
+
+def _normalize_image_path(path: str) -> str:
+    """ImagePath du registre ('%SystemRoot%\\…', '\\SystemRoot\\…', 'system32\\…') → chemin absolu C:\\…"""
+    quoted = path.startswith('"')
+    raw = path[1:] if quoted else path
+    low = raw.lower()
+    for prefix, repl in _IMAGE_PATH_PREFIXES:
+        if low.startswith(prefix):
+            raw = repl + raw[len(prefix):]
+            break
+    return ('"' + raw) if quoted else raw
+
+def _command_severity(cmdline: str) -> str:
+    suspicious = bool(SUSPICIOUS_CLI_REGEX.search(cmdline))
+    odd = looks_user_or_temp(_exe_of(cmdline))
+    return "HIGH" if suspicious and odd else "MEDIUM" if suspicious or odd else "INFO"
+
+def _add_service_rows(records, rows: List[Dict[str, str]]) -> None:
+    for rec in records:
+        name = (rec.get("Name") or "").strip()
+        display = (rec.get("DisplayName") or "").strip()
+        path = (rec.get("PathName") or "").strip()
+        start_mode = (rec.get("StartMode") or "").strip()
+        state = (rec.get("State") or "").strip()
+        if not name:
+            continue
+        exe = _exe_of(path)
+        if start_mode.lower().startswith("auto"):
+            sev = "INFO"
+            low = (exe or path).lower()
+            if low and not (low.startswith(r"c:\windows") or low.startswith(r"c:\program files")):
+                sev = "MEDIUM"
+                if any(x in low for x in ["\\appdata\\", "\\users\\", "\\temp\\"]):
+                    sev = "HIGH"
+            add_row(rows, "win:service", name, f"{display} [{state}|{start_mode}]", path or "(no path)", sev)
+
+def iter_offline_services(system_hive: RegistryHive) -> List[Dict[str, str]]:
+    """Services Win32 du ControlSet courant (Select\\Current), au format des enregistrements WMIC."""
+    select = system_hive.open_key("Select")
+    current = select.value("Current", 1) if select else 1
+    services = system_hive.open_key(f"ControlSet{int(current or 1):03d}\\Services")
+    if services is None:
+        return []
+    records: List[Dict[str, str]] = []
+    for key in services.subkeys():
+        vals = {v.name.lower(): v.data for v in key.values()}
+        stype, start = vals.get("type"), vals.get("start")
+        if not isinstance(stype, int) or not stype & SERVICE_WIN32_TYPES:
+            continue
+        records.append({
+            "Name": key.name,
+            "DisplayName": str(vals.get("displayname") or ""),
+            "PathName": _normalize_image_path(str(vals.get("imagepath") or "")),
+            "StartMode": SERVICE_START_MODES.get(start, str(start)) if isinstance(start, int) else "",
+            "State": "Offline",
+        })
+    return records
+
+def scan_windows_services(rows: List[Dict[str, str]], *, log=None, base: Optional[Path] = None) -> None:
+    if base is not None:
+        hive_path = system_hive_path(base, "SYSTEM")
+        hive = open_hive(hive_path) if hive_path else None
+        if hive is None:
+            if log:
+                log(f"[!] Ruche SYSTEM introuvable ou illisible sous {base}")
+            return
+        with hive:
+            if log:
+                log(f"[v] Services via ruche {hive_path}")
+            _add_service_rows(iter_offline_services(hive), rows)
+        return
     if not IS_WIN:
         return
 
-    def handle(reader):
-        for rec in reader:
-            name = (rec.get("Name") or "").strip()
-            display = (rec.get("DisplayName") or "").strip()
-            path = (rec.get("PathName") or "").strip()
-            start_mode = (rec.get("StartMode") or "").strip()
-            state = (rec.get("State") or "").strip()
-            if not name:
-                continue
-            exe = path
-            if exe.startswith('"'):
-                exe = exe.split('"', 2)[1] if '"' in exe[1:] else exe
-            else:
-                exe = exe.split(" ", 1)[0]
-            if start_mode.lower().startswith("auto"):
-                sev = "INFO"
-                low = (exe or path).lower()
-                if low and not (low.startswith(r"c:\windows") or low.startswith(r"c:\program files")):
-                    sev = "MEDIUM"
-                    if any(x in low for x in ["\\appdata\\", "\\users\\", "\\temp\\"]):
-                        sev = "HIGH"
-                add_row(rows, "win:service", name, f"{display} [{state}|{start_mode}]", path or "(no path)", sev)
-
     code, out, _ = run_capture_ext(["wmic", "service", "get", "Name,DisplayName,StartMode,State,PathName", "/FORMAT:CSV"])
     if code == 0 and out:
         if log:
             log("[v] Services via WMIC")
         rdr = csv.DictReader(out.splitlines())
-        handle(rdr)
+        _add_service_rows(rdr, rows)
         return
 
     ps_cmd = [
@@ -101,17 +242,86 @@ def scan_windows_services(rows: List[Dict[str, str]], *, log=None) -> None:
         if log:
             log("[v] Services via CIM")
         rdr = csv.DictReader(out.splitlines())
-        handle(rdr)
+        _add_service_rows(rdr, rows)
+
+def _add_run_rows(hive: RegistryHive, keys: List[str], scope: str, rows: List[Dict[str, str]]) -> None:
+    for sub in keys:
+        key = hive.open_key(sub)
+        if key is None:
+            continue
+        for v in key.values():
+            cmd = str(v.data or "")
+            if cmd:
+                add_row(rows, "persist:run", f"{scope}\\{sub}", v.name or "(défaut)", cmd, _command_severity(cmd))
+
+def scan_windows_run_keys(rows: List[Dict[str, str]], *, log=None, base: Optional[Path] = None) -> None:
+    """Clés Run/RunOnce machine (SOFTWARE) et de chaque utilisateur (NTUSER.DAT)."""
+    if base is None:
+        if not IS_WIN:
+            return
+        _scan_run_keys_live(rows, log=log)
+        root = _live_root()
+    else:
+        root = base
+        hive_path = system_hive_path(base, "SOFTWARE")
+        hive = open_hive(hive_path) if hive_path else None
+        if hive is not None:
+            with hive:
+                _add_run_rows(hive, RUN_KEYS_MACHINE, "HKLM\\SOFTWARE", rows)
+        elif log:
+            log(f"[!] Ruche SOFTWARE introuvable ou illisible sous {base}")
+    # profils non chargés (sur un système vivant, les ruches des sessions ouvertes sont verrouillées)
+    for user, hive_path in iter_user_hives(root):
+        hive = open_hive(hive_path)
+        if hive is None:
+            continue
+        with hive:
+            _add_run_rows(hive, RUN_KEYS_USER, f"HKU\\{user}", rows)
 
-def scan_windows_defender_exclusions(rows: List[Dict[str, str]], *, log=None) -> None:
+def _scan_run_keys_live(rows: List[Dict[str, str]], *, log=None) -> None:
+    try:
+        import winreg
+    except ImportError:
+        return
+    targets = [(winreg.HKEY_LOCAL_MACHINE, "HKLM", "SOFTWARE\\" + k) for k in RUN_KEYS_MACHINE]
+    targets += [(winreg.HKEY_CURRENT_USER, "HKCU", k) for k in RUN_KEYS_USER]
+    for hive, label, sub in targets:
+        try:
+            with winreg.OpenKey(hive, sub) as h:
+                j = 0
+                while True:
+                    try:
+                        v_name, vdata, _ = winreg.EnumValue(h, j); j += 1
+                    except OSError:
+                        break
+                    cmd = str(vdata or "")
+                    if cmd:
+                        add_row(rows, "persist:run", f"{label}\\{sub}", v_name or "(défaut)", cmd, _command_severity(cmd))
+        except OSError:
+            continue
+
+def scan_windows_defender_exclusions(rows: List[Dict[str, str]], *, log=None, base: Optional[Path] = None) -> None:
+    if base is not None:
+        hive_path = system_hive_path(base, "SOFTWARE")
+        hive = open_hive(hive_path) if hive_path else None
+        if hive is None:
+            if log:
+                log(f"[!] Ruche SOFTWARE introuvable ou illisible sous {base}")
+            return
+        with hive:
+            excl = hive.open_key(DEFENDER_EXCL_KEY)
+            for sub in (excl.subkeys() if excl else []):
+                for v in sub.values():
+                    add_row(rows, "win:defender:excl", sub.name, v.name, str(v.data), "MEDIUM")
+        return
     if not IS_WIN:
         return
     try:
         import winreg
     except ImportError:
         return
-    base = r"SOFTWARE\Microsoft\Windows Defender\Exclusions"
-    for hive, sub in [(winreg.HKEY_LOCAL_MACHINE, base)]:
+    base_key = r"SOFTWARE\Microsoft\Windows Defender\Exclusions"
+    for hive, sub in [(winreg.HKEY_LOCAL_MACHINE, base_key)]:
         try:
             with winreg.OpenKey(hive, sub) as h:
                 i = 0
@@ -132,9 +342,27 @@ def scan_windows_defender_exclusions(rows: List[Dict[str, str]], *, log=None) ->
             if log:
                 log(f"[!] Lecture registre impossible: {sub}")
 
-def scan_windows_proxy(rows: List[Dict[str, str]], *, log=None) -> None:
-    if not IS_WIN:
-        return
+def _add_proxy_rows(key, scope: str, rows: List[Dict[str, str]]) -> None:
+    proxy_enable = key.value("ProxyEnable", 0)
+    if proxy_enable:
+        add_row(rows, "win:proxy", scope, "ProxyEnable", str(proxy_enable), "MEDIUM")
+        add_row(rows, "win:proxy", scope, "ProxyServer", str(key.value("ProxyServer", "") or ""), "MEDIUM")
+
+def scan_windows_proxy(rows: List[Dict[str, str]], *, log=None, base: Optional[Path] = None) -> None:
+    if base is None:
+        if not IS_WIN:
+            return
+        _scan_proxy_live(rows, log=log)
+    for user, hive_path in iter_user_hives(base if base is not None else _live_root()):
+        hive = open_hive(hive_path)
+        if hive is None:
+            continue
+        with hive:
+            key = hive.open_key(INTERNET_SETTINGS_KEY)
+            if key is not None:
+                _add_proxy_rows(key, f"HKU\\{user}", rows)
+
+def _scan_proxy_live(rows: List[Dict[str, str]], *, log=None) -> None:
     try:
         import winreg
     except ImportError:
@@ -225,7 +453,58 @@ def scan_wmi_persistence(rows: List[Dict[str, str]], *, log=None) -> None:
         detail = f"Query={f_query}" + (f" | Payload={cmd}" if cmd else "")
         add_row(rows, "win:wmi:binding", "root\\subscription", item, detail, sev)
 
-def scan_persistence(rows: List[Dict[str, str]], *, log=None, verbose: bool=False) -> None:
+def default_tasks_root() -> Path:
+    return Path(os.environ.get("SystemRoot", r"C:\Windows")) / "System32" / "Tasks"
+
+def scan_scheduled_tasks_offline(tasks_root: Path, rows: List[Dict[str, str]], *, log=None,
+                                 verbose: bool = False, cancel: Optional[threading.Event] = None,
+                                 live: bool = False) -> bool:
+    """
+    Chemin rapide : lit directement les XML de System32\Tasks (live ou image montée, y compris
+    depuis Linux). Retourne False si l'arborescence est absente/illisible (repli schtasks), et
+    sur l'hôte en cours (live) si une partie en est refusée : les tâches protégées par ACL
+    manqueraient, schtasks les liste toutes.
+    """
+    denied: List[Path] = []
+    tasks = parse_tasks_dir(tasks_root, cancel=cancel, denied=denied)
+    if not tasks:
+        return False
+    if live and denied:
+        if log:
+            log(f"[i] Tâches planifiées : {len(denied)} élément(s) refusé(s) sous {tasks_root} → schtasks")
+        return False
+    if log and verbose:
+        log(f"[v] Tâches planifiées (XML) : {tasks_root} — {len(tasks)} tâche(s)")
+    for task in tasks:
+        triggers = ", ".join(task.triggers) or "(aucun déclencheur)"
+        if not task.enabled:
+            triggers += " [désactivée]"
+        for action in task.actions or [TaskAction("", "", "", "")]:
+            cmdline = f"{action.command} {action.arguments}".strip()
+            severity = "INFO"
+            if action.kind == "Exec" and cmdline:
+                suspicious = bool(SUSPICIOUS_CLI_REGEX.search(cmdline))
+                odd = looks_user_or_temp(action.command) or task.hidden
+                severity = "HIGH" if suspicious and odd else "MEDIUM" if suspicious or odd else "INFO"
+            if log and verbose and severity != "INFO":
+                log(f"[~] Tâche potentiellement suspecte: {task.name} → {cmdline}")
+            detail = cmdline if action.kind != "ComHandler" else f"COM {cmdline}"
+            if task.user:
+                detail += f" (user={task.user})"
+            add_row(rows, "persist:task", task.name, triggers, detail, severity)
+    return True
+
+def scan_persistence(rows: List[Dict[str, str]], *, log=None, verbose: bool=False,
+                     tasks_root: Optional[Path] = None, base: Optional[Path] = None,
+                     cancel: Optional[threading.Event] = None) -> None:
+    if tasks_root is None and base is not None:
+        tasks_root = _find_ci(base, "Windows", "System32", "Tasks") or base / "Windows" / "System32" / "Tasks"
+    live = tasks_root is None and base is None
+    if scan_scheduled_tasks_offline(tasks_root or default_tasks_root(), rows, log=log, verbose=verbose,
+                                    cancel=cancel, live=live):
+        return
+    if tasks_root is not None or not IS_WIN:
+        return
     code, out, _ = run_capture_ext(["schtasks", "/Query", "/V", "/FO", "CSV"])
     if code != 0 or not out:
         return
@@ -22,6 +22,7 @@ except ImportError:
     TK_AVAILABLE = False
 
 # === Importe ce dont l’UI a besoin dans le refactor ===
+from scanner.cancel import CancelToken
 from scanner.core import run_scan_core
 from scanner.utils import (
     IS_WIN, IS_MAC, IS_LIN, EXEC_TIMEOUT,
@@ -173,6 +174,7 @@ def launch_gui() -> None:
     follow_links_var = tk.BooleanVar(value=False)
     scan_npm_var = tk.BooleanVar(value=True)
     scripts_var = tk.BooleanVar(value=True)
+    content_var = tk.BooleanVar(value=False)
     only_risk_var = tk.BooleanVar(value=True)
     sys_upd_proj_var = tk.BooleanVar(value=True)
     sys_upd_global_var = tk.BooleanVar(value=False)
@@ -183,6 +185,7 @@ def launch_gui() -> None:
     hosts_var = tk.BooleanVar(value=False)
     net_listen_var = tk.BooleanVar(value=False)
     shell_profiles_var = tk.BooleanVar(value=True)
+    all_users_var = tk.BooleanVar(value=False)
 
     # Windows
     startup_var = tk.BooleanVar(value=IS_WIN)
@@ -202,6 +205,8 @@ def launch_gui() -> None:
     ld_preload_var = tk.BooleanVar(value=IS_LIN)
     suid_var = tk.BooleanVar(value=IS_LIN)
     path_ww_var = tk.BooleanVar(value=IS_LIN)
+    proc_hashes_var = tk.BooleanVar(value=False)
+    containers_var = tk.BooleanVar(value=False)
 
     save_csv_var = tk.BooleanVar(value=True)
     save_json_var = tk.BooleanVar(value=False)
@@ -255,6 +260,7 @@ def launch_gui() -> None:
     common_items: list[tuple[str, tk.BooleanVar, str]] = [
         ("Scan npm (packages)", scan_npm_var, "Analyse les dépendances installées (node_modules) et leurs versions."),
         ("Analyser scripts npm (install/postinstall…)", scripts_var, "Inspecte les scripts npm susceptibles de s'exécuter à l'installation."),
+        ("Signatures de contenu (JS)", content_var, "Cherche des chaînes malveillantes connues dans les .js/.cjs/.mjs (node_modules compris)."),
         ("Seulement paquets à risque", only_risk_var, "N'affiche que les paquets identifiés comme compromis."),
         ("IoC .sysupdater (projets)", sys_upd_proj_var, "Recherche un fichier .sysupdater.dat dans chaque projet."),
         ("IoC .sysupdater (global)", sys_upd_global_var, "Recherche .sysupdater.dat partout sous la racine (plus lent)."),
@@ -264,6 +270,7 @@ def launch_gui() -> None:
         ("Fichier hosts", hosts_var, "Vérifie les entrées potentiellement suspectes du fichier hosts."),
         ("Ports en écoute", net_listen_var, "Liste les sockets/ports ouverts et met en avant certains ports courants."),
         ("Profils shell", shell_profiles_var, "Parcourt ~/.bashrc, ~/.zshrc, etc. et détecte des commandes discutables."),
+        ("Tous les utilisateurs", all_users_var, "Profils, .npmrc, crontab et démarrage automatique de chaque compte (nécessite souvent les droits admin)."),
     ]
 
     win_items: list[tuple[str, tk.BooleanVar, str]] = []
@@ -272,7 +279,7 @@ def launch_gui() -> None:
 
     if IS_WIN:
         win_items = [
-            ("Startup (Windows)", startup_var, "Raccourcis/scripts placés dans les dossiers de démarrage."),
+            ("Startup (Windows)", startup_var, "Raccourcis/scripts des dossiers de démarrage et clés Run/RunOnce (machine et NTUSER.DAT)."),
             ("Services Auto (Windows)", services_var, "Services configurés en démarrage automatique."),
             ("Defender exclusions", defender_var, "Chemins exclus de Windows Defender."),
             ("Proxy (Windows)", proxy_var, "Paramètres proxy de l'utilisateur courant."),
@@ -280,17 +287,19 @@ def launch_gui() -> None:
         ]
     if IS_MAC:
         mac_items = [
-            ("LaunchDaemons/Agents (macOS)", launch_globals_var, "Liste les LaunchDaemons/Agents globaux."),
+            ("LaunchDaemons/Agents (macOS)", launch_globals_var, "Analyse les LaunchDaemons/Agents globaux (ProgramArguments, RunAtLoad, KeepAlive)."),
             ("Login Items (macOS)", login_items_var, "Éléments ouverts automatiquement à la connexion."),
             ("Profiles (macOS)", profiles_var, "Profils de configuration installés."),
         ]
     if IS_LIN:
         lin_items = [
-            ("Cron système (Linux)", cron_system_var, "Tâches cron système /etc/cron.*, /etc/cron.d, etc."),
+            ("Cron système (Linux)", cron_system_var, "Cron système, crontabs de tous les utilisateurs, anacron et timers systemd."),
             ("systemd (système)", systemd_system_var, "Unités systemd au niveau système."),
-            ("/etc/ld.so.preload", ld_preload_var, "Fichier LD_PRELOAD (libs injectées globalement)."),
+            ("/etc/ld.so.preload", ld_preload_var, "LD_PRELOAD global et par processus, bibliothèques injectées (supprimées, memfd, /tmp)."),
             ("SUID/SGID (Linux)", suid_var, "Binaires avec bit SUID/SGID."),
             ("PATH world-writable (Linux)", path_ww_var, "Répertoires du PATH modifiables par tous."),
+            ("Hash exécutables (process)", proc_hashes_var, "Avec « Mineurs » : hash des binaires en cours d'exécution (supprimés du disque, hash connus)."),
+            ("Conteneurs actifs", containers_var, "Applique les étapes fichiers à la racine de chaque conteneur en cours d'exécution (couches partagées analysées une fois)."),
         ]
 
     ttk.Label(box, text="Commun", font=("", 9, "bold")).grid(row=0, column=0, sticky=tk.W, padx=6, pady=(4, 2))
@@ -405,7 +414,7 @@ def launch_gui() -> None:
     dropped = {"count": 0}
     max_per_tick = 200
     running = {"flag": False}
-    cancel_event: Optional[threading.Event] = None
+    cancel_event: Optional[CancelToken] = None
 
     def pump_log(*_args: Any) -> None:
         import re
@@ -493,12 +502,14 @@ def launch_gui() -> None:
             no_npm=not scan_npm_var.get(),
             only_risk=only_risk_var.get(),
             no_scripts=not scripts_var.get(),
+            content=content_var.get(),
             sysupdater_project=sys_upd_proj_var.get(),
             sysupdater_global=sys_upd_global_var.get(),
             miners=miners_var.get(),
             persistence=persist_var.get(),
             csv=(csv_var.get().strip() if save_csv_var.get() else None),
             json=(json_var.get().strip() if save_json_var.get() else None),
+            sorted_output=True,
             delimiter=(deli_var.get().strip() or default_csv_delimiter()),
             max_depth=max_depth_var.get(),
             follow_links=follow_links_var.get(),
@@ -506,6 +517,7 @@ def launch_gui() -> None:
             hosts=hosts_var.get(),
             net_listen=net_listen_var.get(),
             shell_profiles=shell_profiles_var.get(),
+            all_users=all_users_var.get(),
             startup=startup_var.get(),
             services=services_var.get(),
             defender_exclusions=defender_var.get(),
@@ -519,6 +531,8 @@ def launch_gui() -> None:
             ld_preload=ld_preload_var.get(),
             suid=suid_var.get(),
             path_world_writable=path_ww_var.get(),
+            proc_hashes=proc_hashes_var.get(),
+            containers=containers_var.get(),
             exec_timeout=EXEC_TIMEOUT,
         )
 
@@ -530,7 +544,7 @@ def launch_gui() -> None:
                     subprocess.SubprocessError) as exc:
                 q.put(f"[!] Erreur: {exc!r}")
 
-        cancel_event = threading.Event()
+        cancel_event = CancelToken()
         _set_running(True)
         txt.delete("1.0", tk.END)
         # En-tête de log côté GUI
@@ -0,0 +1 @@
+# scanner/parsers/__init__.py
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Lecture hors-ligne des définitions launchd (LaunchAgents / LaunchDaemons), plist XML ou binaire.
+from __future__ import annotations
+
+import plistlib
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+from xml.parsers.expat import ExpatError
+
+# Un job launchd fait quelques Ko ; au-delà le fichier est ignoré
+PLIST_MAX_BYTES = 1 << 20
+
+
+class LaunchJob(NamedTuple):
+    label: str
+    path: str
+    program: str          # Program, sinon ProgramArguments[0]
+    arguments: List[str]  # ProgramArguments complet (ou [Program])
+    run_at_load: bool
+    keep_alive: bool      # KeepAlive vrai ou dictionnaire de conditions
+    user: str             # UserName (daemons), "" sinon
+    disabled: bool
+
+    @property
+    def command(self) -> str:
+        return " ".join(self.arguments) if self.arguments else self.program
+
+
+def parse_launchd_bytes(data: bytes, path: str = "") -> Optional[LaunchJob]:
+    """plistlib détecte seul le format (XML ou bplist00) ; None si illisible ou pas un dictionnaire."""
+    try:
+        doc = plistlib.loads(data)
+    except (plistlib.InvalidFileException, ExpatError, ValueError, TypeError, KeyError, IndexError, OverflowError):
+        return None
+    if not isinstance(doc, dict):
+        return None
+    args = doc.get("ProgramArguments")
+    args = [str(a) for a in args] if isinstance(args, list) else []
+    program = str(doc.get("Program") or (args[0] if args else ""))
+    keep_alive = doc.get("KeepAlive", False)
+    return LaunchJob(
+        label=str(doc.get("Label") or Path(path).stem),
+        path=path,
+        program=program,
+        arguments=args or ([program] if program else []),
+        run_at_load=doc.get("RunAtLoad") is True,
+        keep_alive=bool(keep_alive) if isinstance(keep_alive, (bool, dict)) else False,
+        user=str(doc.get("UserName") or ""),
+        disabled=doc.get("Disabled") is True,
+    )
+
+
+def parse_launchd_plist(path: Path) -> Optional[LaunchJob]:
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read(PLIST_MAX_BYTES + 1)
+    except OSError:
+        return None
+    if len(data) > PLIST_MAX_BYTES:
+        return None
+    return parse_launchd_bytes(data, str(path))
+
+
+def parse_launchd_many(paths: Iterable[Path], workers: int = 8) -> Dict[Path, Optional[LaunchJob]]:
+    """Parse un lot de plists (répertoire entier) en parallèle."""
+    items = list(paths)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(items, pool.map(parse_launchd_plist, items)))
+
+
+__all__ = ["LaunchJob", "parse_launchd_bytes", "parse_launchd_plist", "parse_launchd_many"]
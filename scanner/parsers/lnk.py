@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Parseur Shell Link (.lnk, MS-SHLLINK) en pur Python : aucune dépendance à Windows/COM.
+from __future__ import annotations
+
+import ntpath, os, struct
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional
+
+LNK_HEADER_SIZE = 0x4C
+LNK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+# LinkFlags
+HAS_TARGET_ID_LIST = 0x01
+HAS_LINK_INFO = 0x02
+HAS_NAME = 0x04
+HAS_RELATIVE_PATH = 0x08
+HAS_WORKING_DIR = 0x10
+HAS_ARGUMENTS = 0x20
+HAS_ICON_LOCATION = 0x40
+IS_UNICODE = 0x80
+
+# LinkInfoFlags
+VOLUME_ID_AND_LOCAL_BASE_PATH = 0x01
+COMMON_NETWORK_RELATIVE_LINK = 0x02
+
+# ExtraData
+ENVIRONMENT_VARIABLE_BLOCK = 0xA0000001
+
+# Page de code des chaînes non Unicode (page ANSI du système sous Windows)
+try:
+    "".encode("mbcs")
+    _ANSI = "mbcs"
+except LookupError:
+    _ANSI = "cp1252"
+
+# Taille max lue (un .lnk fait quelques Ko ; au-delà ce n'est pas un raccourci légitime)
+LNK_MAX_BYTES = 1 << 20
+
+
+class ShellLink(NamedTuple):
+    target: str
+    arguments: str
+    working_dir: str
+    relative_path: str
+    icon_location: str
+    name: str
+
+
+def _cstr(data: bytes, off: int, unicode: bool = False) -> str:
+    """Chaîne terminée par NUL (ANSI ou UTF-16LE) à l'offset donné."""
+    if off <= 0 or off >= len(data):
+        return ""
+    if unicode:
+        end = off
+        while end + 1 < len(data) and data[end:end + 2] != b"\0\0":
+            end += 2
+        return data[off:end].decode("utf-16-le", errors="replace")
+    end = data.find(b"\0", off)
+    return data[off:end if end >= 0 else len(data)].decode(_ANSI, errors="replace")
+
+
+def _parse_link_info(block: bytes) -> str:
+    """Chemin cible depuis la structure LinkInfo (chemin local ou partage réseau + suffixe)."""
+    if len(block) < 0x1C:
+        return ""
+    header_size, flags, _vol, local_off, net_off, suffix_off = struct.unpack_from("<6I", block, 4)
+    local_off_u = suffix_off_u = 0
+    if header_size >= 0x24 and len(block) >= 0x24:
+        local_off_u, suffix_off_u = struct.unpack_from("<2I", block, 0x1C)
+
+    suffix = _cstr(block, suffix_off_u, True) if suffix_off_u else _cstr(block, suffix_off)
+    if flags & VOLUME_ID_AND_LOCAL_BASE_PATH:
+        base = _cstr(block, local_off_u, True) if local_off_u else _cstr(block, local_off)
+        if base:
+            return base + suffix
+    if flags & COMMON_NETWORK_RELATIVE_LINK and 0 < net_off < len(block) - 0x14:
+        _size, _nflags, name_off = struct.unpack_from("<3I", block, net_off)
+        name = ""
+        if name_off > 0x14 and net_off + 0x1C <= len(block):
+            name_off_u = struct.unpack_from("<I", block, net_off + 0x14)[0]
+            name = _cstr(block, net_off + name_off_u, True)
+        if not name:
+            name = _cstr(block, net_off + name_off)
+        if name:
+            return ntpath.join(name, suffix) if suffix else name
+    return ""
+
+
+def parse_lnk_bytes(data: bytes) -> Optional[ShellLink]:
+    """Parse le contenu d'un .lnk ; None si ce n'est pas un Shell Link valide."""
+    if len(data) < LNK_HEADER_SIZE or struct.unpack_from("<I", data, 0)[0] != LNK_HEADER_SIZE \
+            or data[4:20] != LNK_CLSID:
+        return None
+    flags = struct.unpack_from("<I", data, 0x14)[0]
+    pos = LNK_HEADER_SIZE
+    try:
+        if flags & HAS_TARGET_ID_LIST:
+            pos += 2 + struct.unpack_from("<H", data, pos)[0]
+
+        target = ""
+        if flags & HAS_LINK_INFO:
+            size = struct.unpack_from("<I", data, pos)[0]
+            target = _parse_link_info(data[pos:pos + size])
+            pos += size
+
+        strings: Dict[int, str] = {}
+        unicode = bool(flags & IS_UNICODE)
+        for flag in (HAS_NAME, HAS_RELATIVE_PATH, HAS_WORKING_DIR, HAS_ARGUMENTS, HAS_ICON_LOCATION):
+            if not flags & flag:
+                continue
+            count = struct.unpack_from("<H", data, pos)[0]
+            pos += 2
+            nbytes = count * 2 if unicode else count
+            raw = data[pos:pos + nbytes]
+            strings[flag] = raw.decode("utf-16-le" if unicode else _ANSI, errors="replace")
+            pos += nbytes
+
+        # ExtraData : bloc des variables d'environnement (cible du type %windir%\…)
+        env_target = ""
+        while pos + 8 <= len(data):
+            block_size, sig = struct.unpack_from("<2I", data, pos)
+            if block_size < 8:
+                break
+            if sig == ENVIRONMENT_VARIABLE_BLOCK and block_size >= 0x314:
+                env_target = _cstr(data, pos + 0x10C, True) or _cstr(data, pos + 8)
+            pos += block_size
+    except struct.error:
+        return None
+
+    return ShellLink(
+        target=target or env_target,
+        arguments=strings.get(HAS_ARGUMENTS, ""),
+        working_dir=strings.get(HAS_WORKING_DIR, ""),
+        relative_path=strings.get(HAS_RELATIVE_PATH, ""),
+        icon_location=strings.get(HAS_ICON_LOCATION, ""),
+        name=strings.get(HAS_NAME, ""),
+    )
+
+
+def parse_lnk(path: Path) -> Optional[ShellLink]:
+    try:
+        with open(path, "rb") as fh:
+            return parse_lnk_bytes(fh.read(LNK_MAX_BYTES))
+    except OSError:
+        return None
+
+
+def resolved_target(link: ShellLink, lnk_path: Path) -> str:
+    """Cible absolue : LinkInfo/variables d'environnement, sinon chemin relatif résolu depuis le .lnk."""
+    if link.target:
+        return link.target
+    if link.relative_path:
+        return os.path.normpath(os.path.join(str(lnk_path.parent), link.relative_path.replace("\\", os.sep)))
+    return ""
+
+
+def parse_lnk_many(paths: Iterable[Path], workers: int = 8) -> Dict[Path, Optional[ShellLink]]:
+    """Parse un lot de raccourcis (dossier entier) en parallèle."""
+    items = list(paths)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return dict(zip(items, pool.map(parse_lnk, items)))
+
+
+__all__ = ["ShellLink", "parse_lnk_bytes", "parse_lnk", "parse_lnk_many", "resolved_target"]
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# Lecture hors-ligne des ruches du registre Windows (format regf : SYSTEM, SOFTWARE, NTUSER.DAT…).
+# Fichier projeté en mémoire (mmap), arborescence parcourue paresseusement ; aucune dépendance à winreg.
+from __future__ import annotations
+
+import mmap, struct
+
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Union
+
+REGF_SIGNATURE = b"regf"
+HBIN_START = 0x1000            # les offsets de cellules sont relatifs au premier hbin
+NO_CELL = 0xFFFFFFFF
+BIG_DATA_SEGMENT = 16344       # taille max d'un segment "db" (ruches 1.4+)
+
+REG_NONE, REG_SZ, REG_EXPAND_SZ, REG_BINARY, REG_DWORD, REG_DWORD_BIG_ENDIAN = 0, 1, 2, 3, 4, 5
+REG_LINK, REG_MULTI_SZ, REG_QWORD = 6, 7, 11
+
+_KEY_COMP_NAME = 0x0020
+_VALUE_COMP_NAME = 0x0001
+
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_I32 = struct.Struct("<i")
+
+
+class RegfError(ValueError):
+    """Ruche absente, tronquée ou qui n'est pas au format regf."""
+
+
+class RegValue(NamedTuple):
+    name: str       # "" pour la valeur par défaut
+    type: int
+    data: Union[str, int, List[str], bytes, None]
+
+
+def _decode_name(raw: bytes, compressed: bool) -> str:
+    return raw.decode("latin-1") if compressed else raw.decode("utf-16-le", errors="replace")
+
+
+def _decode_sz(raw: bytes) -> str:
+    if len(raw) % 2:
+        raw = raw[:-1]
+    return raw.decode("utf-16-le", errors="replace").split("\0", 1)[0]
+
+
+def decode_value(vtype: int, raw: bytes) -> Union[str, int, List[str], bytes, None]:
+    """Données brutes d'une valeur → type Python (str, int, liste de str ou bytes)."""
+    if vtype in (REG_SZ, REG_EXPAND_SZ, REG_LINK):
+        return _decode_sz(raw)
+    if vtype == REG_MULTI_SZ:
+        if len(raw) % 2:
+            raw = raw[:-1]
+        return [s for s in raw.decode("utf-16-le", errors="replace").split("\0") if s]
+    if vtype == REG_DWORD and len(raw) >= 4:
+        return _U32.unpack_from(raw)[0]
+    if vtype == REG_DWORD_BIG_ENDIAN and len(raw) >= 4:
+        return struct.unpack_from(">I", raw)[0]
+    if vtype == REG_QWORD and len(raw) >= 8:
+        return struct.unpack_from("<Q", raw)[0]
+    return bytes(raw)
+
+
+class RegistryHive:
+    """
+    Ruche regf projetée en lecture seule. Les clés sont lues à la demande : ouvrir
+    'Software\\Microsoft\\…' ne décode que les listes de sous-clés traversées.
+    Les journaux de transaction (.LOG1/.LOG2) ne sont pas rejoués : une ruche "sale"
+    est lue dans son état sur disque.
+    """
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        self.path = Path(path)
+        self._fh = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            self._fh.close()
+            raise RegfError(f"{self.path}: {e}") from e
+        if len(self._mm) < HBIN_START + 0x20 or self._mm[:4] != REGF_SIGNATURE:
+            self.close()
+            raise RegfError(f"{self.path}: signature regf absente")
+        self.minor_version = _U32.unpack_from(self._mm, 0x18)[0]
+        self._root_offset = _U32.unpack_from(self._mm, 0x24)[0]
+
+    # -- cycle de vie --------------------------------------------------------
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except (AttributeError, ValueError):
+            pass
+        self._fh.close()
+
+    def __enter__(self) -> "RegistryHive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -- accès bas niveau ----------------------------------------------------
+    def _cell(self, offset: int) -> memoryview:
+        """Contenu d'une cellule (sans l'en-tête de taille) ; RegfError si hors bornes."""
+        pos = HBIN_START + offset
+        if offset == NO_CELL or pos + 4 > len(self._mm):
+            raise RegfError(f"cellule hors ruche: {offset:#x}")
+        size = abs(_I32.unpack_from(self._mm, pos)[0])
+        end = min(pos + size, len(self._mm))
+        return memoryview(self._mm)[pos + 4:end]
+
+    def _key(self, offset: int) -> "RegKey":
+        cell = self._cell(offset)
+        if bytes(cell[:2]) != b"nk" or len(cell) < 76:
+            raise RegfError(f"clé invalide: {offset:#x}")
+        return RegKey(self, offset, cell)
+
+    def _list_offsets(self, offset: int, depth: int = 0) -> Iterator[int]:
+        """Offsets des clés d'une liste de sous-clés (lf/lh/li, ri = liste de listes)."""
+        if offset == NO_CELL or depth > 8:
+            return
+        cell = self._cell(offset)
+        sig = bytes(cell[:2])
+        count = _U16.unpack_from(cell, 2)[0]
+        if sig in (b"lf", b"lh"):
+            for i in range(min(count, (len(cell) - 4) // 8)):
+                yield _U32.unpack_from(cell, 4 + i * 8)[0]
+        elif sig in (b"li", b"ri"):
+            for i in range(min(count, (len(cell) - 4) // 4)):
+                sub = _U32.unpack_from(cell, 4 + i * 4)[0]
+                if sig == b"li":
+                    yield sub
+                else:
+                    yield from self._list_offsets(sub, depth + 1)
+
+    def _value_data(self, length: int, offset: int) -> bytes:
+        if length & 0x80000000:  # données (<= 4 octets) stockées dans le champ offset lui-même
+            return _U32.pack(offset)[: length & 0x7FFFFFFF]
+        if length == 0 or offset == NO_CELL:
+            return b""
+        cell = self._cell(offset)
+        if length > BIG_DATA_SEGMENT and self.minor_version >= 4 and bytes(cell[:2]) == b"db":
+            count = _U16.unpack_from(cell, 2)[0]
+            segments = self._cell(_U32.unpack_from(cell, 4)[0])
+            out = bytearray()
+            for i in range(min(count, len(segments) // 4)):
+                seg = self._cell(_U32.unpack_from(segments, i * 4)[0])
+                # BIG_DATA_SEGMENT octets utiles par segment : la cellule (alignée sur 8) en contient 4 de plus
+                out += seg[: min(len(seg), BIG_DATA_SEGMENT, length - len(out))]
+                if len(out) >= length:
+                    break
+            return bytes(out)
+        return bytes(cell[:length])
+
+    # -- API ----------------------------------------------------------------
+    @property
+    def root(self) -> "RegKey":
+        return self._key(self._root_offset)
+
+    def open_key(self, path: str) -> Optional["RegKey"]:
+        """Clé par chemin relatif à la racine ('Software\\Microsoft\\…', insensible à la casse) ; None si absente."""
+        try:
+            key = self.root
+            for part in (p for p in path.replace("/", "\\").split("\\") if p):
+                sub = key.subkey(part)
+                if sub is None:
+                    return None
+                key = sub
+            return key
+        except (RegfError, struct.error):
+            return None
+
+
+class RegKey:
+    __slots__ = ("_hive", "offset", "name", "_flags", "_n_subkeys", "_subkeys_off", "_n_values", "_values_off")
+
+    def __init__(self, hive: RegistryHive, offset: int, cell: memoryview) -> None:
+        self._hive = hive
+        self.offset = offset
+        self._flags = _U16.unpack_from(cell, 2)[0]
+        self._n_subkeys = _U32.unpack_from(cell, 20)[0]
+        self._subkeys_off = _U32.unpack_from(cell, 28)[0]
+        self._n_values = _U32.unpack_from(cell, 36)[0]
+        self._values_off = _U32.unpack_from(cell, 40)[0]
+        name_len = _U16.unpack_from(cell, 72)[0]
+        self.name = _decode_name(bytes(cell[76:76 + name_len]), bool(self._flags & _KEY_COMP_NAME))
+
+    def __repr__(self) -> str:
+        return f"RegKey({self.name!r})"
+
+    def subkeys(self) -> Iterator["RegKey"]:
+        if not self._n_subkeys:
+            return
+        for off in self._hive._list_offsets(self._subkeys_off):
+            try:
+                yield self._hive._key(off)
+            except (RegfError, struct.error):
+                continue
+
+    def subkey(self, name: str) -> Optional["RegKey"]:
+        want = name.lower()
+        for sub in self.subkeys():
+            if sub.name.lower() == want:
+                return sub
+        return None
+
+    def values(self) -> Iterator[RegValue]:
+        if not self._n_values or self._values_off == NO_CELL:
+            return
+        hive = self._hive
+        try:
+            table = hive._cell(self._values_off)
+        except RegfError:
+            return
+        for i in range(min(self._n_values, len(table) // 4)):
+            try:
+                vk = hive._cell(_U32.unpack_from(table, i * 4)[0])
+                if bytes(vk[:2]) != b"vk":
+                    continue
+                name_len, length, data_off, vtype = struct.unpack_from("<HIII", vk, 2)
+                flags = _U16.unpack_from(vk, 16)[0]
+                name = _decode_name(bytes(vk[20:20 + name_len]), bool(flags & _VALUE_COMP_NAME))
+                yield RegValue(name, vtype, decode_value(vtype, hive._value_data(length, data_off)))
+            except (RegfError, struct.error):
+                continue
+
+    def value(self, name: str, default=None):
+        """Données d'une valeur ('' = valeur par défaut), insensible à la casse."""
+        want = name.lower()
+        for v in self.values():
+            if v.name.lower() == want:
+                return v.data
+        return default
+
+
+def open_hive(path: Union[str, Path]) -> Optional[RegistryHive]:
+    """Ouvre une ruche ; None si absente, verrouillée (ruche chargée sur un système vivant) ou invalide."""
+    try:
+        return RegistryHive(path)
+    except (OSError, RegfError):
+        return None
+
+
+__all__ = [
+    "RegfError", "RegValue", "RegistryHive", "RegKey", "open_hive", "decode_value",
+    "REG_SZ", "REG_EXPAND_SZ", "REG_BINARY", "REG_DWORD", "REG_MULTI_SZ", "REG_QWORD",
+]
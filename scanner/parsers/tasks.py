@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Lecture hors-ligne des tâches planifiées Windows (fichiers XML de System32\Tasks).
+from __future__ import annotations
+
+import os, threading
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional
+from xml.etree import ElementTree as ET
+
+TASK_NS = "{http://schemas.microsoft.com/windows/2004/02/mit/task}"
+
+# Une définition de tâche fait quelques Ko ; au-delà le fichier est ignoré
+TASK_MAX_BYTES = 1 << 20
+
+
+class TaskAction(NamedTuple):
+    kind: str          # "Exec" ou "ComHandler"
+    command: str       # Command (Exec) ou ClassId (ComHandler)
+    arguments: str
+    working_dir: str
+
+
+class ScheduledTask(NamedTuple):
+    name: str          # URI (\Dossier\Nom) ou chemin relatif du fichier
+    path: str
+    author: str
+    user: str
+    enabled: bool
+    hidden: bool
+    triggers: List[str]
+    actions: List[TaskAction]
+
+
+def _local(tag: str) -> str:
+    return tag.split("}", 1)[-1]
+
+
+def _text(node: Optional[ET.Element], path: str) -> str:
+    if node is None:
+        return ""
+    found = node.find(path.replace("t:", TASK_NS))
+    return (found.text or "").strip() if found is not None and found.text else ""
+
+
+def parse_task_xml(data: bytes, name: str = "", path: str = "") -> Optional[ScheduledTask]:
+    """Parse le XML d'une tâche (UTF-16 avec BOM le plus souvent) ; None si illisible."""
+    try:
+        root = ET.fromstring(data)
+    except ET.ParseError:
+        # encodage déclaré incohérent avec le contenu : on décode nous-mêmes
+        text = data.decode("utf-16", errors="ignore") if data[:2] in (b"\xff\xfe", b"\xfe\xff") \
+            else data.decode("utf-8", errors="ignore")
+        try:
+            root = ET.fromstring(text)
+        except ET.ParseError:
+            return None
+    if _local(root.tag) != "Task":
+        return None
+
+    triggers: List[str] = []
+    trig_root = root.find(f"{TASK_NS}Triggers")
+    for trig in list(trig_root) if trig_root is not None else []:
+        start = _text(trig, "t:StartBoundary")
+        if _text(trig, "t:Enabled").lower() == "false":
+            continue
+        triggers.append(_local(trig.tag) + (f"@{start}" if start else ""))
+
+    actions: List[TaskAction] = []
+    act_root = root.find(f"{TASK_NS}Actions")
+    for act in list(act_root) if act_root is not None else []:
+        kind = _local(act.tag)
+        if kind == "Exec":
+            actions.append(TaskAction(kind, _text(act, "t:Command"), _text(act, "t:Arguments"),
+                                      _text(act, "t:WorkingDirectory")))
+        elif kind == "ComHandler":
+            actions.append(TaskAction(kind, _text(act, "t:ClassId"), _text(act, "t:Data"), ""))
+
+    settings = root.find(f"{TASK_NS}Settings")
+    principal = root.find(f"{TASK_NS}Principals/{TASK_NS}Principal")
+    return ScheduledTask(
+        name=_text(root, "t:RegistrationInfo/t:URI") or name,
+        path=path,
+        author=_text(root, "t:RegistrationInfo/t:Author"),
+        user=_text(principal, "t:UserId") or _text(principal, "t:GroupId"),
+        enabled=_text(settings, "t:Enabled").lower() != "false",
+        hidden=_text(settings, "t:Hidden").lower() == "true",
+        triggers=triggers,
+        actions=actions,
+    )
+
+
+def parse_task_file(path: Path, tasks_root: Path,
+                    denied: Optional[List[Path]] = None) -> Optional[ScheduledTask]:
+    """None si illisible ; denied : reçoit le fichier si la lecture est refusée (droits)."""
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read(TASK_MAX_BYTES + 1)
+    except PermissionError:
+        if denied is not None:
+            denied.append(path)
+        return None
+    except OSError:
+        return None
+    if len(data) > TASK_MAX_BYTES:
+        return None
+    try:
+        rel = "\\" + str(path.relative_to(tasks_root)).replace(os.sep, "\\")
+    except ValueError:
+        rel = str(path)
+    return parse_task_xml(data, rel, str(path))
+
+
+def iter_task_files(tasks_root: Path, cancel: Optional[threading.Event] = None,
+                    denied: Optional[List[Path]] = None) -> Iterator[Path]:
+    """
+    Fichiers de définition sous System32\\Tasks (récursif, sans extension imposée).
+    denied : reçoit les dossiers dont la lecture est refusée (droits).
+    """
+    stack = [tasks_root]
+    while stack and not (cancel is not None and cancel.is_set()):
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(Path(entry.path))
+                    elif entry.is_file(follow_symlinks=False):
+                        yield Path(entry.path)
+        except PermissionError:
+            if denied is not None:
+                denied.append(current)
+        except OSError:
+            continue
+
+
+def parse_tasks_dir(tasks_root: Path, workers: int = 8, cancel: Optional[threading.Event] = None,
+                    denied: Optional[List[Path]] = None) -> List[ScheduledTask]:
+    """
+    Parse en parallèle toutes les tâches d'une arborescence System32\\Tasks (live ou image montée).
+    Arrêt demandé : les fichiers restants ne sont plus lus. denied : reçoit les dossiers et
+    fichiers dont la lecture est refusée (liste alors partielle).
+    """
+    files = sorted(iter_task_files(tasks_root, cancel, denied))
+
+    def parse(p: Path) -> Optional[ScheduledTask]:
+        if cancel is not None and cancel.is_set():
+            return None
+        return parse_task_file(p, tasks_root, denied)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return [t for t in pool.map(parse, files) if t is not None]
+
+
+__all__ = ["TaskAction", "ScheduledTask", "parse_task_xml", "parse_task_file", "iter_task_files", "parse_tasks_dir"]
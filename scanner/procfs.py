@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+# Lecture directe de /proc (Linux), sans fork/exec d'outils externes.
+# Toutes les fonctions acceptent une racine 'proc_root' (arborescence /proc reconstituée possible).
+from __future__ import annotations
+
+import ipaddress, os, re, sys
+
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+PROC_ROOT = "/proc"
+
+
+class ProcInfo(NamedTuple):
+    pid: int
+    ppid: int
+    uid: Optional[int]
+    user: Optional[str]
+    comm: str
+    cmdline: List[str]
+    exe: str
+    exe_deleted: bool
+    start_time: Optional[float]
+
+    @property
+    def name(self) -> str:
+        """Nom 'humain' : argv[0] si disponible, sinon comm (threads noyau, zombies…)."""
+        return self.cmdline[0] if self.cmdline else self.comm
+
+    @property
+    def args(self) -> str:
+        return " ".join(self.cmdline)
+
+
+def _read_bytes(path: str, limit: int = 1 << 16) -> bytes:
+    with open(path, "rb") as fh:
+        return fh.read(limit)
+
+
+def _read_text(path: str, limit: int = 1 << 16) -> str:
+    return _read_bytes(path, limit).decode("utf-8", errors="replace")
+
+
+def iter_pids(proc_root: str = PROC_ROOT) -> Iterator[int]:
+    try:
+        with os.scandir(proc_root) as it:
+            for entry in it:
+                if entry.name.isdigit():
+                    yield int(entry.name)
+    except OSError:
+        return
+
+
+def boot_time(proc_root: str = PROC_ROOT) -> Optional[float]:
+    """'btime' de /proc/stat (epoch du démarrage), None si indisponible."""
+    try:
+        for line in _read_text(os.path.join(proc_root, "stat")).splitlines():
+            if line.startswith("btime "):
+                return float(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def parse_status(text: str) -> Dict[str, str]:
+    """/proc/<pid>/status → {clé: valeur brute}."""
+    out: Dict[str, str] = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep:
+            out[key.strip()] = value.strip()
+    return out
+
+
+def parse_stat_starttime(text: str) -> Optional[int]:
+    """Champ 22 (starttime, en ticks depuis le boot) de /proc/<pid>/stat ; comm peut contenir ')' ou des espaces."""
+    try:
+        fields = text[text.rindex(")") + 2:].split()
+        return int(fields[19])
+    except (ValueError, IndexError):
+        return None
+
+
+def read_exe_link(pid_dir: str) -> tuple[str, bool]:
+    """Cible de /proc/<pid>/exe et drapeau 'supprimé du disque'. ('', False) si illisible."""
+    try:
+        exe = os.readlink(os.path.join(pid_dir, "exe"))
+    except OSError:
+        return "", False
+    if exe.endswith(" (deleted)"):
+        return exe[: -len(" (deleted)")], True
+    return exe, False
+
+
+_USER_CACHE: Dict[int, Optional[str]] = {}
+
+
+def user_of(uid: Optional[int]) -> Optional[str]:
+    if uid is None:
+        return None
+    if uid not in _USER_CACHE:
+        try:
+            import pwd
+            _USER_CACHE[uid] = pwd.getpwuid(uid).pw_name
+        except (ImportError, KeyError):
+            _USER_CACHE[uid] = str(uid)
+    return _USER_CACHE[uid]
+
+
+def read_proc(pid: int, proc_root: str = PROC_ROOT, *, btime: Optional[float] = None,
+              clk_tck: Optional[int] = None) -> Optional[ProcInfo]:
+    """Lit un processus ; None s'il a disparu entre-temps."""
+    pid_dir = os.path.join(proc_root, str(pid))
+    try:
+        status = parse_status(_read_text(os.path.join(pid_dir, "status")))
+    except OSError:
+        return None
+
+    try:
+        raw = _read_bytes(os.path.join(pid_dir, "cmdline"), 1 << 17)
+        cmdline = [a.decode("utf-8", errors="replace") for a in raw.split(b"\0") if a]
+    except OSError:
+        cmdline = []
+
+    try:
+        comm = _read_text(os.path.join(pid_dir, "comm")).strip()
+    except OSError:
+        comm = status.get("Name", "")
+
+    try:
+        ppid = int(status.get("PPid", "0") or 0)
+    except ValueError:
+        ppid = 0
+    try:
+        uid: Optional[int] = int(status.get("Uid", "").split()[0])
+    except (ValueError, IndexError):
+        uid = None
+
+    start_time: Optional[float] = None
+    if btime is not None and clk_tck:
+        try:
+            ticks = parse_stat_starttime(_read_text(os.path.join(pid_dir, "stat")))
+            if ticks is not None:
+                start_time = btime + ticks / clk_tck
+        except OSError:
+            pass
+
+    exe, deleted = read_exe_link(pid_dir)
+    return ProcInfo(pid, ppid, uid, user_of(uid), comm, cmdline, exe, deleted, start_time)
+
+
+def iter_procs(proc_root: str = PROC_ROOT) -> Iterator[ProcInfo]:
+    """Énumère les processus via /proc (cmdline NUL, comm, status, lien exe, heure de démarrage)."""
+    btime = boot_time(proc_root)
+    try:
+        clk_tck = os.sysconf("SC_CLK_TCK")
+    except (AttributeError, ValueError, OSError):
+        clk_tck = 100
+    for pid in iter_pids(proc_root):
+        info = read_proc(pid, proc_root, btime=btime, clk_tck=clk_tck)
+        if info is not None:
+            yield info
+
+
+# ---------------------------------------------------------------------------
+# Environnement et projections mémoire (/proc/<pid>/environ, /proc/<pid>/maps)
+# ---------------------------------------------------------------------------
+
+ENVIRON_READ_LIMIT = 1 << 18
+MAPS_READ_LIMIT = 1 << 22
+
+
+class MapInfo(NamedTuple):
+    path: str
+    inode: int
+    perms: str
+    deleted: bool
+    span: str = ""    # plage d'adresses 'début-fin' (nom de l'entrée dans /proc/<pid>/map_files)
+
+
+def read_environ(pid: int, proc_root: str = PROC_ROOT, limit: int = ENVIRON_READ_LIMIT) -> Dict[str, str]:
+    """Environnement d'un processus (une lecture bornée) ; {} si illisible."""
+    try:
+        raw = _read_bytes(os.path.join(proc_root, str(pid), "environ"), limit)
+    except OSError:
+        return {}
+    env: Dict[str, str] = {}
+    for item in raw.split(b"\0"):
+        key, sep, value = item.partition(b"=")
+        if sep and key:
+            env[key.decode("utf-8", errors="replace")] = value.decode("utf-8", errors="replace")
+    return env
+
+
+def parse_maps(text: str) -> Iterator[MapInfo]:
+    """Projections adossées à un fichier de /proc/<pid>/maps (les [heap], [stack], anonymes… sont ignorées)."""
+    for line in text.splitlines():
+        fields = line.split(None, 5)
+        if len(fields) < 6:
+            continue
+        path = fields[5].strip()
+        if not path.startswith("/"):
+            continue
+        deleted = path.endswith(" (deleted)")
+        if deleted:
+            path = path[: -len(" (deleted)")]
+        try:
+            inode = int(fields[4])
+        except ValueError:
+            continue
+        yield MapInfo(path, inode, fields[1], deleted, fields[0])
+
+
+def read_maps(pid: int, proc_root: str = PROC_ROOT, limit: int = MAPS_READ_LIMIT) -> List[MapInfo]:
+    try:
+        return list(parse_maps(_read_text(os.path.join(proc_root, str(pid), "maps"), limit)))
+    except OSError:
+        return []
+
+
+# ---------------------------------------------------------------------------
+# Tables de sockets (/proc/net/{tcp,tcp6,udp,udp6})
+# ---------------------------------------------------------------------------
+
+TCP_LISTEN = "0A"
+UDP_UNCONN = "07"
+
+
+class SocketInfo(NamedTuple):
+    proto: str
+    addr: str
+    port: int
+    state: str
+    inode: int
+    uid: Optional[int]
+
+
+class ListenInfo(NamedTuple):
+    proto: str
+    addr: str
+    port: int
+    pid: Optional[int]
+    exe: str
+
+
+def decode_hex_addr(value: str) -> tuple[str, int]:
+    """'0100007F:1F90' → ('127.0.0.1', 8080) ; gère IPv4 et IPv6 (mots de 32 bits en ordre hôte)."""
+    host_hex, _, port_hex = value.partition(":")
+    # le noyau imprime chaque mot de 32 bits de l'adresse tel qu'il est lu en mémoire (ordre hôte)
+    packed = b"".join(int(host_hex[i:i + 8], 16).to_bytes(4, sys.byteorder) for i in range(0, len(host_hex), 8))
+    addr = str(ipaddress.ip_address(packed))
+    return addr, int(port_hex, 16)
+
+
+def parse_net_table(text: str, proto: str) -> Iterator[SocketInfo]:
+    """Parse le contenu d'une table /proc/net/<proto> (la 1re ligne est l'en-tête)."""
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        if len(fields) < 10:
+            continue
+        try:
+            addr, port = decode_hex_addr(fields[1])
+            uid: Optional[int] = int(fields[7])
+            inode = int(fields[9])
+        except (ValueError, OSError):
+            continue
+        yield SocketInfo(proto, addr, port, fields[3].upper(), inode, uid)
+
+
+def read_net_sockets(proc_root: str = PROC_ROOT,
+                     protos: tuple[str, ...] = ("tcp", "tcp6", "udp", "udp6")) -> Iterator[SocketInfo]:
+    for proto in protos:
+        try:
+            text = _read_text(os.path.join(proc_root, "net", proto), 1 << 24)
+        except OSError:
+            continue
+        yield from parse_net_table(text, proto)
+
+
+def socket_inode_pids(proc_root: str = PROC_ROOT) -> Dict[int, int]:
+    """Un seul balayage de /proc/*/fd : {inode de socket: pid}."""
+    mapping: Dict[int, int] = {}
+    for pid in iter_pids(proc_root):
+        fd_dir = os.path.join(proc_root, str(pid), "fd")
+        try:
+            with os.scandir(fd_dir) as it:
+                for entry in it:
+                    try:
+                        target = os.readlink(entry.path)
+                    except OSError:
+                        continue
+                    if target.startswith("socket:["):
+                        try:
+                            mapping.setdefault(int(target[8:-1]), pid)
+                        except ValueError:
+                            continue
+        except OSError:
+            continue
+    return mapping
+
+
+def list_listening_sockets(proc_root: str = PROC_ROOT) -> List[ListenInfo]:
+    """Sockets TCP en écoute et UDP non connectés, avec PID et binaire propriétaires."""
+    listening = [
+        s for s in read_net_sockets(proc_root)
+        if (s.proto.startswith("tcp") and s.state == TCP_LISTEN)
+        or (s.proto.startswith("udp") and s.state == UDP_UNCONN)
+    ]
+    if not listening:
+        return []
+    owners = socket_inode_pids(proc_root)
+    exes: Dict[int, str] = {}
+    out: List[ListenInfo] = []
+    for s in listening:
+        pid = owners.get(s.inode)
+        exe = ""
+        if pid is not None:
+            if pid not in exes:
+                exes[pid] = read_exe_link(os.path.join(proc_root, str(pid)))[0]
+            exe = exes[pid]
+        out.append(ListenInfo(s.proto, s.addr, s.port, pid, exe))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Conteneurs : cgroups, espaces de noms de montage, montage racine (/proc/<pid>/{cgroup,ns/mnt,mountinfo})
+# ---------------------------------------------------------------------------
+
+# docker-<id>.scope, /docker/<id>, cri-containerd-<id>.scope, crio-<id>, libpod-<id>, /kubepods/…/<id>
+_CONTAINER_ID_RX = re.compile(r"(?:docker|containerd|crio|libpod|podman|kubepods|lxc|garden)\S*?[/-]([0-9a-f]{64})(?:\.scope)?\b")
+
+
+class MountInfo(NamedTuple):
+    mount_point: str
+    fstype: str
+    source: str
+    super_options: Dict[str, str]
+
+    @property
+    def lowerdirs(self) -> List[str]:
+        """Couches inférieures d'un montage overlay (les ':' échappés '\\:' font partie du chemin)."""
+        raw = self.super_options.get("lowerdir", "")
+        return [p.replace("\\:", ":") for p in re.split(r"(?<!\\):", raw) if p]
+
+
+def read_cgroup(pid: int, proc_root: str = PROC_ROOT) -> List[str]:
+    """Chemins de cgroup d'un processus (v1 et v2) ; [] si illisible."""
+    try:
+        text = _read_text(os.path.join(proc_root, str(pid), "cgroup"))
+    except OSError:
+        return []
+    return [line.split(":", 2)[2] for line in text.splitlines() if line.count(":") >= 2]
+
+
+def container_id_of(cgroups: List[str]) -> Optional[str]:
+    """Identifiant (64 hex) du conteneur d'après les chemins de cgroup, None pour un processus de l'hôte."""
+    for path in cgroups:
+        m = _CONTAINER_ID_RX.search(path)
+        if m:
+            return m.group(1)
+    return None
+
+
+def mnt_namespace(pid: int, proc_root: str = PROC_ROOT) -> Optional[str]:
+    """'mnt:[4026531840]' ; None si le lien est illisible (processus disparu, droits insuffisants)."""
+    try:
+        return os.readlink(os.path.join(proc_root, str(pid), "ns", "mnt"))
+    except OSError:
+        return None
+
+
+def _unescape_mount(value: str) -> str:
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), value)
+
+
+def parse_mountinfo(text: str) -> Iterator[MountInfo]:
+    """Lignes de /proc/<pid>/mountinfo : '… <point de montage> <options> [tags] - <fstype> <source> <super-options>'."""
+    for line in text.splitlines():
+        head, sep, tail = line.partition(" - ")
+        fields, tail_fields = head.split(), tail.split(" ", 2)
+        if not sep or len(fields) < 5 or len(tail_fields) < 3:
+            continue
+        opts: Dict[str, str] = {}
+        for opt in re.split(r"(?<!\\),", tail_fields[2].strip()):
+            key, _, value = opt.partition("=")
+            opts[key] = _unescape_mount(value)
+        yield MountInfo(_unescape_mount(fields[4]), tail_fields[0], _unescape_mount(tail_fields[1]), opts)
+
+
+def read_root_mount(pid: int, proc_root: str = PROC_ROOT) -> Optional[MountInfo]:
+    """Montage '/' vu par le processus (overlay pour la plupart des conteneurs)."""
+    try:
+        text = _read_text(os.path.join(proc_root, str(pid), "mountinfo"), 1 << 22)
+    except OSError:
+        return None
+    root = None
+    for mount in parse_mountinfo(text):
+        if mount.mount_point == "/":
+            root = mount  # le dernier montage sur '/' masque les précédents
+    return root
+
+
+def procfs_available(proc_root: str = PROC_ROOT) -> bool:
+    return Path(proc_root, "self", "status").exists() or Path(proc_root, "1", "status").exists()
+
+
+__all__ = [
+    "PROC_ROOT", "ProcInfo",
+    "iter_pids", "iter_procs", "read_proc", "read_exe_link", "boot_time",
+    "parse_status", "parse_stat_starttime", "procfs_available", "user_of",
+    "MapInfo", "read_environ", "parse_maps", "read_maps",
+    "SocketInfo", "ListenInfo", "decode_hex_addr", "parse_net_table", "read_net_sockets",
+    "socket_inode_pids", "list_listening_sockets",
+    "MountInfo", "read_cgroup", "container_id_of", "mnt_namespace", "parse_mountinfo", "read_root_mount",
+]
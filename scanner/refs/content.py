@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+from typing import Dict, List
+
+from scanner.utils import fetch_json, SIGNATURE_BASE_URL, CACHE_DIR
+
+# ---------------------------------------------------------------------------
+# Valeurs de secours (utilisées si le dépôt de signatures est indisponible)
+# Chaque entrée : {"id": identifiant stable, "pattern": chaîne littérale, "severity": INFO|MEDIUM|HIGH}
+# ---------------------------------------------------------------------------
+
+# BEGIN DEFAULT_CONTENT_PATTERNS (AUTO)
+DEFAULT_CONTENT_PATTERNS: List[Dict[str, str]] = [
+    {"id": "drainer:checkethereumw", "pattern": "checkethereumw", "severity": "HIGH"},
+    {"id": "drainer:stealthProxyControl", "pattern": "stealthProxyControl", "severity": "HIGH"},
+    {"id": "drainer:newdlocal", "pattern": "newdlocal", "severity": "HIGH"},
+    {"id": "drainer:runmask", "pattern": "runmask(", "severity": "HIGH"},
+    {"id": "shai-hulud:webhook", "pattern": "webhook.site/bb8ca5f6-4175-45d2-b042-fc9ebb8170b7", "severity": "HIGH"},
+    {"id": "shai-hulud:workflow", "pattern": "shai-hulud-workflow.yml", "severity": "HIGH"},
+    {"id": "phishing:npmjs.help", "pattern": "npmjs.help", "severity": "MEDIUM"}
+]
+# END DEFAULT_CONTENT_PATTERNS (AUTO)
+
+
+def _ensure_pattern_list(value) -> List[Dict[str, str]]:
+    """Transforme une valeur JSON en liste d'entrées {id, pattern, severity} valides (sinon [])."""
+    if not isinstance(value, list):
+        return []
+    out: List[Dict[str, str]] = []
+    for v in value:
+        if not isinstance(v, dict):
+            continue
+        pid = str(v.get("id") or "").strip()
+        pat = str(v.get("pattern") or "")
+        sev = str(v.get("severity") or "HIGH").strip().upper()
+        if pid and pat:
+            out.append({"id": pid, "pattern": pat, "severity": sev if sev in {"INFO", "MEDIUM", "HIGH"} else "HIGH"})
+    return out
+
+
+def _merge_by_id(*seqs: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Fusionne plusieurs listes ; une entrée distante remplace l'entrée locale de même id."""
+    merged: Dict[str, Dict[str, str]] = {}
+    for seq in seqs:
+        for entry in seq:
+            merged[entry["id"]] = entry
+    return list(merged.values())
+
+
+# ---------------------------------------------------------------------------
+# Chargement dynamique depuis le dépôt 'ioc-signatures'
+# ---------------------------------------------------------------------------
+
+_content_patterns = _ensure_pattern_list(
+    fetch_json(
+        f"{SIGNATURE_BASE_URL}/content_patterns.json",
+        CACHE_DIR / "content_patterns.json"
+    ).get("patterns", [])
+)
+
+# Signatures de contenu (fichiers JS des projets / node_modules)
+CONTENT_PATTERNS: List[Dict[str, str]] = _merge_by_id(DEFAULT_CONTENT_PATTERNS, _content_patterns)
+
+# Extensions analysées par l'étape "contenu"
+CONTENT_EXTENSIONS = {".js", ".cjs", ".mjs"}
+
+__all__ = ["CONTENT_PATTERNS", "CONTENT_EXTENSIONS"]
@@ -61,6 +61,10 @@ DEFAULT_SUSPICIOUS_SCRIPT_PATTERNS: List[str] = [
 ]
 # END DEFAULT_SUSPICIOUS_SCRIPT_PATTERNS (AUTO)
 
+# BEGIN DEFAULT_BAD_EXE_HASHES (AUTO)
+DEFAULT_BAD_EXE_HASHES: List[str] = []
+# END DEFAULT_BAD_EXE_HASHES (AUTO)
+
 
 # ---------------------------------------------------------------------------
 # Helpers internes
@@ -116,10 +120,18 @@ _script_patterns = _ensure_str_list(
     ).get("patterns", [])
 )
 
+_bad_exe_hashes = _ensure_str_list(
+    fetch_json(
+        f"{SIGNATURE_BASE_URL}/bad_hashes.json",
+        CACHE_DIR / "bad_hashes.json"
+    ).get("sha256", [])
+)
+
 # Fusion avec les valeurs par défaut (permet de fonctionner hors-ligne)
 MINER_FILE_HINTS: List[str] = _merge_unique(DEFAULT_MINER_FILE_HINTS, _file_hints)
 MINER_PROC_HINTS: List[str] = _merge_unique(DEFAULT_MINER_PROC_HINTS, _proc_hints)
 SUSPICIOUS_SCRIPT_PATTERNS: List[str] = _merge_unique(DEFAULT_SUSPICIOUS_SCRIPT_PATTERNS, _script_patterns)
+BAD_EXE_HASHES = {h.lower() for h in _merge_unique(DEFAULT_BAD_EXE_HASHES, _bad_exe_hashes)}
 
 # Heuristique CLI des mineurs (locale)
 SUSPICIOUS_CLI_REGEX = re.compile(
@@ -129,6 +141,7 @@ SUSPICIOUS_CLI_REGEX = re.compile(
 )
 
 __all__ = [
+    "BAD_EXE_HASHES",
     "MINER_FILE_HINTS",
     "MINER_PROC_HINTS",
     "SUSPICIOUS_CLI_REGEX",
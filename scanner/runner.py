@@ -0,0 +1,356 @@
+# scanner/runner.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio, os, queue, shlex, shutil, signal, subprocess, threading
+
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from scanner.cancel import CancelToken
+
+_IS_WIN = os.name == "nt"
+
+# Commandes externes exécutées simultanément
+RUNNER_CONCURRENCY: int = max(2, min(8, (os.cpu_count() or 2)))
+# Sorties mémorisées (octets) ; au-delà, les plus anciennes sont oubliées (relancées si redemandées)
+RUNNER_MEMO_BYTES: int = 64 * 1024 * 1024
+# Taille des lectures de stdout en mode flux
+STREAM_CHUNK: int = 64 * 1024
+
+Command = Union[Sequence[str], str]
+MemoKey = Tuple[Tuple[str, ...], str, bool]
+
+
+class CommandResult(NamedTuple):
+    code: int
+    stdout: str
+    stderr: str
+
+
+def _default_timeout() -> int:
+    from scanner import utils as _u   # EXEC_TIMEOUT est réglé par --exec-timeout après l'import
+    return _u.EXEC_TIMEOUT
+
+
+def _argv(cmd: Command, shell: bool) -> Tuple[str, ...]:
+    if isinstance(cmd, str):
+        return (cmd,) if shell else tuple(shlex.split(cmd, posix=not _IS_WIN))
+    return tuple(str(c) for c in cmd)
+
+
+class CommandRunner:
+    """
+    Commandes externes d'un scan : boucle asyncio dans un thread dédié, au plus `concurrency` processus
+    à la fois, chaque commande dans son propre groupe de processus (tué en entier au délai dépassé ou à
+    l'arrêt). Les résultats (argv, cwd) et les résolutions which() sont mémorisés pour la durée du scan.
+    Coroutines : run, stream, run_many ; depuis les étapes (threads) : run_sync, submit, iter_lines.
+    """
+
+    def __init__(self, *, concurrency: int = RUNNER_CONCURRENCY, memo_bytes: int = RUNNER_MEMO_BYTES) -> None:
+        self.concurrency = max(1, concurrency)
+        self.memo_bytes = memo_bytes
+        self._loop = asyncio.new_event_loop()
+        self._sem: Optional[asyncio.Semaphore] = None   # créé dans le thread de la boucle (Python < 3.10)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="command-runner", daemon=True)
+        self._thread.start()
+        self._memo: "OrderedDict[MemoKey, asyncio.Future]" = OrderedDict()
+        self._memo_size = 0
+        self._which: Dict[str, Optional[str]] = {}
+        self._which_lock = threading.Lock()
+        self._procs: Set[asyncio.subprocess.Process] = set()
+        self._closed = False
+        self.launched = 0   # processus réellement lancés (hors résultats mémorisés)
+
+    # -- résolution ------------------------------------------------------------
+    def which(self, cmd: str) -> Optional[str]:
+        with self._which_lock:
+            if cmd not in self._which:
+                self._which[cmd] = shutil.which(cmd)
+            return self._which[cmd]
+
+    # -- processus ---------------------------------------------------------------
+    def _slots(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._sem
+
+    async def _spawn(self, argv: Tuple[str, ...], cwd: Optional[str], shell: bool) -> asyncio.subprocess.Process:
+        kwargs = {"cwd": cwd, "stdin": asyncio.subprocess.DEVNULL,
+                  "stdout": asyncio.subprocess.PIPE, "stderr": asyncio.subprocess.PIPE}
+        if _IS_WIN:
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True   # pgid = pid : killpg atteint aussi les petits-enfants
+        if shell:
+            proc = await asyncio.create_subprocess_shell(argv[0], **kwargs)
+        else:
+            proc = await asyncio.create_subprocess_exec(*argv, **kwargs)
+        self.launched += 1
+        self._procs.add(proc)
+        return proc
+
+    async def _kill(self, proc: asyncio.subprocess.Process) -> None:
+        if proc.returncode is not None:
+            return
+        try:
+            if _IS_WIN:
+                killer = await asyncio.create_subprocess_exec(
+                    "taskkill", "/T", "/F", "/PID", str(proc.pid),
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+                await killer.wait()
+                if proc.returncode is None:
+                    proc.kill()
+            else:
+                os.killpg(proc.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError, OSError):
+            pass
+        try:
+            await asyncio.wait_for(proc.wait(), 5)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _execute(self, argv: Tuple[str, ...], cwd: Optional[str], shell: bool,
+                       timeout: Optional[float]) -> CommandResult:
+        async with self._slots():
+            if self._closed:
+                return CommandResult(1, "", "exécuteur fermé")
+            try:
+                proc = await self._spawn(argv, cwd, shell)
+            except (OSError, ValueError) as exc:
+                return CommandResult(1, "", str(exc))
+            try:
+                out, err = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await self._kill(proc)
+                return CommandResult(1, "", f"délai dépassé ({timeout}s) : {' '.join(argv)}")
+            except asyncio.CancelledError:
+                await self._kill(proc)
+                raise
+            finally:
+                self._procs.discard(proc)
+            return CommandResult(proc.returncode if proc.returncode is not None else 1,
+                                 out.decode("utf-8", "ignore"), err.decode("utf-8", "ignore"))
+
+    @staticmethod
+    def _size(fut: asyncio.Future) -> int:
+        if not fut.done() or fut.cancelled() or fut.exception() is not None:
+            return 0
+        res = fut.result()
+        return len(res.stdout) + len(res.stderr)
+
+    def _remember(self, key: MemoKey, fut: asyncio.Future) -> None:
+        if self._memo.get(key) is not fut:
+            return
+        if fut.cancelled() or fut.exception() is not None:
+            del self._memo[key]
+            return
+        self._memo_size += self._size(fut)
+        # les plus anciennes sorties terminées sont oubliées au-delà du budget
+        for old_key in list(self._memo):
+            if self._memo_size <= self.memo_bytes:
+                break
+            old = self._memo[old_key]
+            if old is fut or not old.done():
+                continue
+            self._memo_size -= self._size(old)
+            del self._memo[old_key]
+
+    async def run(self, cmd: Command, *, cwd: Optional[Union[str, Path]] = None, shell: bool = False,
+                  timeout: Optional[float] = None, memo: bool = True) -> CommandResult:
+        """(code, stdout, stderr) ; une commande identique déjà lancée (même argv, même cwd) n'est pas relancée."""
+        argv = _argv(cmd, shell)
+        cwd_s = str(cwd) if cwd else None
+        timeout = _default_timeout() if timeout is None else timeout
+        if not memo:
+            return await self._execute(argv, cwd_s, shell, timeout)
+        key = (argv, cwd_s or "", shell)
+        fut = self._memo.get(key)
+        if fut is None:
+            fut = self._memo[key] = asyncio.ensure_future(self._execute(argv, cwd_s, shell, timeout))
+            fut.add_done_callback(lambda f, k=key: self._remember(k, f))
+        else:
+            self._memo.move_to_end(key)
+        return await asyncio.shield(fut)
+
+    async def run_many(self, cmds: Sequence[Command], *, cwd: Optional[Union[str, Path]] = None,
+                       timeout: Optional[float] = None) -> List[CommandResult]:
+        """Plusieurs commandes en parallèle (dans la limite du sémaphore), résultats dans l'ordre donné."""
+        return list(await asyncio.gather(*(self.run(c, cwd=cwd, timeout=timeout) for c in cmds)))
+
+    async def stream_chunks(self, cmd: Command, *, cwd: Optional[Union[str, Path]] = None, shell: bool = False,
+                            timeout: Optional[float] = None) -> AsyncIterator[List[str]]:
+        """Lignes de stdout par paquets (lectures de STREAM_CHUNK octets), au fil de l'eau ; non mémorisé."""
+        argv = _argv(cmd, shell)
+        timeout = _default_timeout() if timeout is None else timeout
+        async with self._slots():
+            if self._closed:
+                return
+            try:
+                proc = await self._spawn(argv, str(cwd) if cwd else None, shell)
+            except (OSError, ValueError):
+                return
+            deadline = self._loop.time() + timeout
+            # stderr lu en parallèle : un tube plein bloquerait le processus
+            drain = asyncio.ensure_future(proc.stderr.read()) if proc.stderr is not None else None
+            tail = b""
+            eof = False
+            try:
+                assert proc.stdout is not None
+                while True:
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        data = await asyncio.wait_for(proc.stdout.read(STREAM_CHUNK), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                    if not data:
+                        eof = True
+                        if tail:
+                            yield [tail.decode("utf-8", "ignore").rstrip("\r")]
+                        break
+                    parts = (tail + data).split(b"\n")
+                    tail = parts.pop()
+                    if parts:
+                        yield [p.decode("utf-8", "ignore").rstrip("\r") for p in parts]
+            finally:
+                # fin normale du flux : on laisse le processus se terminer (dans le délai restant) ;
+                # abandon, annulation ou délai dépassé : le groupe est tué
+                try:
+                    if eof:
+                        await asyncio.wait_for(proc.wait(), max(0.0, deadline - self._loop.time()))
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    await self._kill(proc)   # sans effet si le processus s'est déjà terminé
+                    self._procs.discard(proc)
+                if drain is not None:
+                    drain.cancel()
+
+    async def stream(self, cmd: Command, **kwargs) -> AsyncIterator[str]:
+        """Lignes de stdout au fil de l'eau (sans tout garder en mémoire) ; non mémorisé."""
+        agen = self.stream_chunks(cmd, **kwargs)
+        try:
+            async for chunk in agen:
+                for line in chunk:
+                    yield line
+        finally:
+            await agen.aclose()
+
+    # -- appels depuis un thread -------------------------------------------------------
+    def submit(self, cmd: Command, **kwargs) -> Future:
+        """Lance (ou rejoint) la commande sans attendre ; run_sync sur les mêmes arguments récupère le résultat."""
+        return asyncio.run_coroutine_threadsafe(self.run(cmd, **kwargs), self._loop)
+
+    def run_sync(self, cmd: Command, **kwargs) -> CommandResult:
+        return self.submit(cmd, **kwargs).result()
+
+    def iter_lines(self, cmd: Command, **kwargs) -> Iterator[str]:
+        """Version bloquante de stream() : le processus est tué si l'itération est abandonnée."""
+        chunks: "queue.Queue[Optional[List[str]]]" = queue.Queue(maxsize=16)
+        stop = threading.Event()
+
+        async def pump() -> None:
+            agen = self.stream_chunks(cmd, **kwargs)
+            try:
+                async for chunk in agen:
+                    while not stop.is_set():
+                        try:
+                            chunks.put_nowait(chunk)
+                            break
+                        except queue.Full:
+                            await asyncio.sleep(0.01)
+                    if stop.is_set():
+                        break
+            finally:
+                await agen.aclose()   # tue le processus sans attendre le ramasse-miettes
+                chunks.put(None)
+
+        task = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None:
+                    break
+                yield from chunk
+        finally:
+            stop.set()
+            while not task.done():
+                try:
+                    chunks.get(timeout=0.05)
+                except queue.Empty:
+                    pass
+
+    # -- arrêt -----------------------------------------------------------------------------
+    async def _kill_all(self) -> None:
+        self._closed = True
+        await asyncio.gather(*(self._kill(p) for p in list(self._procs)))
+
+    def cancel_all(self) -> None:
+        """Tue les groupes de processus en cours ; les appels suivants échouent aussitôt."""
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._kill_all(), self._loop).result()
+
+    def abort(self) -> None:
+        """cancel_all sans attendre (abonné au jeton d'arrêt : appelé depuis n'importe quel thread)."""
+        self._closed = True
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._kill_all(), self._loop)
+
+    def close(self) -> None:
+        if not self._loop.is_running():
+            return
+        self.cancel_all()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+# ---------------------------------------------------------------------------
+# Exécuteur du scan en cours
+# ---------------------------------------------------------------------------
+
+_ACTIVE: Optional[CommandRunner] = None
+_DEPTH = 0
+_ACTIVE_LOCK = threading.Lock()
+
+
+@contextmanager
+def scan_runner(cancel: Optional[CancelToken] = None, **kwargs) -> Iterator[CommandRunner]:
+    """
+    Exécuteur partagé pendant un scan : run_capture_ext / which l'utilisent tant qu'il est actif.
+    Les scans imbriqués (conteneurs) réutilisent celui du scan englobant ; fermé par le dernier sorti.
+    cancel : les commandes en cours sont tuées dès l'arrêt demandé.
+    """
+    global _ACTIVE, _DEPTH
+    with _ACTIVE_LOCK:
+        if _ACTIVE is None:
+            _ACTIVE = CommandRunner(**kwargs)
+        _DEPTH += 1
+        runner = _ACTIVE
+    unsubscribe = cancel.on_cancel(runner.abort) if cancel is not None else None
+    try:
+        yield runner
+    finally:
+        if unsubscribe is not None:
+            unsubscribe()
+        with _ACTIVE_LOCK:
+            _DEPTH -= 1
+            last = _DEPTH == 0
+            if last:
+                _ACTIVE = None
+        if last:
+            runner.close()
+
+
+def current_runner() -> Optional[CommandRunner]:
+    return _ACTIVE
+
+
+__all__ = [
+    "RUNNER_CONCURRENCY", "RUNNER_MEMO_BYTES", "STREAM_CHUNK", "CommandResult", "CommandRunner", "current_runner", "scan_runner",
+]
@@ -3,11 +3,11 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-import csv, json, hashlib, locale, os, re, shutil, stat, subprocess, sys, requests, time
+import csv, json, hashlib, itertools, locale, os, re, shutil, stat, subprocess, sys, requests, threading, time
 
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 # --- Détection d'OS ---
 IS_WIN = os.name == "nt"
@@ -170,7 +170,16 @@ def write_json(rows: List[Dict[str, str]], path: str) -> None:
     out_path = Path(path)
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", encoding="utf-8") as fh:
-        json.dump(rows, fh, ensure_ascii=False, indent=2)
+        # ligne par ligne (mêmes octets que json.dump(indent=2)) : pas de copie complète en dict
+        if not rows:
+            fh.write("[]")
+            return
+        sep = "[\n  "
+        for row_rec in rows:
+            fh.write(sep)
+            fh.write(json.dumps(dict(row_rec), ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            sep = ",\n  "
+        fh.write("\n]")
 
 def write_csv(rows: List[Dict[str, str]], path: str, delimiter: str | None = None) -> None:
     """
@@ -207,9 +216,16 @@ def run_capture_ext(
     cwd: Optional[Path] = None,
     timeout: Optional[int] = None,
 ) -> Tuple[int, str, str]:
-    """Exécute une commande et retourne (code, stdout, stderr)."""
+    """
+    Exécute une commande et retourne (code, stdout, stderr). Pendant un scan, passe par l'exécuteur
+    partagé (scanner.runner) : commandes identiques mémorisées, groupe de processus tué au délai dépassé.
+    """
     if timeout is None:
         timeout = EXEC_TIMEOUT
+    from scanner.runner import current_runner
+    runner = current_runner()
+    if runner is not None:
+        return tuple(runner.run_sync(cmd, shell=shell, cwd=cwd, timeout=timeout))  # type: ignore[return-value]
     try:
         result = subprocess.run(
             cmd,
@@ -225,24 +241,125 @@ def run_capture_ext(
     except (subprocess.SubprocessError, OSError) as exc:
         return 1, "", str(exc)
 
+def iter_command_lines(cmd: Sequence[str], *, cwd: Optional[Path] = None,
+                       timeout: Optional[int] = None) -> Iterator[str]:
+    """
+    Lignes de stdout d'une commande, lues au fil de l'eau pendant un scan (sinon après exécution).
+    Même règle dans les deux cas : tout stdout est rendu, quel que soit le code de sortie (inconnu
+    tant que le flux n'est pas terminé) ; un échec de lancement ne produit aucune ligne.
+    """
+    from scanner.runner import current_runner
+    runner = current_runner()
+    if runner is not None:
+        yield from runner.iter_lines(cmd, cwd=cwd, timeout=timeout if timeout is not None else EXEC_TIMEOUT)
+        return
+    _, out, _ = run_capture_ext(cmd, cwd=cwd, timeout=timeout)
+    yield from out.splitlines()
+
 def which(cmd: str) -> bool:
-    """Retourne True si 'cmd' est résoluble dans le PATH."""
+    """Retourne True si 'cmd' est résoluble dans le PATH (mémorisé pendant un scan)."""
+    from scanner.runner import current_runner
+    runner = current_runner()
+    if runner is not None:
+        return runner.which(cmd) is not None
     return shutil.which(cmd) is not None
 
 # ---------------------------------------------------------------------------
 # Hash & heuristiques
 # ---------------------------------------------------------------------------
 
-def sha256_of(path: Path) -> str:
+# Taille des lectures de sha256_of (arrêt vérifié entre deux blocs)
+HASH_CHUNK = 1024 * 1024
+
+def sha256_of(path: Path, cancel: Optional[threading.Event] = None) -> str:
+    """SHA-256 hexadécimal ; '' si illisible ou si l'arrêt est demandé pendant la lecture."""
     try:
         digest = hashlib.sha256()
         with path.open("rb") as fh:
-            for chunk in iter(lambda: fh.read(8192), b""):
+            for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+                if cancel is not None and cancel.is_set():
+                    return ""
                 digest.update(chunk)
         return digest.hexdigest()
     except (OSError, PermissionError):
         return ""
 
+# Taille max du cache de hash (au-delà : les entrées les moins récemment utilisées sont retirées)
+HASH_CACHE_MAX_ENTRIES = 50_000
+
+class HashCache:
+    """
+    Cache persistant (JSON dans CACHE_DIR) des SHA-256, indexé par (dev, inode, taille, mtime, ctime) :
+    le ctime suit toute réécriture, même si le mtime est restauré ensuite (touch -r).
+    Un même binaire partagé par des centaines de processus n'est lu qu'une fois,
+    et n'est relu d'un scan à l'autre que s'il a changé. Une seule entrée par (dev, inode) ;
+    le fichier est borné (ordre LRU) et réécrit de façon atomique.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = HASH_CACHE_MAX_ENTRIES) -> None:
+        self.path = path or (CACHE_DIR / "hash_cache.json")
+        self.max_entries = max(1, max_entries)
+        data = read_json(self.path) if self.path.exists() else None
+        # clés d'un ancien format (sans ctime) écartées : ces fichiers seront relus une fois
+        self._entries: Dict[str, str] = ({k: v for k, v in data.items() if k.count(":") == 4}
+                                         if isinstance(data, dict) else {})
+        self._dirty = isinstance(data, dict) and len(self._entries) != len(data)
+        self._by_inode: Dict[str, str] = {self._inode_of(key): key for key in self._entries}
+
+    @staticmethod
+    def key_of(st: os.stat_result) -> str:
+        return f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{st.st_ctime_ns}"
+
+    @staticmethod
+    def _inode_of(key: str) -> str:
+        return key.rsplit(":", 3)[0]
+
+    def digest(self, path: Path, st: Optional[os.stat_result] = None,
+               cancel: Optional[threading.Event] = None) -> str:
+        """SHA-256 de 'path' (st : stat déjà connu du fichier). '' si illisible ou arrêt demandé."""
+        try:
+            st = st or os.stat(path)
+        except OSError:
+            return ""
+        key = self.key_of(st)
+        cached = self._entries.pop(key, None)
+        if cached:
+            self._entries[key] = cached   # en fin d'ordre : récemment utilisée
+            return cached
+        digest = sha256_of(path, cancel)
+        if digest:
+            inode = self._inode_of(key)
+            stale = self._by_inode.get(inode)
+            if stale is not None:
+                self._entries.pop(stale, None)   # même inode, contenu modifié (ou inode réutilisé)
+            self._entries[key] = digest
+            self._by_inode[inode] = key
+            self._dirty = True
+        return digest
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        excess = len(self._entries) - self.max_entries
+        if excess > 0:
+            for key in list(itertools.islice(self._entries, excess)):
+                del self._entries[key]
+                inode = self._inode_of(key)
+                if self._by_inode.get(inode) == key:
+                    del self._by_inode[inode]
+        # écriture atomique : un scan interrompu ou concurrent ne laisse jamais un JSON tronqué
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(json.dumps(self._entries), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"[!] Erreur fichier cache {self.path}: {e}")
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
 def looks_user_or_temp(path: os.PathLike[str] | str) -> bool:
     """
     True si le chemin ressemble à un dossier utilisateur/temporaires
@@ -268,7 +385,8 @@ def list_processes() -> Iterable[tuple[str, int, str, Optional[str]]]:
     """
     Itère (name, pid, cmdline, user?) sur les processus.
     - Windows: wmic / tasklist (fallback)
-    - Linux/mac: ps -e -o ...
+    - Linux: /proc (fallback ps)
+    - macOS: ps -e -o ...
     """
     if IS_WIN:
         code, out, _ = run_capture_ext(["wmic", "process", "get", "Name,ProcessId,CommandLine", "/FORMAT:CSV"])
@@ -298,20 +416,26 @@ def list_processes() -> Iterable[tuple[str, int, str, Optional[str]]]:
                     yield name, pid, "", None
         return
 
-    # Linux / macOS
-    code, out, _ = run_capture_ext(["ps", "-e", "-o", "pid=,comm=,args=,user="])
-    if code == 0 and out:
-        pat = re.compile(r"^\s*(\d+)\s+(\S+)\s+(.*\S)?\s+(\S+)\s*$")
-        for line in out.splitlines():
-            m = pat.match(line)
-            if not m:
-                continue
-            pid = int(m.group(1))
-            comm = m.group(2) or ""
-            args_part = (m.group(3) or "").strip()
-            user = m.group(4) or None
-            name = (args_part.split()[0] if args_part else comm)
-            yield name, pid, args_part, user
+    # Linux : lecture directe de /proc (pas de fork, cmdline non ambiguë)
+    if IS_LIN:
+        from scanner.procfs import iter_procs, procfs_available
+        if procfs_available():
+            for info in iter_procs():
+                yield info.name, info.pid, info.args, info.user
+            return
+
+    # macOS (ou Linux sans /proc)
+    pat = re.compile(r"^\s*(\d+)\s+(\S+)\s+(.*\S)?\s+(\S+)\s*$")
+    for line in iter_command_lines(["ps", "-e", "-o", "pid=,comm=,args=,user="]):
+        m = pat.match(line)
+        if not m:
+            continue
+        pid = int(m.group(1))
+        comm = m.group(2) or ""
+        args_part = (m.group(3) or "").strip()
+        user = m.group(4) or None
+        name = (args_part.split()[0] if args_part else comm)
+        yield name, pid, args_part, user
 
 # ---------------------------------------------------------------------------
 # Divers Linux utiles (facultatif, mais pratique à centraliser)
@@ -336,9 +460,9 @@ __all__ = [
     # E/S
     "read_json", "write_json", "write_csv",
     # exécution
-    "run_capture_ext", "which",
+    "run_capture_ext", "iter_command_lines", "which",
     # hash & heuristiques
-    "sha256_of", "looks_user_or_temp",
+    "sha256_of", "HashCache", "looks_user_or_temp",
     # process
     "list_processes",
     # linux-tuning
@@ -0,0 +1,48 @@
+# tests/test_checkpoint.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import json
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from scanner.core.checkpoint import Checkpoint, StageMark
+from scanner.core.common import Finding
+from scanner.core.sinks import BATCH_ROWS, FindingStream
+
+
+def _rows(prefix: str, n: int):
+    return [Finding("Fichier", prefix, f"/srv/{prefix}/{i}", "", "HIGH") for i in range(n)]
+
+
+def _run(checkpoint: Checkpoint, new_rows, *, replay: bool = False) -> None:
+    """Étape interrompue après un repère : constats (rejoués puis nouveaux), repère, puis arrêt."""
+    stream = FindingStream(checkpoint=checkpoint)
+    if replay:
+        stream.extend(checkpoint.replay())
+    stream.extend(new_rows)
+    stream.mark(StageMark("files", {"done": {}, "open": []}))
+    stream.close()
+    checkpoint.finish("interrupted")
+
+
+def test_resume_after_many_replayed_rows_keeps_journaling(tmp_path: Path):
+    replayed = 40 * BATCH_ROWS
+    checkpoint = Checkpoint.create(tmp_path / "root", [], SimpleNamespace(), directory=tmp_path)
+    _run(checkpoint, _rows("avant", replayed))
+
+    # première reprise : rejeu (plusieurs lots transmis à l'écrivain) puis nouveaux constats
+    _run(Checkpoint.load(checkpoint.scan_id, directory=tmp_path), _rows("après", 1000), replay=True)
+
+    journal = (tmp_path / f"{checkpoint.scan_id}.jsonl").read_bytes().splitlines()
+    assert len(journal) == replayed + 1000
+    assert json.loads(journal[-1])[2] == "/srv/après/999"
+
+    # seconde reprise : tous les constats sont rejoués, une seule fois et dans l'ordre
+    resumed = Checkpoint.load(checkpoint.scan_id, directory=tmp_path)
+    items = [row["Item"] for row in resumed.replay()]
+    resumed.finish("interrupted")
+    assert items == [r["Item"] for r in _rows("avant", replayed) + _rows("après", 1000)]
+    state = json.loads((tmp_path / f"{checkpoint.scan_id}.json").read_text(encoding="utf-8"))
+    assert state["rows"] == replayed + 1000
@@ -0,0 +1,119 @@
+# tests/test_lnk.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import struct
+
+from pathlib import Path
+
+from scanner.parsers.lnk import (
+    COMMON_NETWORK_RELATIVE_LINK, ENVIRONMENT_VARIABLE_BLOCK, HAS_ARGUMENTS, HAS_LINK_INFO, HAS_NAME,
+    HAS_RELATIVE_PATH, HAS_WORKING_DIR, IS_UNICODE, LNK_CLSID, LNK_HEADER_SIZE, VOLUME_ID_AND_LOCAL_BASE_PATH,
+    parse_lnk, parse_lnk_bytes, resolved_target,
+)
+
+
+# --- constructeurs de fixtures (MS-SHLLINK, champs réduits au nécessaire) ---
+
+def _header(flags: int) -> bytes:
+    head = struct.pack("<I16sI", LNK_HEADER_SIZE, LNK_CLSID, flags)
+    return head + b"\0" * (LNK_HEADER_SIZE - len(head))
+
+
+def _link_info_local(base: str, suffix: str = "", *, unicode: bool = False) -> bytes:
+    """LinkInfo avec VolumeID + LocalBasePath (ANSI, ou Unicode : en-tête de 0x24 octets)."""
+    header_size = 0x24 if unicode else 0x1C
+    volume = struct.pack("<4I", 0x10, 3, 0, 0x10)   # VolumeID minimal, libellé vide
+    vol_off = header_size
+    local_off = vol_off + len(volume)
+    local = base.encode("cp1252") + b"\0"
+    suffix_off = local_off + len(local)
+    body = volume + local + suffix.encode("cp1252") + b"\0"
+    extra = b""
+    if unicode:
+        local_u_off = header_size + len(body)
+        local_u = base.encode("utf-16-le") + b"\0\0"
+        suffix_u_off = local_u_off + len(local_u)
+        extra = struct.pack("<2I", local_u_off, suffix_u_off)
+        body += local_u + suffix.encode("utf-16-le") + b"\0\0"
+    fixed = struct.pack("<6I", header_size, VOLUME_ID_AND_LOCAL_BASE_PATH, vol_off, local_off, 0, suffix_off)
+    block = fixed + extra + body
+    return struct.pack("<I", 4 + len(block)) + block
+
+
+def _link_info_network(share: str, suffix: str) -> bytes:
+    header_size = 0x1C
+    name = share.encode("cp1252") + b"\0"
+    net = struct.pack("<5I", 0x14 + len(name), 0, 0x14, 0, 0) + name
+    net_off = header_size
+    suffix_off = net_off + len(net)
+    fixed = struct.pack("<6I", header_size, COMMON_NETWORK_RELATIVE_LINK, 0, 0, net_off, suffix_off)
+    block = fixed + net + suffix.encode("cp1252") + b"\0"
+    return struct.pack("<I", 4 + len(block)) + block
+
+
+def _string_data(value: str, *, unicode: bool = True) -> bytes:
+    raw = value.encode("utf-16-le" if unicode else "cp1252")
+    return struct.pack("<H", len(value)) + raw
+
+
+def _env_block(target: str) -> bytes:
+    ansi = target.encode("cp1252").ljust(260, b"\0")
+    wide = target.encode("utf-16-le").ljust(520, b"\0")
+    return struct.pack("<2I", 0x314, ENVIRONMENT_VARIABLE_BLOCK) + ansi + wide
+
+
+TERMINAL_BLOCK = b"\0\0\0\0"
+
+
+# --- tests ---
+
+def test_link_info_and_string_data():
+    flags = HAS_LINK_INFO | HAS_NAME | HAS_WORKING_DIR | HAS_ARGUMENTS | IS_UNICODE
+    data = (_header(flags) + _link_info_local("C:\\Windows\\System32\\cmd.exe")
+            + _string_data("Mise à jour") + _string_data("C:\\Users\\Public")
+            + _string_data("/c powershell -enc SQBFAFgA") + TERMINAL_BLOCK)
+    link = parse_lnk_bytes(data)
+    assert link is not None
+    assert link.target == "C:\\Windows\\System32\\cmd.exe"
+    assert link.name == "Mise à jour"
+    assert link.working_dir == "C:\\Users\\Public"
+    assert link.arguments == "/c powershell -enc SQBFAFgA"
+
+
+def test_link_info_unicode_offsets_and_suffix():
+    data = _header(HAS_LINK_INFO) + _link_info_local("D:\\Outils\\", "déploiement.exe", unicode=True)
+    link = parse_lnk_bytes(data + TERMINAL_BLOCK)
+    assert link is not None and link.target == "D:\\Outils\\déploiement.exe"
+
+
+def test_link_info_network_share():
+    data = _header(HAS_LINK_INFO) + _link_info_network("\\\\srv\\partage", "payload.exe") + TERMINAL_BLOCK
+    link = parse_lnk_bytes(data)
+    assert link is not None and link.target == "\\\\srv\\partage\\payload.exe"
+
+
+def test_environment_block_used_without_link_info():
+    flags = HAS_ARGUMENTS | IS_UNICODE
+    data = (_header(flags) + _string_data("//B C:\\Users\\Public\\run.vbs")
+            + _env_block("%windir%\\System32\\wscript.exe") + TERMINAL_BLOCK)
+    link = parse_lnk_bytes(data)
+    assert link is not None
+    assert link.target == "%windir%\\System32\\wscript.exe"
+    assert link.arguments == "//B C:\\Users\\Public\\run.vbs"
+
+
+def test_ansi_strings_and_relative_target(tmp_path: Path):
+    data = _header(HAS_RELATIVE_PATH) + _string_data("..\\bin\\tool.exe", unicode=False) + TERMINAL_BLOCK
+    lnk = tmp_path / "startup" / "tool.lnk"
+    lnk.parent.mkdir()
+    lnk.write_bytes(data)
+    link = parse_lnk(lnk)
+    assert link is not None and link.relative_path == "..\\bin\\tool.exe" and link.target == ""
+    assert resolved_target(link, lnk) == str(tmp_path / "bin" / "tool.exe")
+
+
+def test_rejects_non_lnk_and_truncated_data():
+    assert parse_lnk_bytes(b"MZ" + b"\0" * 200) is None
+    truncated = _header(HAS_LINK_INFO | HAS_ARGUMENTS | IS_UNICODE)
+    assert parse_lnk_bytes(truncated + b"\x10") is None
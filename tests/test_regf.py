@@ -0,0 +1,147 @@
+# tests/test_regf.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import struct
+
+from pathlib import Path
+from typing import Sequence, Tuple
+
+import pytest
+
+from scanner.parsers.regf import (
+    BIG_DATA_SEGMENT, HBIN_START, NO_CELL, REG_BINARY, REG_DWORD, REG_EXPAND_SZ, REG_MULTI_SZ, REG_QWORD,
+    REG_SZ, RegistryHive, open_hive,
+)
+
+
+# --- constructeur de ruche minimale (bloc de base + un hbin ; cellules nk/vk/lf/li/ri/db) ---
+
+class HiveBuilder:
+    def __init__(self) -> None:
+        self.data = bytearray(b"hbin" + b"\0" * 0x1C)   # en-tête du premier hbin (non vérifié par le parseur)
+
+    def cell(self, content: bytes) -> int:
+        """Ajoute une cellule allouée (taille négative, alignée sur 8) ; retourne son offset."""
+        offset = len(self.data)
+        size = (4 + len(content) + 7) // 8 * 8
+        self.data += struct.pack("<i", -size) + content + b"\0" * (size - 4 - len(content))
+        return offset
+
+    def key(self, name: str, *, subkeys: int = 0, subkeys_off: int = NO_CELL,
+            values: Sequence[int] = ()) -> int:
+        compressed = all(ord(c) < 0x100 for c in name)
+        raw = name.encode("latin-1") if compressed else name.encode("utf-16-le")
+        values_off = self.cell(b"".join(struct.pack("<I", v) for v in values)) if values else NO_CELL
+        head = struct.pack("<2sH8s15IHH", b"nk", 0x0020 if compressed else 0, b"\0" * 8, 0, 0,
+                           subkeys, 0, subkeys_off, NO_CELL, len(values), values_off, NO_CELL, NO_CELL,
+                           0, 0, 0, 0, 0, len(raw), 0)
+        return self.cell(head + raw)
+
+    def value(self, name: str, vtype: int, raw: bytes) -> int:
+        compressed = all(ord(c) < 0x100 for c in name)
+        name_raw = name.encode("latin-1") if compressed else name.encode("utf-16-le")
+        if len(raw) <= 4:   # données résidentes dans le champ offset
+            length, data_off = 0x80000000 | len(raw), struct.unpack("<I", raw.ljust(4, b"\0"))[0]
+        elif len(raw) > BIG_DATA_SEGMENT:
+            length, data_off = len(raw), self.big_data(raw)
+        else:
+            length, data_off = len(raw), self.cell(raw)
+        head = struct.pack("<2sHIIIHH", b"vk", len(name_raw), length, data_off, vtype, int(compressed), 0)
+        return self.cell(head + name_raw)
+
+    def big_data(self, raw: bytes) -> int:
+        segments = [self.cell(raw[i:i + BIG_DATA_SEGMENT]) for i in range(0, len(raw), BIG_DATA_SEGMENT)]
+        seg_list = self.cell(b"".join(struct.pack("<I", s) for s in segments))
+        return self.cell(struct.pack("<2sHI", b"db", len(segments), seg_list))
+
+    def lf(self, keys: Sequence[Tuple[int, str]]) -> int:
+        entries = b"".join(struct.pack("<I4s", off, name[:4].encode("latin-1").ljust(4, b"\0")) for off, name in keys)
+        return self.cell(struct.pack("<2sH", b"lf", len(keys)) + entries)
+
+    def li(self, offsets: Sequence[int]) -> int:
+        return self.cell(struct.pack("<2sH", b"li", len(offsets)) + b"".join(struct.pack("<I", o) for o in offsets))
+
+    def ri(self, lists: Sequence[int]) -> int:
+        return self.cell(struct.pack("<2sH", b"ri", len(lists)) + b"".join(struct.pack("<I", o) for o in lists))
+
+    def write(self, path: Path, root: int, minor_version: int = 5) -> Path:
+        body = bytes(self.data) + b"\0" * (-len(self.data) % 0x1000)
+        base = bytearray(HBIN_START)
+        base[:4] = b"regf"
+        struct.pack_into("<II", base, 0x14, 1, minor_version)
+        struct.pack_into("<I", base, 0x24, root)
+        struct.pack_into("<I", base, 0x28, len(body))
+        path.write_bytes(bytes(base) + body)
+        return path
+
+
+def _sz(text: str) -> bytes:
+    return (text + "\0").encode("utf-16-le")
+
+
+BLOB = bytes(range(256)) * 80   # > BIG_DATA_SEGMENT : stocké en segments "db"
+
+
+@pytest.fixture
+def hive_path(tmp_path: Path) -> Path:
+    b = HiveBuilder()
+    run_values = [
+        b.value("Updater", REG_SZ, _sz("C:\\Users\\Public\\up.exe")),
+        b.value("", REG_EXPAND_SZ, _sz("%TEMP%\\x.exe")),
+        b.value("Count", REG_DWORD, struct.pack("<I", 7)),
+        b.value("Paths", REG_MULTI_SZ, _sz("a") + _sz("b") + b"\0\0"),
+        b.value("Blob", REG_BINARY, BLOB),
+        b.value("Clé‐Ω", REG_SZ, _sz("unicode")),
+    ]
+    run = b.key("Run", values=run_values)
+    software = b.key("Software", subkeys=1, subkeys_off=b.lf([(run, "Run")]))
+    session = b.key("Session Manager", values=[b.value("Uptime", REG_QWORD, struct.pack("<Q", 1 << 40))])
+    system = b.key("Système‐Ω", subkeys=1, subkeys_off=b.li([session]))
+    # racine : liste de listes (ri) regroupant un lf et un li
+    root_list = b.ri([b.lf([(software, "Software")]), b.li([system])])
+    root = b.key("ROOT", subkeys=2, subkeys_off=root_list)
+    return b.write(tmp_path / "NTUSER.DAT", root)
+
+
+def test_keys_through_ri_lf_li(hive_path: Path):
+    with RegistryHive(hive_path) as hive:
+        assert hive.root.name == "ROOT"
+        assert [k.name for k in hive.root.subkeys()] == ["Software", "Système‐Ω"]
+        assert hive.open_key("software\\RUN") is not None           # insensible à la casse
+        assert hive.open_key("Système‐Ω/Session Manager").value("Uptime") == 1 << 40
+        assert hive.open_key("Software\\Missing") is None
+
+
+def test_values_of_each_type(hive_path: Path):
+    with RegistryHive(hive_path) as hive:
+        run = hive.open_key("Software\\Run")
+        values = {v.name: (v.type, v.data) for v in run.values()}
+    assert values["Updater"] == (REG_SZ, "C:\\Users\\Public\\up.exe")
+    assert values[""] == (REG_EXPAND_SZ, "%TEMP%\\x.exe")
+    assert values["Count"] == (REG_DWORD, 7)                           # données résidentes
+    assert values["Paths"] == (REG_MULTI_SZ, ["a", "b"])
+    assert values["Blob"] == (REG_BINARY, BLOB)                        # segments "db" réassemblés
+    assert values["Clé‐Ω"] == (REG_SZ, "unicode")                      # nom non compressé (UTF-16)
+
+
+def test_big_data_needs_recent_hive_version(tmp_path: Path):
+    b = HiveBuilder()
+    root = b.key("ROOT", values=[b.value("Blob", REG_BINARY, BLOB)])
+    path = b.write(tmp_path / "OLD", root, minor_version=3)
+    with RegistryHive(path) as hive:
+        blob = hive.root.value("Blob")
+    assert blob[:2] == b"db"   # avant 1.4, pas de cellule "db" : la cellule est lue telle quelle
+
+
+def test_invalid_or_corrupted_hives(tmp_path: Path):
+    garbage = tmp_path / "garbage"
+    garbage.write_bytes(b"MZ" + b"\0" * 0x2000)
+    assert open_hive(garbage) is None
+    assert open_hive(tmp_path / "absent") is None
+
+    b = HiveBuilder()
+    root = b.key("ROOT", subkeys=1, subkeys_off=b.li([0x7FFF0000]))   # sous-clé hors ruche
+    with RegistryHive(b.write(tmp_path / "BROKEN", root)) as hive:
+        assert list(hive.root.subkeys()) == []
+        assert hive.open_key("Anything") is None
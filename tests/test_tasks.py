@@ -0,0 +1,111 @@
+# tests/test_tasks.py
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os
+
+from pathlib import Path
+
+import scanner.parsers.tasks as tasks_mod
+from scanner.parsers.tasks import TaskAction, parse_task_file, parse_task_xml, parse_tasks_dir
+
+# Définition telle qu'écrite par le Planificateur de tâches (UTF-16 LE avec BOM)
+TASK_XML = """<?xml version="1.0" encoding="UTF-16"?>
+<Task version="1.2" xmlns="http://schemas.microsoft.com/windows/2004/02/mit/task">
+  <RegistrationInfo>
+    <Author>WORKGROUP\\Opérateur</Author>
+    <URI>\\Microsoft\\Windows\\Mise à jour\\Updater</URI>
+  </RegistrationInfo>
+  <Triggers>
+    <LogonTrigger><Enabled>true</Enabled></LogonTrigger>
+    <TimeTrigger><StartBoundary>2024-01-01T09:00:00</StartBoundary></TimeTrigger>
+    <BootTrigger><Enabled>false</Enabled></BootTrigger>
+  </Triggers>
+  <Principals>
+    <Principal id="Author"><UserId>S-1-5-18</UserId><RunLevel>HighestAvailable</RunLevel></Principal>
+  </Principals>
+  <Settings>
+    <Enabled>true</Enabled>
+    <Hidden>true</Hidden>
+  </Settings>
+  <Actions Context="Author">
+    <Exec>
+      <Command>%windir%\\System32\\WindowsPowerShell\\v1.0\\powershell.exe</Command>
+      <Arguments>-w hidden -enc SQBFAFgA</Arguments>
+      <WorkingDirectory>C:\\Users\\Public</WorkingDirectory>
+    </Exec>
+    <ComHandler><ClassId>{01575CFE-9A55-4003-A5E1-F38D1EBDCBE1}</ClassId><Data>payload</Data></ComHandler>
+  </Actions>
+</Task>
+"""
+
+
+def test_utf16_task_definition():
+    task = parse_task_xml(TASK_XML.encode("utf-16"), "Updater", "C:\\Windows\\System32\\Tasks\\Updater")
+    assert task is not None
+    assert task.name == "\\Microsoft\\Windows\\Mise à jour\\Updater"
+    assert task.author == "WORKGROUP\\Opérateur"
+    assert task.user == "S-1-5-18"
+    assert task.enabled and task.hidden
+    assert task.triggers == ["LogonTrigger", "TimeTrigger@2024-01-01T09:00:00"]
+    assert task.actions == [
+        TaskAction("Exec", "%windir%\\System32\\WindowsPowerShell\\v1.0\\powershell.exe",
+                   "-w hidden -enc SQBFAFgA", "C:\\Users\\Public"),
+        TaskAction("ComHandler", "{01575CFE-9A55-4003-A5E1-F38D1EBDCBE1}", "payload", ""),
+    ]
+
+
+def test_declared_encoding_mismatch_is_decoded_from_bom():
+    # en-tête UTF-8 mais contenu UTF-16 (fichiers copiés/modifiés à la main)
+    data = TASK_XML.replace('encoding="UTF-16"', 'encoding="UTF-8"').encode("utf-16")
+    task = parse_task_xml(data)
+    assert task is not None and task.actions[0].arguments == "-w hidden -enc SQBFAFgA"
+
+
+def test_disabled_task_and_missing_uri_uses_file_name(tmp_path: Path):
+    xml = TASK_XML.replace("<Enabled>true</Enabled>\n    <Hidden>", "<Enabled>false</Enabled>\n    <Hidden>")
+    xml = xml.replace("<URI>\\Microsoft\\Windows\\Mise à jour\\Updater</URI>", "")
+    task_file = tmp_path / "Tasks" / "Contoso" / "Sync"
+    task_file.parent.mkdir(parents=True)
+    task_file.write_bytes(xml.encode("utf-16"))
+    task = parse_task_file(task_file, tmp_path / "Tasks")
+    assert task is not None
+    assert task.name == "\\Contoso\\Sync"
+    assert not task.enabled
+
+
+def test_tasks_dir_skips_invalid_and_oversized_files(tmp_path: Path):
+    root = tmp_path / "Tasks"
+    (root / "Microsoft").mkdir(parents=True)
+    (root / "Microsoft" / "Good").write_bytes(TASK_XML.encode("utf-16"))
+    (root / "notes.txt").write_bytes(b"pas du XML")
+    (root / "Other").write_bytes(b'<?xml version="1.0"?><Config/>')
+    (root / "Huge").write_bytes(b" " * ((1 << 20) + 1))
+    tasks = parse_tasks_dir(root, workers=2)
+    assert [t.path for t in tasks] == [str(root / "Microsoft" / "Good")]
+
+
+def test_tasks_dir_reports_denied_entries(tmp_path: Path, monkeypatch):
+    # poste non élevé : une partie de System32\Tasks est protégée par ACL
+    root = tmp_path / "Tasks"
+    (root / "Secret").mkdir(parents=True)
+    (root / "Good").write_bytes(TASK_XML.encode("utf-16"))
+    (root / "Locked").write_bytes(TASK_XML.encode("utf-16"))
+    scandir, real_open = os.scandir, open
+
+    def guarded_scandir(path):
+        if Path(path).name == "Secret":
+            raise PermissionError(13, "Accès refusé", str(path))
+        return scandir(path)
+
+    def guarded_open(path, *args, **kwargs):
+        if Path(path).name == "Locked":
+            raise PermissionError(13, "Accès refusé", str(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(tasks_mod.os, "scandir", guarded_scandir)
+    monkeypatch.setattr(tasks_mod, "open", guarded_open, raising=False)
+    denied: list = []
+    tasks = parse_tasks_dir(root, denied=denied)
+    assert [t.path for t in tasks] == [str(root / "Good")]
+    assert sorted(denied) == [root / "Locked", root / "Secret"]